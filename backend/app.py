@@ -1,22 +1,106 @@
 from fastapi import FastAPI, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.datastructures import MutableHeaders
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from typing import List
+from contextlib import asynccontextmanager
+import asyncio
+import math
+import os
+import time
 import uvicorn
 
-from database import engine, get_db, Base
+from database import (
+    engine, async_engine, get_db, ASYNC_DB_ENABLED, MAX_CONCURRENT_REQUESTS, log_database_settings,
+    DATABASE_READ_URL, READ_STICKY_SECONDS, STICKY_COOKIE
+)
 from models import Patient, Hospital, Transfer, TransferStatus
-from routes import patients, hospitals, transfers
+from occupancy import ensure_occupancy_seeded, start_reconciler
+from archive import start_archiver
+from changelog import ensure_change_log_seeded
+from search import ensure_search_index
+from audit import audit_writer
+from metrics import MetricsMiddleware, render_metrics
+from diagnostics import DiagnosticsMiddleware
+from compression import CompressionMiddleware
+from versions import ensure_collection_versions
+from migrate import ensure_schema
+from routes import patients, hospitals, transfers, dashboard, events, sync, audit, diagnostics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_database_settings()
+    ensure_schema()
+    ensure_occupancy_seeded()
+    ensure_change_log_seeded()
+    ensure_search_index()
+    ensure_collection_versions()
+    stop_reconciler = start_reconciler()
+    stop_archiver = start_archiver()
+    audit_writer.start()
+    yield
+    stop_reconciler.set()
+    stop_archiver.set()
+    audit_writer.stop()
+    if ASYNC_DB_ENABLED:
+        await async_engine.dispose()
+
+class ConnectionLimitMiddleware:
+    """Admit at most `limit` HTTP requests at a time so they never outnumber pooled connections"""
+
+    def __init__(self, app, limit: int, exempt_prefixes=()):
+        self.app = app
+        self.semaphore = asyncio.Semaphore(limit)
+        self.exempt_prefixes = tuple(exempt_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_prefixes):
+            return await self.app(scope, receive, send)
+        async with self.semaphore:
+            await self.app(scope, receive, send)
+
+class ReadYourWritesMiddleware:
+    """Marks a client that has just written so its replica-eligible reads go to the primary"""
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, app, window: float = READ_STICKY_SECONDS):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in self.SAFE_METHODS:
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + self.window
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{STICKY_COOKIE}={until:.3f}; Max-Age={math.ceil(self.window)}; Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+        await self.app(scope, receive, send_wrapper)
 
 app = FastAPI(
     title="MedCare System API",
     description="Patient-Hospital Workflow Optimization Platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Event streams are long-lived but never touch the database, so they don't take a slot
+app.add_middleware(
+    ConnectionLimitMiddleware, limit=MAX_CONCURRENT_REQUESTS, exempt_prefixes=["/api/events", "/metrics"]
+)
+
+if DATABASE_READ_URL:
+    app.add_middleware(ReadYourWritesMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -26,10 +110,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include routers
+# Inside metrics, so response-size metrics record the bytes actually sent
+app.add_middleware(CompressionMiddleware)
+
+# Always installed; it passes requests straight through until diagnostics are enabled
+app.add_middleware(DiagnosticsMiddleware)
+
+# Outermost, so recorded latency includes time spent waiting for a request slot
+app.add_middleware(MetricsMiddleware)
+
+# Include routers (async read handlers first so they take precedence when enabled)
+if ASYNC_DB_ENABLED:
+    from routes import async_reads
+    app.include_router(async_reads.router, prefix="/api")
 app.include_router(patients.router, prefix="/api/patients", tags=["Patients"])
 app.include_router(hospitals.router, prefix="/api/hospitals", tags=["Hospitals"])
 app.include_router(transfers.router, prefix="/api/transfers", tags=["Transfers"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
+app.include_router(events.router, prefix="/api/events", tags=["Events"])
+app.include_router(sync.router, prefix="/api/sync", tags=["Sync"])
+app.include_router(audit.router, prefix="/api/audit", tags=["Audit"])
+app.include_router(diagnostics.router, prefix="/api/diagnostics", tags=["Diagnostics"])
 
 @app.get("/")
 def root():
@@ -40,13 +141,37 @@ def root():
             "patients": "/api/patients",
             "hospitals": "/api/hospitals",
             "transfers": "/api/transfers",
+            "dashboard": "/api/dashboard/summary",
+            "events": "/api/events",
+            "sync": "/api/sync",
+            "audit": "/api/audit",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     }
 
+HEALTH_DB_TIMEOUT = float(os.getenv("HEALTH_DB_TIMEOUT_SECONDS", "2"))
+
+def _probe_database():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
 @app.get("/health")
-def health_check():
-    return {"status": "healthy", "database": "connected"}
+async def health_check():
+    """Probe the database with a short timeout; 503 when it is unreachable or too slow"""
+    started = asyncio.get_running_loop().time()
+    try:
+        await asyncio.wait_for(run_in_threadpool(_probe_database), HEALTH_DB_TIMEOUT)
+    except asyncio.TimeoutError:
+        return JSONResponse(status_code=503, content={"status": "unhealthy", "database": "timeout"})
+    except Exception as exc:
+        return JSONResponse(status_code=503, content={"status": "unhealthy", "database": f"error: {type(exc).__name__}"})
+    latency_ms = round((asyncio.get_running_loop().time() - started) * 1000, 2)
+    return {"status": "healthy", "database": "connected", "database_latency_ms": latency_ms}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,126 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, literal, select, text
+from sqlalchemy.orm import Session
+
+from changelog import record_changes
+from database import SessionLocal
+from models import ArchivedTransfer, Transfer, TransferStatus
+
+logger = logging.getLogger(__name__)
+
+# Completed and cancelled transfers requested longer ago than this are moved to transfers_archive
+ARCHIVE_AFTER_DAYS = int(os.getenv("TRANSFER_ARCHIVE_AFTER_DAYS", "365"))
+# Seconds between background archival runs; 0 disables the periodic job
+ARCHIVE_INTERVAL = int(os.getenv("TRANSFER_ARCHIVE_SECONDS", "0"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("TRANSFER_ARCHIVE_BATCH_SIZE", "500"))
+# Pause between batches so archiving never holds the write lock for long
+ARCHIVE_BATCH_PAUSE = float(os.getenv("TRANSFER_ARCHIVE_PAUSE_MS", "50")) / 1000
+
+# Closed transfers never change again, so moving them out of the transfers table
+# keeps it (and its indexes) sized by recent activity rather than by years of
+# history. Each batch copies rows into transfers_archive, deletes them from
+# transfers and logs them as "archive" changes in one transaction, which /api/sync
+# lists under "archived" (not "deleted": the transfer still exists). Transfer
+# history, get_transfer and the transfer list/export (?include_archived=true)
+# read both tables. On PostgreSQL the archive is partitioned by year of
+# requested_at, so old years can be detached or dropped cheaply.
+
+CLOSED_STATUSES = (TransferStatus.COMPLETED, TransferStatus.CANCELLED)
+TRANSFER_COLUMNS = [column.name for column in Transfer.__table__.columns]
+
+
+def archive_columns(columns) -> list:
+    """The transfers_archive columns with the same names as these transfers columns"""
+    return [ArchivedTransfer.__table__.c[column.name] for column in columns]
+
+
+def _ensure_partitions(db: Session, years):
+    """Create the yearly archive partitions these rows will land in (PostgreSQL only)"""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for year in sorted(years):
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS transfers_archive_{year} PARTITION OF transfers_archive "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        ))
+
+
+def archive_batch(db: Session, cutoff: datetime, after_id: int, newest_id: int) -> list:
+    """Archive up to ARCHIVE_BATCH_SIZE closed transfers with ids after after_id and commit.
+
+    Returns the archived ids. The newest transfer is never archived, so SQLite
+    cannot hand its id out again.
+    """
+    rows = db.execute(
+        select(Transfer.id, Transfer.requested_at).where(
+            Transfer.id > after_id,
+            Transfer.id < newest_id,
+            Transfer.transfer_status.in_(CLOSED_STATUSES),
+            Transfer.requested_at < cutoff
+        ).order_by(Transfer.id).limit(ARCHIVE_BATCH_SIZE)
+    ).all()
+    if not rows:
+        return []
+    ids = [row.id for row in rows]
+    _ensure_partitions(db, {row.requested_at.year for row in rows})
+    db.execute(insert(ArchivedTransfer).from_select(
+        [*TRANSFER_COLUMNS, "archived_at"],
+        select(*Transfer.__table__.columns, literal(datetime.utcnow())).where(Transfer.id.in_(ids))
+    ))
+    db.execute(delete(Transfer).where(Transfer.id.in_(ids)))
+    record_changes(db, "transfer", ids, "archive")
+    db.commit()
+    return ids
+
+
+def archive_transfers(db: Session, cutoff: datetime = None, stop: threading.Event = None) -> int:
+    """Archive every closed transfer requested before cutoff, in batches. Returns the number moved."""
+    cutoff = cutoff or datetime.utcnow() - timedelta(days=ARCHIVE_AFTER_DAYS)
+    stop = stop or threading.Event()
+    newest_id = db.scalar(select(func.max(Transfer.id))) or 0
+    db.rollback()  # Don't hold a read transaction open between batches
+    archived, after_id = 0, 0
+    while True:
+        ids = archive_batch(db, cutoff, after_id, newest_id)
+        if not ids:
+            break
+        archived += len(ids)
+        after_id = ids[-1]
+        if stop.wait(ARCHIVE_BATCH_PAUSE):
+            break
+    if archived:
+        logger.info("Archived %d transfers requested before %s", archived, cutoff.isoformat())
+    return archived
+
+
+def _archive_loop(stop: threading.Event):
+    while not stop.wait(ARCHIVE_INTERVAL):
+        db = SessionLocal()
+        try:
+            archive_transfers(db, stop=stop)
+        except Exception:
+            logger.exception("Transfer archival failed")
+            db.rollback()
+        finally:
+            db.close()
+
+
+def start_archiver() -> threading.Event:
+    """Start the periodic archival thread if configured; set the returned event to stop it"""
+    stop = threading.Event()
+    if ARCHIVE_INTERVAL > 0:
+        threading.Thread(target=_archive_loop, args=(stop,), daemon=True, name="transfer-archiver").start()
+    return stop
+
+
+if __name__ == "__main__":
+    # One-off archival, e.g. from cron: python archive.py
+    session = SessionLocal()
+    try:
+        print(f"Archived {archive_transfers(session)} transfers")
+    finally:
+        session.close()
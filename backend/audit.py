@@ -0,0 +1,182 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_MS = int(os.getenv("AUDIT_FLUSH_MS", "250"))
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_WRITE_ATTEMPTS = int(os.getenv("AUDIT_WRITE_ATTEMPTS", "3"))
+AUDIT_SPILL_PATH = os.getenv("AUDIT_SPILL_PATH", "audit_spill.ndjson")
+
+# Audit events are queued in memory by the request and inserted in batches by a
+# background thread, so auditing costs a hot endpoint one queue.put instead of
+# an INSERT. When the queue is full the request writes its event itself, which
+# slows producers down to what the database can absorb. A batch that still
+# fails after AUDIT_WRITE_ATTEMPTS is appended to AUDIT_SPILL_PATH and replayed
+# at the next start or successful write. The queue is drained on shutdown;
+# events still queued when the process is killed outright are lost. Transfer
+# notes are user content rather than a trail, so add_transfer_note() writes
+# them in the caller's transaction.
+
+
+def _spill_line(event: dict) -> str:
+    return json.dumps({**event, "occurred_at": event["occurred_at"].isoformat()}) + "\n"
+
+
+class AuditWriter:
+    """Buffers audit events and inserts them every AUDIT_BATCH_SIZE events or AUDIT_FLUSH_MS"""
+
+    def __init__(self, batch_size: int = AUDIT_BATCH_SIZE, flush_ms: int = AUDIT_FLUSH_MS,
+                 queue_size: int = AUDIT_QUEUE_SIZE, attempts: int = AUDIT_WRITE_ATTEMPTS,
+                 spill_path: str = AUDIT_SPILL_PATH):
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.attempts = max(attempts, 1)
+        self.spill_path = spill_path
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._stopping = threading.Event()
+        self._spill_lock = threading.Lock()
+
+    def record(self, action: str, entity: str, entity_id: int, actor: str = None, **details):
+        event = {
+            "occurred_at": datetime.utcnow(),
+            "action": action,
+            "actor": actor,
+            "entity": entity,
+            "entity_id": entity_id,
+            "details": details or None
+        }
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # The writer is behind; write this one from the request instead of growing memory
+            self._write([event], attempts=1)
+
+    def start(self):
+        self.replay_spill()
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="audit-writer")
+            self._thread.start()
+
+    def stop(self):
+        """Stop the writer thread after it has flushed everything queued"""
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> int:
+        """Write everything currently queued from the calling thread. Returns events written."""
+        written = 0
+        while True:
+            batch = self._take(self.batch_size, 0)
+            if not batch:
+                return written
+            self._write(batch)
+            written += len(batch)
+
+    def _take(self, limit: int, wait: float) -> list:
+        batch = []
+        deadline = time.monotonic() + wait
+        while len(batch) < limit:
+            remaining = deadline - time.monotonic()
+            try:
+                event = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(event)
+        return batch
+
+    def _insert(self, batch: list):
+        db = SessionLocal()
+        try:
+            db.execute(insert(AuditEvent), batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _write(self, batch: list, attempts: int = None) -> bool:
+        """Insert a batch, retrying with backoff, and spill it to disk if every attempt fails"""
+        attempts = attempts or self.attempts
+        for attempt in range(attempts):
+            try:
+                self._insert(batch)
+                return True
+            except Exception:
+                if attempt + 1 == attempts:
+                    logger.exception("Audit write failed %d times", attempts)
+                else:
+                    time.sleep(0.1 * 2 ** attempt)
+        self._spill(batch)
+        return False
+
+    def _spill(self, batch: list):
+        with self._spill_lock, open(self.spill_path, "a") as spill:
+            for event in batch:
+                spill.write(_spill_line(event))
+        logger.warning("Spilled %d audit events to %s", len(batch), self.spill_path)
+
+    def replay_spill(self) -> int:
+        """Insert events spilled by earlier failed writes and remove the file. Returns events written."""
+        with self._spill_lock:
+            if not os.path.exists(self.spill_path):
+                return 0
+            with open(self.spill_path) as spill:
+                events = [json.loads(line) for line in spill if line.strip()]
+            for event in events:
+                event["occurred_at"] = datetime.fromisoformat(event["occurred_at"])
+            try:
+                for start in range(0, len(events), self.batch_size):
+                    self._insert(events[start:start + self.batch_size])
+            except Exception:
+                # Batches already inserted are kept out of the file so they are not written twice
+                with open(self.spill_path, "w") as spill:
+                    for event in events[start:]:
+                        spill.write(_spill_line(event))
+                logger.exception("Replaying spilled audit events failed; %d remain", len(events) - start)
+                return start
+            os.remove(self.spill_path)
+        if events:
+            logger.info("Replayed %d spilled audit events", len(events))
+        return len(events)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._take(self.batch_size, self.flush_interval)
+            if batch and self._write(batch) and os.path.exists(self.spill_path):
+                # The database is writable again
+                self.replay_spill()
+
+
+audit_writer = AuditWriter()
+
+
+def record_audit(action: str, entity: str, entity_id: int, actor: str = None, **details):
+    """Queue an audit event, e.g. record_audit("patient.discharged", "patient", 7, actor="dr.lee")"""
+    audit_writer.record(action, entity, entity_id, actor, **details)
+
+
+def add_transfer_note(db: Session, transfer_id: int, author: str, note: str):
+    """Store a transfer note as its own row in the caller's transaction. Does not commit."""
+    db.add(AuditEvent(
+        action="transfer.note", actor=author, entity="transfer", entity_id=transfer_id,
+        details={"note": note}
+    ))
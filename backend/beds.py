@@ -0,0 +1,67 @@
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+
+from models import Hospital
+from changelog import record_change
+
+# Bed accounting is done with single conditional UPDATE statements so the
+# check and the decrement happen atomically in the database. Concurrent
+# workers therefore cannot overbook a hospital, and no application-level
+# lock is needed: the row (or, on SQLite, the database) write lock taken by
+# the UPDATE is held until the caller commits or rolls back. Each successful
+# change is also logged for /api/sync in the same transaction.
+
+
+def _capped(beds):
+    # A bed handed back to a hospital whose count was corrected in the meantime never lifts it past capacity
+    return case((beds > Hospital.capacity, Hospital.capacity), else_=beds)
+
+
+def _logged(db: Session, hospital_id: int, changed: bool) -> bool:
+    if changed:
+        record_change(db, "hospital", hospital_id)
+    return changed
+
+
+def reserve_bed(db: Session, hospital_id: int) -> bool:
+    """Take one bed at a hospital if any is free. Returns False when full or unknown."""
+    result = db.execute(
+        update(Hospital)
+        .where(Hospital.id == hospital_id, Hospital.available_beds > 0)
+        .values(available_beds=Hospital.available_beds - 1)
+    )
+    return _logged(db, hospital_id, result.rowcount == 1)
+
+
+def release_bed(db: Session, hospital_id: int) -> bool:
+    """Return one bed to a hospital, up to its capacity. Returns False if the hospital does not exist."""
+    result = db.execute(
+        update(Hospital)
+        .where(Hospital.id == hospital_id)
+        .values(available_beds=_capped(Hospital.available_beds + 1))
+    )
+    return _logged(db, hospital_id, result.rowcount == 1)
+
+
+def reserve_beds(db: Session, hospital_id: int, count: int) -> bool:
+    """Take `count` beds at once, all or nothing. Returns False if fewer are free."""
+    result = db.execute(
+        update(Hospital)
+        .where(Hospital.id == hospital_id, Hospital.available_beds >= count)
+        .values(available_beds=Hospital.available_beds - count)
+    )
+    return _logged(db, hospital_id, result.rowcount == 1)
+
+
+def adjust_beds(db: Session, hospital_id: int, delta: int) -> bool:
+    """Apply a net change to a hospital's free beds, all or nothing.
+
+    Returns False if the hospital does not exist or a negative delta is more
+    than the beds currently free. Free beds never rise above capacity.
+    """
+    result = db.execute(
+        update(Hospital)
+        .where(Hospital.id == hospital_id, Hospital.available_beds + delta >= 0)
+        .values(available_beds=_capped(Hospital.available_beds + delta))
+    )
+    return _logged(db, hospital_id, result.rowcount == 1)
@@ -0,0 +1,6 @@
+"""Performance benchmarks for the MedCare API (not imported by the application).
+
+seed         fill a database with synthetic hospitals, patients and transfers
+latency      per-endpoint latency, throughput and queries/request with baselines
+async_vs_sync  throughput of the sync and DB_ASYNC=true read paths
+"""
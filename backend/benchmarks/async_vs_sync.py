@@ -0,0 +1,103 @@
+"""Compare requests/sec of the sync and async (DB_ASYNC=true) database paths.
+
+Seeds a throwaway SQLite database, starts the API under uvicorn once per
+mode, and drives the read endpoints served by both paths with N concurrent
+clients. Run from the backend directory:
+
+    pip install httpx aiosqlite
+    python -m benchmarks.async_vs_sync --concurrency 50 100 250 500 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks import seed
+from benchmarks.harness import start_server
+
+ENDPOINTS = [
+    "/api/patients/?limit=50",
+    "/api/patients/{patient_id}",
+    "/api/hospitals/",
+    "/api/hospitals/{hospital_id}/stats",
+    "/api/dashboard/summary",
+]
+
+
+async def drive(base_url: str, concurrency: int, duration: float, hospitals: int, patients: int) -> dict:
+    """Hammer the endpoints with `concurrency` clients for `duration` seconds"""
+    completed = errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal completed, errors
+            while time.perf_counter() < deadline:
+                path = random.choice(ENDPOINTS).format(
+                    patient_id=random.randint(1, patients),
+                    hospital_id=random.randint(1, hospitals)
+                )
+                try:
+                    response = await client.get(path)
+                    if response.status_code == 200:
+                        completed += 1
+                    else:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {"requests": completed, "errors": errors, "rps": round(completed / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 100, 250, 500])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run")
+    parser.add_argument("--hospitals", type=int, default=50)
+    parser.add_argument("--patients", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        seed.seed_database(url, args.patients, hospitals=args.hospitals, transfers=0)
+
+        results = []
+        for async_mode in (False, True):
+            server = start_server(url, args.port, args.workers, DB_ASYNC="true" if async_mode else "false")
+            try:
+                for concurrency in args.concurrency:
+                    run = asyncio.run(drive(
+                        f"http://127.0.0.1:{args.port}", concurrency, args.duration,
+                        args.hospitals, args.patients
+                    ))
+                    run.update(mode="async" if async_mode else "sync", concurrency=concurrency)
+                    results.append(run)
+                    print(f"{run['mode']} x{concurrency}: {run['rps']} req/s", file=sys.stderr)
+            finally:
+                server.terminate()
+                server.wait()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<6} {'clients':>8} {'req/s':>10} {'requests':>10} {'errors':>8}")
+    for run in results:
+        print(f"{run['mode']:<6} {run['concurrency']:>8} {run['rps']:>10} {run['requests']:>10} {run['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
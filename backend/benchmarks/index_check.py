@@ -0,0 +1,214 @@
+"""Check that every route's queries are served by indexes.
+
+Seeds a throwaway SQLite database (or uses --database-url), sends one
+request to each route in CHECKS through the app in-process, and runs
+EXPLAIN (EXPLAIN QUERY PLAN on SQLite) on every statement the request
+issued. Full scans of the large tables are reported, and the exit status
+is 1 if any route has one it is not expected to. Run from the backend
+directory after adding a query or an index:
+
+    python -m benchmarks.index_check --patients 50000
+    python -m benchmarks.index_check --database-url postgresql://localhost/medcare_db --verbose
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+from dataclasses import dataclass
+
+from benchmarks import seed
+from benchmarks.harness import BACKEND_DIR
+
+# Tables that grow without bound; scanning one of them on a request is a bug
+LARGE_TABLES = {"patients", "transfers", "transfers_archive", "change_log", "audit_events"}
+
+SCAN_PATTERNS = {
+    # "SCAN patients" (whole table); "SCAN patients USING INDEX ..." walks an index in order and stops at LIMIT
+    "sqlite": re.compile(r"\bSCAN (\w+)(?! USING)"),
+    "postgresql": re.compile(r"\bSeq Scan on (\w+)"),
+}
+
+
+@dataclass
+class Check:
+    name: str
+    method: str
+    path: str
+    params: dict = None
+    body: dict = None
+    allowed_scans: tuple = ()  # Tables this route reads in full by design
+
+
+def build_checks(ids: dict) -> list:
+    patient, hospital, transfer = ids["patient"], ids["hospital"], ids["transfer"]
+    return [
+        Check("get_patients", "GET", "/api/patients/", {"limit": 50}),
+        Check("get_patients_by_hospital", "GET", "/api/patients/", {"limit": 50, "hospital_id": hospital}),
+        Check("get_patients_by_triage", "GET", "/api/patients/", {"limit": 50, "triage_level": "URGENT"}),
+        Check("get_patient", "GET", f"/api/patients/{patient}"),
+        Check("get_patient_by_mrn", "GET", f"/api/patients/mrn/{ids['mrn']}"),
+        Check("search_patients", "GET", "/api/patients/search", {"q": "smith"}),
+        Check("get_triage_stats", "GET", "/api/patients/stats/triage-distribution"),
+        Check("get_critical_patients", "GET", "/api/patients/critical/list", {"limit": 50}),
+        Check("export_patients", "GET", "/api/patients/export", {"hospital_id": hospital}),
+        Check("get_hospitals", "GET", "/api/hospitals/", {"limit": 100}),
+        Check("get_hospital", "GET", f"/api/hospitals/{hospital}"),
+        Check("get_hospital_patients", "GET", f"/api/hospitals/{hospital}/patients"),
+        Check("get_hospital_stats", "GET", f"/api/hospitals/{hospital}/stats"),
+        Check("get_transfers", "GET", "/api/transfers/", {"limit": 50}),
+        Check("get_transfers_by_status", "GET", "/api/transfers/", {"limit": 50, "status": "PENDING"}),
+        Check("get_transfers_by_hospital", "GET", "/api/transfers/", {"limit": 50, "hospital_id": hospital}),
+        Check("get_transfers_archived", "GET", "/api/transfers/", {"limit": 50, "include_archived": True}),
+        Check("get_transfers_archived_by_hospital", "GET", "/api/transfers/",
+              {"limit": 50, "hospital_id": hospital, "include_archived": True}),
+        Check("export_transfers", "GET", "/api/transfers/export", {"status": "PENDING"}),
+        Check("get_transfer", "GET", f"/api/transfers/{transfer}"),
+        Check("get_archived_transfer", "GET", f"/api/transfers/{ids['archived_transfer']}"),
+        Check("get_transfer_notes", "GET", f"/api/transfers/{transfer}/notes"),
+        Check("get_patient_transfers", "GET", f"/api/transfers/patient/{ids['transfer_patient']}"),
+        Check("get_pending_by_priority", "GET", "/api/transfers/pending/priority", {"limit": 20}),
+        Check("recommend_destinations", "GET", "/api/transfers/recommend", {"patient_id": patient}),
+        Check("dashboard_summary", "GET", "/api/dashboard/summary"),
+        Check("sync_changes", "GET", "/api/sync/", {"since": ids["change"], "limit": 100}),
+        Check("get_audit_events", "GET", "/api/audit/", {"entity": "transfer", "entity_id": transfer}),
+        Check("create_transfer", "POST", "/api/transfers/", body={
+            "patient_id": patient, "from_hospital_id": ids["patient_hospital"],
+            "to_hospital_id": ids["other_hospital"], "transfer_reason": "Index check",
+            "priority": "URGENT", "requested_by": "index-check"
+        }),
+    ]
+
+
+def sample_ids() -> dict:
+    """Existing rows for the checks to request"""
+    from sqlalchemy import func, select
+    from database import SessionLocal
+    from models import ArchivedTransfer, ChangeLogEntry, Hospital, Patient, Transfer, TransferStatus
+
+    db = SessionLocal()
+    try:
+        active = select(Transfer.patient_id).where(
+            Transfer.transfer_status.in_([TransferStatus.PENDING, TransferStatus.IN_PROGRESS])
+        )
+        patient = db.execute(
+            select(Patient.id, Patient.mrn, Patient.hospital_id).where(Patient.id.not_in(active)).limit(1)
+        ).one()
+        transfer = db.execute(select(Transfer.id, Transfer.patient_id).limit(1)).one()
+        other_hospital = db.scalar(
+            select(Hospital.id).where(Hospital.id != patient.hospital_id, Hospital.available_beds > 0).limit(1)
+        )
+        return {
+            "patient": patient.id, "mrn": patient.mrn, "patient_hospital": patient.hospital_id,
+            "hospital": patient.hospital_id, "other_hospital": other_hospital,
+            "transfer": transfer.id, "transfer_patient": transfer.patient_id,
+            "archived_transfer": db.scalar(select(ArchivedTransfer.id).limit(1)) or transfer.id,
+            "change": max(0, (db.scalar(select(func.max(ChangeLogEntry.id))) or 0) - 100)
+        }
+    finally:
+        db.close()
+
+
+def archive_seeded_transfers():
+    """Archive the closed transfers from the first half of the seeded week, so the archive is checked too"""
+    from datetime import datetime, timedelta
+    import archive
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        archive.ARCHIVE_BATCH_PAUSE = 0
+        archive.archive_transfers(db, cutoff=datetime.utcnow() - timedelta(days=3, hours=12))
+    finally:
+        db.close()
+
+
+def explain(statement: str, parameters) -> list:
+    """Plan lines for a statement, run on a fresh connection from the primary engine"""
+    from database import engine
+    from diagnostics import EXPLAINABLE
+
+    dialect = engine.dialect.name
+    prefix = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}.get(dialect)
+    if prefix is None or not EXPLAINABLE.match(statement):
+        return []
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+        conn.rollback()
+    return [" ".join(str(column) for column in row) for row in rows]
+
+
+def run_checks(checks: list) -> list:
+    """[(check, [(statement, plan, scanned tables)])] for every check"""
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    import app as app_module
+    from database import all_engines, engine
+
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            captured.append((statement, parameters))
+
+    binds = all_engines()
+    for bind in binds:
+        event.listen(bind, "before_cursor_execute", record)
+    pattern = SCAN_PATTERNS.get(engine.dialect.name)
+    results = []
+    try:
+        with TestClient(app_module.app) as client:
+            for check in checks:
+                captured.clear()
+                response = client.request(check.method, check.path, params=check.params, json=check.body)
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{check.name}: {response.status_code} {response.text[:200]}")
+                statements = list(captured)
+                report = []
+                for statement, parameters in statements:
+                    plan = explain(statement, parameters)
+                    scanned = {
+                        table for line in plan for table in (pattern.findall(line) if pattern else [])
+                        if table in LARGE_TABLES
+                    }
+                    report.append((statement, plan, scanned))
+                results.append((check, report))
+    finally:
+        for bind in binds:
+            event.remove(bind, "before_cursor_execute", record)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="Check an already seeded database instead of a fresh one")
+    parser.add_argument("--patients", type=int, default=20000, help="Rows to seed; plans differ on tiny tables")
+    parser.add_argument("--verbose", action="store_true", help="Print every statement and its plan")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+        if BACKEND_DIR not in sys.path:
+            sys.path.insert(0, BACKEND_DIR)
+    else:
+        path = os.path.join(tempfile.mkdtemp(prefix="medcare-index-check-"), "check.db")
+        seed.seed_database(f"sqlite:///{path}", args.patients)
+        archive_seeded_transfers()
+
+    failures = 0
+    for check, report in run_checks(build_checks(sample_ids())):
+        unexpected = set().union(*(scanned for _, _, scanned in report)) - set(check.allowed_scans)
+        failures += bool(unexpected)
+        status = f"FULL SCAN of {', '.join(sorted(unexpected))}" if unexpected else "ok"
+        print(f"{check.name:36} {len(report):3} statements  {status}")
+        for statement, plan, scanned in report:
+            if args.verbose or scanned - set(check.allowed_scans):
+                print(f"    {' '.join(statement.split())[:160]}")
+                for line in plan:
+                    print(f"        {line}")
+    print(f"\n{failures} route(s) with unexpected full scans" if failures else "\nEvery route is index-backed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
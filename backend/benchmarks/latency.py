@@ -0,0 +1,367 @@
+"""Per-endpoint latency, throughput and queries-per-request benchmark.
+
+Seeds a throwaway SQLite database (or uses --database-url), then drives a
+weighted mix of read and write endpoints with N concurrent clients, either
+in-process through httpx's ASGI transport or over HTTP against uvicorn.
+Queries per request are always measured in-process, one request at a time,
+as is POST /api/patients/bulk (--bulk-rows per request into a fresh hospital).
+Save a run with --output and check a later one against it with --compare;
+the exit status is 1 when an endpoint regressed. Run from the backend directory:
+
+    python -m benchmarks.latency --patients 100000 --concurrency 32 --duration 20 --output baseline.json
+    python -m benchmarks.latency --patients 100000 --concurrency 32 --duration 20 --compare baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+import httpx
+
+from benchmarks import seed
+from benchmarks.harness import BACKEND_DIR, percentile, start_server
+
+# Sample requests per endpoint for the queries-per-request pass
+QUERY_COUNT_SAMPLES = 20
+
+# Bulk admission is timed on its own rather than in the mix; the target is 10k rows in 2 s
+BULK_ENDPOINT = "bulk_admit_patients"
+BULK_TARGET_MS = 2000
+
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str
+    weight: int
+    build: Callable  # (state, rng) -> (path, params, json body) or None when it can't run
+
+
+class RunState:
+    """What the request builders need to know about the seeded data"""
+
+    def __init__(self, hospitals: int, patients: int, pending_transfers: list):
+        self.hospitals = hospitals
+        self.patients = patients
+        self.pending_transfers = pending_transfers
+        self.next_mrn = 0
+
+    def new_mrn(self) -> str:
+        self.next_mrn += 1
+        return f"BENCHNEW{os.getpid()}-{time.time_ns()}-{self.next_mrn}"
+
+
+def _new_patient(state: RunState, rng: random.Random):
+    return "/api/patients/", None, {
+        "mrn": state.new_mrn(), "first_name": "Bench", "last_name": "Admission",
+        "date_of_birth": "1980-01-01T00:00:00", "gender": "Other",
+        "hospital_id": rng.randint(1, state.hospitals),
+        "triage_level": rng.choice(["CRITICAL", "URGENT", "SEMI_URGENT", "NON_URGENT"])
+    }
+
+
+def _approve_transfer(state: RunState, rng: random.Random):
+    if not state.pending_transfers:
+        return None
+    transfer_id = state.pending_transfers.pop()
+    return f"/api/transfers/{transfer_id}/status", {"status": "IN_PROGRESS", "approved_by": "Dr. Bench"}, None
+
+
+# Name fragments as typed at a registration desk: seeded names, prefixes and typos
+SEARCH_TERMS = ["smith", "garc", "nguyen", "pat", "john", "emil", "jonh", "chen", "wilsn", "maria"]
+
+ENDPOINTS = [
+    Endpoint("get_patients", "GET", 20, lambda s, r: ("/api/patients/", {"limit": 50}, None)),
+    Endpoint("get_patients_by_hospital", "GET", 10, lambda s, r: (
+        "/api/patients/", {"limit": 50, "hospital_id": r.randint(1, s.hospitals)}, None)),
+    Endpoint("get_patient", "GET", 20, lambda s, r: (f"/api/patients/{r.randint(1, s.patients)}", None, None)),
+    Endpoint("search_patients", "GET", 5, lambda s, r: (
+        "/api/patients/search", {"q": " ".join(r.sample(SEARCH_TERMS, r.randint(1, 2)))}, None
+    )),
+    Endpoint("get_hospitals", "GET", 5, lambda s, r: ("/api/hospitals/", {"limit": 100}, None)),
+    Endpoint("get_hospital_stats", "GET", 10, lambda s, r: (f"/api/hospitals/{r.randint(1, s.hospitals)}/stats", None, None)),
+    Endpoint("get_transfers", "GET", 10, lambda s, r: ("/api/transfers/", {"limit": 50}, None)),
+    Endpoint("get_pending_by_priority", "GET", 5, lambda s, r: ("/api/transfers/pending/priority", {"limit": 20}, None)),
+    Endpoint("recommend_destinations", "GET", 5, lambda s, r: (
+        "/api/transfers/recommend", {"patient_id": r.randint(1, s.patients)}, None)),
+    Endpoint("dashboard_summary", "GET", 5, lambda s, r: ("/api/dashboard/summary", None, None)),
+    Endpoint("create_patient", "POST", 5, _new_patient),
+    Endpoint("update_transfer_status", "PUT", 5, _approve_transfer),
+]
+
+
+def load_state(hospitals: int, patients: int) -> RunState:
+    from database import SessionLocal
+    from models import Transfer, TransferStatus
+
+    db = SessionLocal()
+    try:
+        pending = [row.id for row in db.query(Transfer.id).filter(Transfer.transfer_status == TransferStatus.PENDING)]
+    finally:
+        db.close()
+    random.Random(0).shuffle(pending)
+    return RunState(hospitals, patients, pending)
+
+
+async def _send(client: httpx.AsyncClient, endpoint: Endpoint, request) -> bool:
+    path, params, body = request
+    response = await client.request(endpoint.method, path, params=params, json=body)
+    await response.aread()
+    return response.is_success
+
+
+async def count_queries(client: httpx.AsyncClient, endpoints: list, state: RunState) -> dict:
+    """Average SQL statements per request, one request at a time"""
+    from database import count_statements
+
+    rng = random.Random(1)
+    averages = {}
+    for endpoint in endpoints:
+        counts = []
+        for _ in range(QUERY_COUNT_SAMPLES):
+            request = endpoint.build(state, rng)
+            if request is None:
+                break
+            with count_statements() as counter:
+                await _send(client, endpoint, request)
+            # Batched audit inserts come from a background thread, not the request
+            counts.append(sum(1 for statement in counter.statements if "audit_events" not in statement))
+        averages[endpoint.name] = round(sum(counts) / len(counts), 2) if counts else None
+    return averages
+
+
+async def measure_bulk(client: httpx.AsyncClient, rows: int, requests: int) -> dict:
+    """Time NDJSON bulk admissions of `rows` patients, one request at a time"""
+    from database import count_statements
+
+    response = await client.post("/api/hospitals/", json={
+        "name": "Bench Bulk", "address": "1 Bench St", "city": "San Jose", "state": "CA",
+        "capacity": rows * requests, "available_beds": rows * requests
+    })
+    response.raise_for_status()
+    hospital_id = response.json()["id"]
+    latencies, counts, errors = [], [], 0
+    for request in range(requests):
+        body = "\n".join(json.dumps({
+            "mrn": f"BENCHBULK{os.getpid()}-{time.time_ns()}-{row}", "first_name": "Bench", "last_name": "Bulk",
+            "date_of_birth": "1980-01-01T00:00:00", "gender": "Other",
+            "hospital_id": hospital_id, "triage_level": "URGENT"
+        }) for row in range(rows))
+        started = time.perf_counter()
+        with count_statements() as counter:
+            response = await client.post("/api/patients/bulk", content=body,
+                                         headers={"content-type": "application/x-ndjson"})
+            await response.aread()
+        elapsed = (time.perf_counter() - started) * 1000
+        if response.is_success and response.json()["admitted"] == rows:
+            latencies.append(elapsed)
+        else:
+            errors += 1
+        counts.append(sum(1 for statement in counter.statements if "audit_events" not in statement))
+
+    samples = sorted(latencies)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / (sum(samples) / 1000), 2) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 0.50), 2),
+        "p95_ms": round(percentile(samples, 0.95), 2),
+        "p99_ms": round(percentile(samples, 0.99), 2),
+        "mean_ms": round(sum(samples) / len(samples), 2) if samples else 0.0,
+        "rows_per_request": rows,
+        "queries_per_request": round(sum(counts) / len(counts), 2) if counts else None
+    }
+
+
+async def drive(client: httpx.AsyncClient, endpoints: list, state: RunState,
+                concurrency: int, duration: float, seed_value: int) -> dict:
+    """Send the weighted endpoint mix from `concurrency` clients for `duration` seconds"""
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    weights = [endpoint.weight for endpoint in endpoints]
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int):
+        rng = random.Random(seed_value * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            endpoint = rng.choices(endpoints, weights)[0]
+            request = endpoint.build(state, rng)
+            if request is None:
+                # e.g. no pending transfers left to approve
+                await asyncio.sleep(0)
+                continue
+            started = time.perf_counter()
+            try:
+                ok = await _send(client, endpoint, request)
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies[endpoint.name].append((time.perf_counter() - started) * 1000)
+            else:
+                errors[endpoint.name] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for endpoint in endpoints:
+        samples = sorted(latencies[endpoint.name])
+        results[endpoint.name] = {
+            "requests": len(samples),
+            "errors": errors[endpoint.name],
+            "throughput_rps": round(len(samples) / elapsed, 2),
+            "p50_ms": round(percentile(samples, 0.50), 2),
+            "p95_ms": round(percentile(samples, 0.95), 2),
+            "p99_ms": round(percentile(samples, 0.99), 2),
+            "mean_ms": round(sum(samples) / len(samples), 2) if samples else 0.0
+        }
+    total = sum(result["requests"] for result in results.values())
+    return {"elapsed_s": round(elapsed, 2), "throughput_rps": round(total / elapsed, 2), "endpoints": results}
+
+
+async def run(args, state: RunState, endpoints: list) -> dict:
+    from app import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            queries = await count_queries(client, endpoints, state)
+            bulk = await measure_bulk(client, args.bulk_rows, args.bulk_requests) if args.bulk_rows else None
+            if args.mode == "inprocess":
+                load = await drive(client, endpoints, state, args.concurrency, args.duration, args.seed)
+
+    if args.mode == "http":
+        server = start_server(os.environ["DATABASE_URL"], args.port, args.workers)
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=60) as client:
+                load = await drive(client, endpoints, state, args.concurrency, args.duration, args.seed)
+        finally:
+            server.terminate()
+            server.wait()
+
+    for name, result in load["endpoints"].items():
+        result["queries_per_request"] = queries.get(name)
+    if bulk:
+        load["endpoints"][BULK_ENDPOINT] = bulk
+    return load
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list:
+    """Endpoints whose p95 latency, throughput or query count got worse than the baseline allows"""
+    regressions = []
+    for name, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before or not before["requests"] or not now["requests"]:
+            continue
+        if now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} ms -> {now['p95_ms']} ms")
+        if now["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {now['throughput_rps']} req/s")
+        if (before.get("queries_per_request") is not None and now.get("queries_per_request") is not None
+                and now["queries_per_request"] > before["queries_per_request"]):
+            regressions.append(
+                f"{name}: queries/request {before['queries_per_request']} -> {now['queries_per_request']}"
+            )
+    return regressions
+
+
+def print_table(result: dict):
+    print(f"{'endpoint':<26} {'reqs':>7} {'err':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8}")
+    for name, row in result["endpoints"].items():
+        queries = "-" if row["queries_per_request"] is None else row["queries_per_request"]
+        print(f"{name:<26} {row['requests']:>7} {row['errors']:>5} {row['throughput_rps']:>8} "
+              f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8} {queries:>8}")
+    print(f"total throughput: {result['throughput_rps']} req/s over {result['elapsed_s']} s")
+    bulk = result["endpoints"].get(BULK_ENDPOINT)
+    if bulk and bulk["requests"]:
+        verdict = "within" if bulk["p95_ms"] <= BULK_TARGET_MS * bulk["rows_per_request"] / 10000 else "OVER"
+        print(f"bulk admit: {bulk['rows_per_request']} rows in {bulk['p50_ms']} ms p50, {bulk['p95_ms']} ms p95 "
+              f"({verdict} the {BULK_TARGET_MS} ms per 10k rows target)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--database-url", help="Benchmark an already seeded database instead of a fresh one")
+    parser.add_argument("--patients", type=int, default=10000, help="Rows to seed (10k to 10M)")
+    parser.add_argument("--hospitals", type=int, help="Defaults to one per 200 patients (at least 10)")
+    parser.add_argument("--transfers", type=int, help="Defaults to one per 10 patients")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of load")
+    parser.add_argument("--endpoints", nargs="+", help="Only these endpoints (default: the whole mix)")
+    parser.add_argument("--bulk-rows", type=int, default=10000, help="Patients per bulk admission (0 skips it)")
+    parser.add_argument("--bulk-requests", type=int, default=3, help="Bulk admissions to time")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes (http mode)")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed fractional slowdown vs the baseline")
+    args = parser.parse_args()
+
+    endpoints = [endpoint for endpoint in ENDPOINTS if not args.endpoints or endpoint.name in args.endpoints]
+    if args.endpoints and BULK_ENDPOINT not in args.endpoints:
+        args.bulk_rows = 0
+    if not endpoints:
+        names = [endpoint.name for endpoint in ENDPOINTS] + [BULK_ENDPOINT]
+        parser.error(f"no such endpoints; choose from {', '.join(names)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.database_url:
+            os.environ["DATABASE_URL"] = args.database_url
+            sys.path.insert(0, BACKEND_DIR)
+            from database import SessionLocal
+            from models import Hospital, Patient
+            db = SessionLocal()
+            try:
+                counts = {"hospitals": db.query(Hospital).count(), "patients": db.query(Patient).count()}
+            finally:
+                db.close()
+        else:
+            url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            counts = seed.seed_database(url, args.patients, args.hospitals, args.transfers,
+                                        seed=args.seed, progress=True)
+        state = load_state(counts["hospitals"], counts["patients"])
+        print(f"driving {len(endpoints)} endpoints ({args.mode}, {args.concurrency} clients, {args.duration}s)",
+              file=sys.stderr)
+        result = asyncio.run(run(args, state, endpoints))
+
+    result["meta"] = {
+        "mode": args.mode, "concurrency": args.concurrency, "duration_s": args.duration,
+        "workers": args.workers if args.mode == "http" else None, "scale": counts,
+        "database": "external" if args.database_url else "sqlite",
+        "python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    print_table(result)
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(result, handle, indent=2)
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        settings = ("mode", "concurrency", "duration_s", "workers", "scale")
+        if any(baseline.get("meta", {}).get(key) != result["meta"][key] for key in settings):
+            print("warning: baseline was recorded with different settings", file=sys.stderr)
+        regressions = compare(baseline, result, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("no regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
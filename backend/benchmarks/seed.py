@@ -0,0 +1,173 @@
+"""Seed a database with synthetic hospitals, patients and transfers.
+
+Rows follow the shapes of the models: patients are spread evenly over
+hospitals with a realistic triage mix, hospitals carry Californian
+coordinates and bed counts consistent with their patients, and about a
+third of transfers are still pending or in progress. Rows are inserted in
+batches, so 10M patients fit in memory. Run from the backend directory:
+
+    python -m benchmarks.seed --database-url sqlite:///bench.db --patients 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_NAMES = ["John", "Sarah", "Michael", "Emily", "David", "Maria", "James", "Linda", "Wei", "Priya", "Carlos", "Aisha"]
+LAST_NAMES = ["Smith", "Johnson", "Garcia", "Nguyen", "Patel", "Kim", "Brown", "Lopez", "Chen", "Davis", "Wilson", "Singh"]
+CITIES = [
+    ("San Jose", 37.34, -121.89), ("San Francisco", 37.77, -122.42), ("Oakland", 37.80, -122.27),
+    ("Palo Alto", 37.44, -122.14), ("Sacramento", 38.58, -121.49), ("Fresno", 36.74, -119.79),
+    ("Los Angeles", 34.05, -118.24), ("San Diego", 32.72, -117.16), ("Santa Cruz", 36.97, -122.03)
+]
+BLOOD_TYPES = ["O+", "O-", "A+", "A-", "B+", "B-", "AB+", "AB-"]
+# Emergency departments see few critical patients and many less urgent ones
+TRIAGE_WEIGHTS = [0.08, 0.22, 0.40, 0.30]
+TRANSFER_REASONS = ["Requires specialist care", "ICU capacity", "Closer to family", "Cardiac catheterization"]
+# Share of transfers by status: completed, cancelled, pending, in progress
+TRANSFER_STATUS_WEIGHTS = [0.55, 0.10, 0.28, 0.07]
+
+
+def default_hospitals(patients: int) -> int:
+    return max(10, patients // 200)
+
+
+def _batches(rows, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed_database(url: str, patients: int, hospitals: int = None, transfers: int = None,
+                  batch_size: int = 20000, seed: int = 42, progress: bool = False) -> dict:
+    """Create the schema in an empty database and fill it. Returns the row counts."""
+    os.environ["DATABASE_URL"] = url
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    from sqlalchemy import insert
+    from database import SessionLocal, engine
+    from migrate import upgrade_database
+    from models import Hospital, Patient, Transfer, TransferStatus, TriageLevel, TRIAGE_PRIORITY
+    from occupancy import reconcile_occupancy
+    from changelog import ensure_change_log_seeded
+    from search import ensure_search_index
+
+    hospitals = hospitals or default_hospitals(patients)
+    transfers = patients // 10 if transfers is None else min(transfers, patients)
+    rng = random.Random(seed)
+    levels = list(TriageLevel)
+    statuses = [TransferStatus.COMPLETED, TransferStatus.CANCELLED, TransferStatus.PENDING, TransferStatus.IN_PROGRESS]
+    now = datetime.utcnow()
+    started = time.perf_counter()
+
+    def log(message):
+        if progress:
+            print(f"[{time.perf_counter() - started:7.1f}s] {message}", file=sys.stderr)
+
+    upgrade_database()
+
+    # Decide transfers up front so hospital bed counts can account for held beds
+    patients_per_hospital = [patients // hospitals + (1 if i < patients % hospitals else 0) for i in range(hospitals)]
+    transfer_status = rng.choices(statuses, TRANSFER_STATUS_WEIGHTS, k=transfers)
+    transfer_targets = [rng.randrange(hospitals - 1) for _ in range(transfers)]
+    held_beds = [0] * hospitals
+    for index, status in enumerate(transfer_status):
+        if status == TransferStatus.IN_PROGRESS:
+            source = index % hospitals
+            held_beds[(source + 1 + transfer_targets[index]) % hospitals] += 1
+
+    def hospital_rows():
+        for i in range(hospitals):
+            city, latitude, longitude = CITIES[i % len(CITIES)]
+            capacity = int((patients_per_hospital[i] + held_beds[i]) * rng.uniform(1.1, 1.6)) + 10
+            yield {
+                "name": f"{city} Medical Center {i + 1}", "address": f"{100 + i} Main St", "city": city,
+                "state": "CA", "zip_code": f"9{i % 10000:04d}", "capacity": capacity,
+                "available_beds": capacity - patients_per_hospital[i] - held_beds[i],
+                "phone": "408-555-0100", "latitude": latitude + rng.uniform(-0.3, 0.3),
+                "longitude": longitude + rng.uniform(-0.3, 0.3)
+            }
+
+    def patient_rows():
+        triage = rng.choices(levels, TRIAGE_WEIGHTS, k=patients)
+        for i in range(patients):
+            admitted = now - timedelta(minutes=rng.randrange(60 * 24 * 30))
+            yield {
+                "mrn": f"MRN{i:09d}", "first_name": rng.choice(FIRST_NAMES), "last_name": rng.choice(LAST_NAMES),
+                "date_of_birth": datetime(1930, 1, 1) + timedelta(days=rng.randrange(365 * 90)),
+                "gender": rng.choice(["Male", "Female", "Other"]), "blood_type": rng.choice(BLOOD_TYPES),
+                "hospital_id": i % hospitals + 1, "triage_level": triage[i], "triage_rank": TRIAGE_PRIORITY[triage[i]],
+                "admission_date": admitted, "created_at": admitted, "updated_at": admitted,
+                "current_diagnosis": "Synthetic benchmark admission"
+            }
+
+    def transfer_rows():
+        for i in range(transfers):
+            # Patient i+1 sits at hospital i % hospitals + 1; at most one transfer per patient
+            source = i % hospitals
+            status = transfer_status[i]
+            priority = levels[rng.randrange(len(levels))]
+            requested = now - timedelta(minutes=rng.randrange(60 * 24 * 7))
+            yield {
+                "patient_id": i + 1, "from_hospital_id": source + 1,
+                "to_hospital_id": (source + 1 + transfer_targets[i]) % hospitals + 1,
+                "transfer_reason": rng.choice(TRANSFER_REASONS), "transfer_status": status,
+                "priority": priority, "priority_rank": TRIAGE_PRIORITY[priority],
+                "requested_by": "Dr. Bench", "requested_at": requested,
+                "bed_reserved": status == TransferStatus.IN_PROGRESS,
+                "approved_by": "Dr. Bench" if status != TransferStatus.PENDING else None,
+                "approved_at": requested + timedelta(minutes=5) if status != TransferStatus.PENDING else None,
+                "completed_at": requested + timedelta(hours=2) if status == TransferStatus.COMPLETED else None
+            }
+
+    for table, rows, total in (
+        (Hospital.__table__, hospital_rows(), hospitals),
+        (Patient.__table__, patient_rows(), patients),
+        (Transfer.__table__, transfer_rows(), transfers),
+    ):
+        written = 0
+        with engine.begin() as conn:
+            if engine.dialect.name == "sqlite":
+                conn.exec_driver_sql("PRAGMA synchronous=OFF")
+            for batch in _batches(rows, batch_size):
+                conn.execute(insert(table), batch)
+                written += len(batch)
+                if written % (batch_size * 10) == 0 or written == total:
+                    log(f"{table.name}: {written}/{total}")
+
+    db = SessionLocal()
+    try:
+        reconcile_occupancy(db)
+    finally:
+        db.close()
+    ensure_change_log_seeded()
+    ensure_search_index()
+    log("occupancy counters, change log and search index built")
+    return {"hospitals": hospitals, "patients": patients, "transfers": transfers}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True, help="Empty database to fill, e.g. sqlite:///bench.db")
+    parser.add_argument("--patients", type=int, default=10000)
+    parser.add_argument("--hospitals", type=int, help="Defaults to one per 200 patients (at least 10)")
+    parser.add_argument("--transfers", type=int, help="Defaults to one per 10 patients")
+    parser.add_argument("--batch-size", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    counts = seed_database(args.database_url, args.patients, args.hospitals, args.transfers,
+                           args.batch_size, args.seed, progress=True)
+    print(", ".join(f"{count} {name}" for name, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import delete, insert, literal, select
+from sqlalchemy.orm import Session, aliased
+
+from database import SessionLocal
+from models import ChangeLogEntry, Hospital, Patient, Transfer
+from versions import ENTITY_COLLECTIONS, mark_changed
+
+logger = logging.getLogger(__name__)
+
+# Every write to patients, hospitals and transfers appends a change_log row in
+# the same transaction, so /api/sync can return everything touched since a
+# client's cursor (the last change_log id it saw) without scanning the tables.
+# Rows changed by core UPDATEs (bed accounting, status claims) are logged too.
+# Logging a change also bumps the collection's version (versions.py) at commit.
+
+ENTITY_MODELS = {"patient": Patient, "hospital": Hospital, "transfer": Transfer}
+
+
+def record_change(db: Session, entity: str, entity_id: int, operation: str = "upsert"):
+    """Log one changed row. Does not commit."""
+    record_changes(db, entity, [entity_id], operation)
+
+
+def record_changes(db: Session, entity: str, entity_ids, operation: str = "upsert"):
+    """Log many changed rows of one kind with a single INSERT. Does not commit."""
+    now = datetime.utcnow()
+    rows = [
+        {"entity": entity, "entity_id": entity_id, "operation": operation, "changed_at": now}
+        for entity_id in dict.fromkeys(entity_ids) if entity_id is not None
+    ]
+    if rows:
+        db.execute(insert(ChangeLogEntry), rows)
+        mark_changed(db, ENTITY_COLLECTIONS[entity])
+
+
+def ensure_change_log_seeded():
+    """Log every existing row once when the change log is new (e.g. on an existing database)"""
+    db = SessionLocal()
+    try:
+        if db.scalar(select(ChangeLogEntry.id).limit(1)) is not None:
+            return
+        now = datetime.utcnow()
+        for entity, model in ENTITY_MODELS.items():
+            db.execute(insert(ChangeLogEntry).from_select(
+                ["entity", "entity_id", "operation", "changed_at"],
+                select(literal(entity), model.id, literal("upsert"), literal(now)).order_by(model.id)
+            ))
+        db.commit()
+        logger.info("Seeded the change log from existing rows")
+    finally:
+        db.close()
+
+
+def compact_change_log(db: Session) -> int:
+    """Delete entries superseded by a later entry for the same row and commit.
+
+    Safe while clients are syncing: anyone whose cursor is before a deleted
+    entry still receives the later one.
+    """
+    newer = aliased(ChangeLogEntry)
+    superseded = select(ChangeLogEntry.id).where(
+        select(newer.id).where(
+            newer.entity == ChangeLogEntry.entity,
+            newer.entity_id == ChangeLogEntry.entity_id,
+            newer.id > ChangeLogEntry.id
+        ).exists()
+    )
+    result = db.execute(delete(ChangeLogEntry).where(ChangeLogEntry.id.in_(superseded)))
+    db.commit()
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    # One-off compaction, e.g. from cron: python changelog.py
+    session = SessionLocal()
+    try:
+        print(f"Removed {compact_change_log(session)} superseded change log entries")
+    finally:
+        session.close()
@@ -0,0 +1,216 @@
+import contextvars
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import event
+
+from database import all_engines
+
+logger = logging.getLogger("medcare.diagnostics")
+
+# The listeners and middleware below are always installed but do nothing
+# until diagnostics are enabled, at startup with DIAGNOSTICS_ENABLED=true or
+# at runtime through PUT /api/diagnostics. Even then both features stay off
+# until a threshold or sample rate is set.
+DIAGNOSTICS_ENABLED = os.getenv("DIAGNOSTICS_ENABLED", "false").lower() == "true"
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+EXPLAINABLE = re.compile(r"^\s*(SELECT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+
+class DiagnosticsSettings:
+    """Current diagnostics configuration; change through update()"""
+
+    def __init__(self):
+        self.enabled = DIAGNOSTICS_ENABLED
+        self.slow_query_ms = float(os.getenv("DIAGNOSTICS_SLOW_QUERY_MS", "0"))  # 0 = off
+        self.explain = os.getenv("DIAGNOSTICS_EXPLAIN", "true").lower() == "true"
+        self.profile_rate = float(os.getenv("DIAGNOSTICS_PROFILE_RATE", "0"))  # Fraction of matching requests
+        self.profile_routes = [p for p in os.getenv("DIAGNOSTICS_PROFILE_ROUTES", "").split(",") if p]
+        self.profile_interval_ms = float(os.getenv("DIAGNOSTICS_PROFILE_INTERVAL_MS", "5"))
+        self.profile_dir = os.getenv("DIAGNOSTICS_PROFILE_DIR", os.path.join(BACKEND_DIR, "profiles"))
+        self._lock = threading.Lock()
+
+    def as_dict(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "slow_query_ms": self.slow_query_ms,
+            "explain": self.explain,
+            "profile_rate": self.profile_rate,
+            "profile_routes": self.profile_routes,
+            "profile_interval_ms": self.profile_interval_ms,
+            "profile_dir": self.profile_dir
+        }
+
+    def update(self, **changes) -> dict:
+        with self._lock:
+            for key, value in changes.items():
+                if value is not None and key in self.as_dict():
+                    setattr(self, key, value)
+        return self.as_dict()
+
+
+settings = DiagnosticsSettings()
+
+_current_path = contextvars.ContextVar("medcare_diagnostics_path", default=None)
+
+
+def redact_parameters(parameters):
+    """Replace bound values with their type so no patient data reaches the log"""
+    if isinstance(parameters, dict):
+        return {key: redact_parameters(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact_parameters(value) for value in parameters]
+    if parameters is None:
+        return None
+    if isinstance(parameters, str):
+        return f"<str len={len(parameters)}>"
+    return f"<{type(parameters).__name__}>"
+
+
+def _explain(cursor, dialect: str, statement: str, parameters) -> list:
+    """Plan for a statement, run on a separate raw cursor so it bypasses engine events"""
+    prefix = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}.get(dialect)
+    if prefix is None or not EXPLAINABLE.match(statement):
+        return []
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute(prefix + statement, parameters)
+        return [" ".join(str(column) for column in row) for row in explain_cursor.fetchall()]
+    finally:
+        explain_cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if settings.enabled and settings.slow_query_ms > 0:
+        context._diagnostics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    threshold = settings.slow_query_ms
+    # Not timed when the log was off as the statement started
+    started = getattr(context, "_diagnostics_started", None)
+    if not settings.enabled or threshold <= 0 or started is None:
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms < threshold:
+        return
+    plan = []
+    if settings.explain and not executemany:
+        try:
+            plan = _explain(cursor, conn.dialect.name, statement, parameters)
+        except Exception as exc:
+            plan = [f"EXPLAIN failed: {type(exc).__name__}"]
+    logger.warning(
+        "slow query %.1f ms on %s: %s | params=%s%s",
+        elapsed_ms, _current_path.get() or "background", " ".join(statement.split()),
+        redact_parameters(parameters), "".join(f"\n    plan: {line}" for line in plan)
+    )
+
+
+def install_slow_query_log(binds=None):
+    """Attach the slow-query listeners to binds, by default every engine including the async one"""
+    for bind in binds or all_engines():
+        if not event.contains(bind, "after_cursor_execute", _after_cursor_execute):
+            event.listen(bind, "before_cursor_execute", _before_cursor_execute)
+            event.listen(bind, "after_cursor_execute", _after_cursor_execute)
+
+
+def _is_app_code(filename: str) -> bool:
+    return (filename.startswith(BACKEND_DIR) and "site-packages" not in filename
+            and not filename.endswith("diagnostics.py"))
+
+
+class StackSampler:
+    """Samples Python stacks of threads running application code until stopped.
+
+    Samples come from every such thread while the profiled request is in
+    flight, so concurrent requests can show up in the same profile. Output
+    is in collapsed-stack format ("frame;frame;frame count"), which
+    flamegraph.pl, speedscope and inferno read directly.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="diagnostics-sampler")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                names = []
+                in_app = False
+                while frame is not None:
+                    code = frame.f_code
+                    if _is_app_code(code.co_filename):
+                        in_app = True
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if in_app:
+                    self.stacks[";".join(reversed(names))] += 1
+
+    def write(self, path: str):
+        with open(path, "w") as handle:
+            for stack, count in self.stacks.most_common():
+                handle.write(f"{stack} {count}\n")
+
+
+def _should_profile(path: str) -> bool:
+    rate = settings.profile_rate
+    if rate <= 0:
+        return False
+    if settings.profile_routes and not any(path.startswith(prefix) for prefix in settings.profile_routes):
+        return False
+    return random.random() < rate
+
+
+class DiagnosticsMiddleware:
+    """Tags slow queries with the request path and profiles a sample of requests"""
+
+    def __init__(self, app):
+        self.app = app
+        install_slow_query_log()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.enabled:
+            return await self.app(scope, receive, send)
+        path = scope["path"]
+        token = _current_path.set(f"{scope['method']} {path}")
+        sampler = StackSampler(settings.profile_interval_ms / 1000).start() if _should_profile(path) else None
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_path.reset(token)
+            if sampler is not None:
+                sampler.stop()
+                self._save_profile(sampler, scope["method"], path, time.perf_counter() - started)
+
+    def _save_profile(self, sampler: StackSampler, method: str, path: str, elapsed: float):
+        if not sampler.stacks:
+            return
+        os.makedirs(settings.profile_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+        filename = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{method}-{slug}.folded"
+        sampler.write(os.path.join(settings.profile_dir, filename))
+        logger.info("profiled %s %s (%.1f ms, %d samples) -> %s",
+                    method, path, elapsed * 1000, sum(sampler.stacks.values()), filename)
@@ -0,0 +1,84 @@
+import heapq
+import os
+import threading
+from datetime import datetime
+
+from models import Transfer, TransferStatus, UNTRIAGED_PRIORITY
+
+# Opt-in: the heap is per process, so only enable it with a single API worker
+DISPATCH_QUEUE_ENABLED = os.getenv("DISPATCH_QUEUE_ENABLED", "false").lower() == "true"
+
+
+def _heap_key(priority_rank, requested_at, transfer_id) -> tuple:
+    # Rows written before priority_rank existed may hold NULL; None can't be compared in a heap
+    rank = UNTRIAGED_PRIORITY if priority_rank is None else priority_rank
+    return (rank, requested_at or datetime.min, transfer_id)
+
+
+class DispatchQueue:
+    """In-process min-heap of pending transfers keyed by (priority_rank, requested_at, id).
+
+    Entries are removed lazily: discard() only forgets the id, and stale heap
+    entries are dropped the next time they surface at the top.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._pending = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self, db):
+        """Seed the heap from the database on first use"""
+        if self._loaded:
+            return
+        rows = db.query(Transfer.id, Transfer.priority_rank, Transfer.requested_at).filter(
+            Transfer.transfer_status == TransferStatus.PENDING
+        ).all()
+        self._pending = {row.id: _heap_key(row.priority_rank, row.requested_at, row.id) for row in rows}
+        self._heap = list(self._pending.values())
+        heapq.heapify(self._heap)
+        self._loaded = True
+
+    def push(self, transfer: Transfer):
+        """Track a newly pending transfer"""
+        with self._lock:
+            if not self._loaded:
+                return
+            key = _heap_key(transfer.priority_rank, transfer.requested_at, transfer.id)
+            if self._pending.get(transfer.id) == key:
+                return  # Already loaded from the database by a peek() after it committed
+            self._pending[transfer.id] = key
+            heapq.heappush(self._heap, key)
+
+    def discard(self, transfer_id: int):
+        """Stop tracking a transfer that left the PENDING state"""
+        with self._lock:
+            self._pending.pop(transfer_id, None)
+
+    def peek(self, db, n: int):
+        """Return the ids of the next n transfers to dispatch, in order"""
+        with self._lock:
+            self._ensure_loaded(db)
+            # Pop the top n live entries (discarding stale ones) and push them back
+            top = []
+            while self._heap and len(top) < n:
+                key = heapq.heappop(self._heap)
+                if self._pending.get(key[2]) == key:
+                    top.append(key)
+            for key in top:
+                heapq.heappush(self._heap, key)
+            return [key[2] for key in top]
+
+    def __len__(self):
+        return len(self._pending)
+
+    def reset(self):
+        """Forget all state; the heap is rebuilt from the database on next use"""
+        with self._lock:
+            self._heap = []
+            self._pending = {}
+            self._loaded = False
+
+
+dispatch_queue = DispatchQueue()
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "1000"))
+EVENT_SUBSCRIBER_QUEUE = int(os.getenv("EVENT_SUBSCRIBER_QUEUE", "500"))
+
+
+class Subscription:
+    """One listener's queue, bound to the event loop that is reading it"""
+
+    def __init__(self, loop, types=None):
+        self.loop = loop
+        self.types = types
+        self.queue = asyncio.Queue(maxsize=EVENT_SUBSCRIBER_QUEUE)
+        self.overflowed = False
+        self.start_id = None
+
+    def wants(self, event_type: str) -> bool:
+        return not self.types or event_type.split(".", 1)[0] in self.types
+
+    def deliver(self, event):
+        # Runs on the subscriber's loop; a listener that cannot keep up is cut off
+        # and resumes from its last event id when it reconnects
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class EventBroker:
+    """In-process pub/sub for change notifications.
+
+    Events are numbered per process and the last EVENT_BUFFER_SIZE are kept,
+    so a client that reconnects with its last event id receives only what it
+    missed. Ids carry a per-process epoch; an id from another process (or one
+    that has aged out of the buffer) cannot be resumed and the client is told
+    to reload instead. Each worker process has its own broker.
+    """
+
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._seq = 0
+        self._buffer = deque(maxlen=buffer_size)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, data: dict):
+        """Record an event and fan it out; safe to call from any thread"""
+        with self._lock:
+            self._seq += 1
+            event = (f"{self.epoch}-{self._seq}", event_type, data, time.time())
+            self._buffer.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if subscription.wants(event_type):
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+                except RuntimeError:
+                    # Loop already closed; the subscription is dropped on unsubscribe
+                    pass
+
+    def subscribe(self, last_event_id: str = None, types=None):
+        """Register a listener on the running loop.
+
+        Returns (subscription, backlog, resumed): backlog holds buffered events
+        after last_event_id, and resumed is False when that id can't be served.
+        subscription.start_id is the id of the last event before it was registered.
+        """
+        subscription = Subscription(asyncio.get_running_loop(), types)
+        with self._lock:
+            backlog, resumed = [], last_event_id is None
+            if last_event_id is not None:
+                epoch, _, seq = last_event_id.partition("-")
+                oldest = int(self._buffer[0][0].split("-")[1]) if self._buffer else self._seq + 1
+                if epoch == self.epoch and seq.isdigit() and int(seq) + 1 >= oldest:
+                    resumed = True
+                    backlog = [
+                        event for event in self._buffer
+                        if int(event[0].split("-")[1]) > int(seq) and subscription.wants(event[1])
+                    ]
+            subscription.start_id = f"{self.epoch}-{self._seq}"
+            self._subscribers.add(subscription)
+        return subscription, backlog, resumed
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+
+broker = EventBroker()
+
+
+def publish(event_type: str, **data):
+    """Announce a committed change, e.g. publish("transfer.created", id=1, ...)"""
+    broker.publish(event_type, data)
@@ -0,0 +1,81 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from database import ReadSessionLocal
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+
+def _export_value(value):
+    """Render a column value the same way the JSON API does"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _ndjson_chunks(rows, columns):
+    buffer = []
+    for row in rows:
+        buffer.append(json.dumps({c: _export_value(v) for c, v in zip(columns, row)}))
+        if len(buffer) >= EXPORT_BATCH_SIZE:
+            yield "\n".join(buffer) + "\n"
+            buffer = []
+    if buffer:
+        yield "\n".join(buffer) + "\n"
+
+
+def _csv_chunks(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(["" if v is None else _export_value(v) for v in row])
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_export(statement, fmt: str, filename: str, session_factory=ReadSessionLocal) -> StreamingResponse:
+    """Stream the rows of a Core SELECT as NDJSON or CSV.
+
+    Rows are fetched in batches through a server-side cursor (yield_per) on
+    a session owned by the generator, so memory stays flat however many
+    rows match and the session outlives the request handler.
+    """
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid format. Must be one of: {', '.join(EXPORT_MEDIA_TYPES)}"
+        )
+
+    columns = [column.name for column in statement.selected_columns]
+    chunks = _ndjson_chunks if fmt == "ndjson" else _csv_chunks
+
+    def generate():
+        db = session_factory()
+        try:
+            rows = db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            yield from chunks(rows, columns)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        generate(),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
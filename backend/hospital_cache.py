@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import Hospital
+
+HOSPITAL_CACHE_TTL = float(os.getenv("HOSPITAL_CACHE_TTL", "300"))
+HOSPITAL_CACHE_SIZE = int(os.getenv("HOSPITAL_CACHE_SIZE", "10000"))
+
+# Directory fields that only change through create_hospital; available_beds is
+# deliberately absent so bed counts are always read from the database.
+CACHED_COLUMNS = [
+    Hospital.id, Hospital.name, Hospital.address, Hospital.city, Hospital.state,
+    Hospital.zip_code, Hospital.capacity, Hospital.phone, Hospital.email,
+    Hospital.latitude, Hospital.longitude, Hospital.created_at
+]
+
+
+class HospitalDirectoryCache:
+    """In-process read-through LRU cache of hospital metadata with a TTL.
+
+    Entries are plain dicts, so they are safe to share across sessions and
+    threads. Each worker process has its own cache; the TTL bounds how long
+    a worker can serve metadata changed through another worker.
+    """
+
+    def __init__(self, ttl: float = HOSPITAL_CACHE_TTL, max_size: int = HOSPITAL_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, hospital_id: int):
+        """Hospital metadata as a dict, or None if the hospital does not exist"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(hospital_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(hospital_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        row = db.execute(select(*CACHED_COLUMNS).where(Hospital.id == hospital_id)).mappings().first()
+        if row is None:
+            return None
+        hospital = dict(row)
+        self.put(hospital)
+        return hospital
+
+    def put(self, hospital: dict):
+        """Store metadata for one hospital (extra keys such as available_beds are dropped)"""
+        entry = {column.key: hospital.get(column.key) for column in CACHED_COLUMNS}
+        with self._lock:
+            self._entries[entry["id"]] = (time.monotonic() + self.ttl, entry)
+            self._entries.move_to_end(entry["id"])
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, hospital_id: int = None):
+        """Drop one hospital, or every hospital when no id is given"""
+        with self._lock:
+            if hospital_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(hospital_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+hospital_cache = HospitalDirectoryCache()
@@ -0,0 +1,229 @@
+import bisect
+import contextvars
+import threading
+import time
+
+from sqlalchemy import event
+
+from database import engine, read_engine, replica_engine, async_engine, TimedQueuePool
+from hospital_cache import hospital_cache
+
+# Minimal Prometheus instrumentation without a client library dependency.
+# MetricsMiddleware times every request and tags it with its route template;
+# SQLAlchemy cursor events attribute statement counts and time to the request
+# that ran them (sync routes run in a threadpool but inherit the request's
+# context, so the contextvar below reaches them).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STATEMENT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+def _format_labels(names, values, extra=None) -> str:
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels=(), collect=None):
+        super().__init__(name, documentation, labels)
+        self.collect = collect  # Optional callable returning the current value at scrape time
+
+    def inc(self, amount=1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            if self.collect is not None:
+                self._values[()] = self.collect()
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((labels, ([*state[0]], state[1], state[2])) for labels, state in self._values.items())
+        lines = self.header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+REQUESTS = Counter("medcare_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+REQUEST_LATENCY = Histogram(
+    "medcare_http_request_duration_seconds", "Time from request start to the last response byte", ("method", "route")
+)
+IN_FLIGHT = Gauge("medcare_http_requests_in_flight", "Requests currently being served")
+RESPONSE_SIZE = Histogram(
+    "medcare_http_response_size_bytes", "Response body size", ("method", "route"), buckets=SIZE_BUCKETS
+)
+DB_STATEMENTS = Counter("medcare_db_statements_total", "SQL statements executed (including background jobs)")
+DB_STATEMENT_LATENCY = Histogram(
+    "medcare_db_statement_duration_seconds", "Time spent executing one SQL statement", buckets=STATEMENT_BUCKETS
+)
+DB_REQUEST_STATEMENTS = Counter(
+    "medcare_db_request_statements_total", "SQL statements executed while serving a route", ("route",)
+)
+DB_REQUEST_SECONDS = Counter(
+    "medcare_db_request_seconds_total", "Time spent in SQL statements while serving a route", ("route",)
+)
+POOL_WAIT = Histogram(
+    "medcare_db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", buckets=STATEMENT_BUCKETS
+)
+POOL_CHECKED_OUT = Gauge(
+    "medcare_db_pool_checked_out", "Connections currently checked out of all pools",
+    collect=lambda: sum(
+        bind.pool.checkedout() for bind in {engine, read_engine, replica_engine} - {None}
+        if hasattr(bind.pool, "checkedout")
+    )
+)
+HOSPITAL_CACHE_HITS = Counter(
+    "medcare_hospital_cache_hits_total", "Hospital directory cache hits", collect=lambda: hospital_cache.hits
+)
+HOSPITAL_CACHE_MISSES = Counter(
+    "medcare_hospital_cache_misses_total", "Hospital directory cache misses", collect=lambda: hospital_cache.misses
+)
+
+ALL_METRICS = [
+    REQUESTS, REQUEST_LATENCY, IN_FLIGHT, RESPONSE_SIZE, DB_STATEMENTS, DB_STATEMENT_LATENCY,
+    DB_REQUEST_STATEMENTS, DB_REQUEST_SECONDS, POOL_WAIT, POOL_CHECKED_OUT,
+    HOSPITAL_CACHE_HITS, HOSPITAL_CACHE_MISSES
+]
+
+
+class _RequestStats:
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+_current_request = contextvars.ContextVar("medcare_request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._medcare_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._medcare_started
+    DB_STATEMENTS.inc()
+    DB_STATEMENT_LATENCY.observe(elapsed)
+    stats = _current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+
+
+def instrument_engines():
+    """Attach the statement and pool listeners (idempotent)"""
+    binds = [engine, read_engine, replica_engine, async_engine.sync_engine if async_engine is not None else None]
+    for bind in filter(None, binds):
+        if not event.contains(bind, "before_cursor_execute", _before_cursor_execute):
+            event.listen(bind, "before_cursor_execute", _before_cursor_execute)
+            event.listen(bind, "after_cursor_execute", _after_cursor_execute)
+    if POOL_WAIT.observe not in TimedQueuePool.wait_listeners:
+        TimedQueuePool.wait_listeners.append(POOL_WAIT.observe)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Records latency, status, response size and DB work per route template"""
+
+    def __init__(self, app):
+        self.app = app
+        instrument_engines()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = _RequestStats()
+        token = _current_request.set(stats)
+        status = {"code": 500, "bytes": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            elif message["type"] == "http.response.body":
+                status["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc(1)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.inc(-1)
+            _current_request.reset(token)
+            # Label by route template (not raw path) to keep the series count bounded
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            REQUESTS.inc(1, method, route_label, str(status["code"]))
+            REQUEST_LATENCY.observe(elapsed, method, route_label)
+            RESPONSE_SIZE.observe(status["bytes"], method, route_label)
+            if stats.statements:
+                DB_REQUEST_STATEMENTS.inc(stats.statements, route_label)
+                DB_REQUEST_SECONDS.inc(stats.db_seconds, route_label)
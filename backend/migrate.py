@@ -0,0 +1,66 @@
+import logging
+import os
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+# Apply pending migrations when the app starts. Turn off where migrations are a
+# deploy step (python migrate.py); the app then refuses to start on an old schema.
+MIGRATE_ON_STARTUP = os.getenv("DB_MIGRATE_ON_STARTUP", "true").lower() == "true"
+
+# The schema is owned by the Alembic revisions in migrations/versions, not by
+# Base.metadata.create_all(). The baseline revision only creates missing tables,
+# so databases created by create_all() before migrations existed are adopted
+# and upgraded like any other.
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def alembic_config() -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.attributes["configure_logging"] = False  # Keep the app's logging setup
+    return config
+
+
+def head_revision() -> str:
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def current_revision():
+    """Revision the database is at, or None if it has never been migrated"""
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+def upgrade_database(revision: str = "head"):
+    command.upgrade(alembic_config(), revision)
+
+
+def ensure_schema():
+    """Bring the database to the head revision, or fail if that isn't allowed here"""
+    current, head = current_revision(), head_revision()
+    if current == head:
+        return
+    if not MIGRATE_ON_STARTUP:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {head}; run `python migrate.py`"
+        )
+    logger.info("Migrating database from revision %s to %s", current, head)
+    try:
+        upgrade_database()
+    except Exception:
+        # Workers starting together on SQLite race for the write lock; fine if another one finished
+        if current_revision() != head:
+            raise
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    upgrade_database()
+    print(f"Database is at revision {current_revision()}")
@@ -0,0 +1,65 @@
+"""Alembic environment: migrates the database named by DATABASE_URL (see migrate.py)"""
+import os
+import sys
+from logging.config import fileConfig
+
+from alembic import context
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from database import DATABASE_URL, Base, engine  # noqa: E402
+import models  # noqa: E402,F401  (registers the tables on Base.metadata)
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logging", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+# Held while migrating on PostgreSQL so workers starting together migrate one at a time
+MIGRATION_LOCK_ID = 73_022_024
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # Tables outside the models (the full-text search index and its shadow tables) are managed by search.py
+    return not (type_ == "table" and reflected and compare_to is None)
+
+
+def run_migrations_offline():
+    context.configure(
+        url=DATABASE_URL, target_metadata=target_metadata, include_object=include_object,
+        literal_binds=True, dialect_opts={"paramstyle": "named"}
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        # Caller-supplied connection (e.g. tests migrating a database other than DATABASE_URL)
+        context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+    with engine.connect() as connection:
+        locked = connection.dialect.name == "postgresql"
+        if locked:
+            connection.exec_driver_sql(f"SELECT pg_advisory_lock({MIGRATION_LOCK_ID})")
+            connection.commit()
+        try:
+            context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            if locked:
+                connection.exec_driver_sql(f"SELECT pg_advisory_unlock({MIGRATION_LOCK_ID})")
+                connection.commit()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,199 @@
+"""Initial schema
+
+Creates only what is missing, so a database built by the old
+Base.metadata.create_all() call is adopted and then upgraded. Columns added
+to existing tables before migrations existed (patients.triage_rank,
+transfers.priority_rank and bed_reserved, hospitals.latitude and longitude)
+are added and backfilled when a database predates them.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIAGE_LEVELS = ("CRITICAL", "URGENT", "SEMI_URGENT", "NON_URGENT")
+TRANSFER_STATUSES = ("PENDING", "IN_PROGRESS", "COMPLETED", "CANCELLED")
+
+
+def _enum(name: str, values: tuple):
+    # Several tables share triagelevel; on PostgreSQL the type is created once in upgrade()
+    return sa.Enum(*values, name=name).with_variant(
+        postgresql.ENUM(*values, name=name, create_type=False), "postgresql"
+    )
+
+
+def _create_table(name: str, *columns):
+    if not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns)
+
+
+def _add_missing_columns(table: str, *columns):
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+    for column in columns:
+        if column.name not in existing:
+            op.add_column(table, column)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        postgresql.ENUM(*TRIAGE_LEVELS, name="triagelevel").create(bind, checkfirst=True)
+        postgresql.ENUM(*TRANSFER_STATUSES, name="transferstatus").create(bind, checkfirst=True)
+
+    _create_table(
+        "hospitals",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(200), nullable=False),
+        sa.Column("address", sa.String(500)),
+        sa.Column("city", sa.String(100)),
+        sa.Column("state", sa.String(50)),
+        sa.Column("zip_code", sa.String(20)),
+        sa.Column("capacity", sa.Integer()),
+        sa.Column("available_beds", sa.Integer()),
+        sa.Column("phone", sa.String(20)),
+        sa.Column("email", sa.String(100)),
+        sa.Column("latitude", sa.Float()),
+        sa.Column("longitude", sa.Float()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    _add_missing_columns("hospitals", sa.Column("latitude", sa.Float()), sa.Column("longitude", sa.Float()))
+    op.create_index("ix_hospitals_id", "hospitals", ["id"], if_not_exists=True)
+
+    _create_table(
+        "patients",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("mrn", sa.String(50), nullable=False),
+        sa.Column("first_name", sa.String(100), nullable=False),
+        sa.Column("last_name", sa.String(100), nullable=False),
+        sa.Column("date_of_birth", sa.DateTime()),
+        sa.Column("gender", sa.String(20)),
+        sa.Column("phone", sa.String(20)),
+        sa.Column("email", sa.String(100)),
+        sa.Column("address", sa.String(500)),
+        sa.Column("emergency_contact", sa.String(200)),
+        sa.Column("emergency_phone", sa.String(20)),
+        sa.Column("blood_type", sa.String(10)),
+        sa.Column("allergies", sa.Text()),
+        sa.Column("current_medications", sa.Text()),
+        sa.Column("medical_history", sa.Text()),
+        sa.Column("hospital_id", sa.Integer(), sa.ForeignKey("hospitals.id")),
+        sa.Column("triage_level", _enum("triagelevel", TRIAGE_LEVELS)),
+        sa.Column("triage_rank", sa.Integer()),
+        sa.Column("admission_date", sa.DateTime()),
+        sa.Column("current_diagnosis", sa.Text()),
+        sa.Column("attending_physician", sa.String(200)),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_patients_id", "patients", ["id"], if_not_exists=True)
+    op.create_index("ix_patients_mrn", "patients", ["mrn"], unique=True, if_not_exists=True)
+    _add_missing_columns("patients", sa.Column("triage_rank", sa.Integer()))
+    # Same mapping as models.TRIAGE_PRIORITY; unset levels sort last (UNTRIAGED_PRIORITY)
+    op.execute(
+        "UPDATE patients SET triage_rank = CASE triage_level"
+        " WHEN 'CRITICAL' THEN 1 WHEN 'URGENT' THEN 2 WHEN 'SEMI_URGENT' THEN 3 WHEN 'NON_URGENT' THEN 4"
+        " ELSE 999 END WHERE triage_rank IS NULL"
+    )
+    op.create_index(
+        "ix_patients_triage_admission", "patients", ["triage_rank", "admission_date", "id"], if_not_exists=True
+    )
+    op.create_index(
+        "ix_patients_hospital_triage_rank", "patients",
+        ["hospital_id", "triage_rank", "admission_date", "id"], if_not_exists=True
+    )
+
+    _create_table(
+        "transfers",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("patient_id", sa.Integer(), sa.ForeignKey("patients.id"), nullable=False),
+        sa.Column("from_hospital_id", sa.Integer(), sa.ForeignKey("hospitals.id"), nullable=False),
+        sa.Column("to_hospital_id", sa.Integer(), sa.ForeignKey("hospitals.id"), nullable=False),
+        sa.Column("transfer_reason", sa.Text(), nullable=False),
+        sa.Column("transfer_status", _enum("transferstatus", TRANSFER_STATUSES)),
+        sa.Column("priority", _enum("triagelevel", TRIAGE_LEVELS)),
+        sa.Column("priority_rank", sa.Integer()),
+        sa.Column("requested_by", sa.String(200)),
+        sa.Column("approved_by", sa.String(200)),
+        sa.Column("bed_reserved", sa.Boolean()),
+        sa.Column("requested_at", sa.DateTime()),
+        sa.Column("approved_at", sa.DateTime()),
+        sa.Column("completed_at", sa.DateTime()),
+        sa.Column("notes", sa.Text()),
+        sa.Column("documents_transferred", sa.Text()),
+    )
+    _add_missing_columns(
+        "transfers", sa.Column("priority_rank", sa.Integer()), sa.Column("bed_reserved", sa.Boolean())
+    )
+    # Same mapping as models.TRIAGE_PRIORITY; unset priorities sort last (UNTRIAGED_PRIORITY)
+    op.execute(
+        "UPDATE transfers SET priority_rank = CASE priority"
+        " WHEN 'CRITICAL' THEN 1 WHEN 'URGENT' THEN 2 WHEN 'SEMI_URGENT' THEN 3 WHEN 'NON_URGENT' THEN 4"
+        " ELSE 999 END WHERE priority_rank IS NULL"
+    )
+    # Transfers approved before beds were held on approval never reserved one
+    op.execute(sa.text("UPDATE transfers SET bed_reserved = :false WHERE bed_reserved IS NULL").bindparams(
+        sa.bindparam("false", False, type_=sa.Boolean())
+    ))
+    op.create_index("ix_transfers_id", "transfers", ["id"], if_not_exists=True)
+    op.create_index(
+        "ix_transfers_dispatch", "transfers", ["transfer_status", "priority_rank", "requested_at"],
+        if_not_exists=True
+    )
+
+    _create_table(
+        "occupancy_counters",
+        sa.Column("hospital_id", sa.Integer(), sa.ForeignKey("hospitals.id"), primary_key=True),
+        sa.Column("triage_level", _enum("triagelevel", TRIAGE_LEVELS), primary_key=True),
+        sa.Column("patient_count", sa.Integer(), nullable=False),
+    )
+
+    _create_table(
+        "change_log",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("entity", sa.String(20), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("operation", sa.String(10), nullable=False),
+        sa.Column("changed_at", sa.DateTime()),
+    )
+    op.create_index("ix_change_log_entity", "change_log", ["entity", "entity_id", "id"], if_not_exists=True)
+
+    _create_table(
+        "collection_versions",
+        sa.Column("collection", sa.String(20), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+    )
+
+    _create_table(
+        "audit_events",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("occurred_at", sa.DateTime(), nullable=False),
+        sa.Column("action", sa.String(50), nullable=False),
+        sa.Column("actor", sa.String(100)),
+        sa.Column("entity", sa.String(20), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("details", sa.JSON()),
+    )
+    op.create_index("ix_audit_events_entity", "audit_events", ["entity", "entity_id", "id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    for table in ("audit_events", "collection_versions", "change_log", "occupancy_counters",
+                  "transfers", "patients", "hospitals"):
+        op.drop_table(table)
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        postgresql.ENUM(name="transferstatus").drop(bind, checkfirst=True)
+        postgresql.ENUM(name="triagelevel").drop(bind, checkfirst=True)
@@ -0,0 +1,46 @@
+"""Query indexes
+
+Indexes the transfer lookups that were full scans: the unfiltered list, a
+patient's history and the per-hospital lists.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_transfers_priority", "transfers", ["priority_rank", "requested_at"]),
+    ("ix_transfers_patient", "transfers", ["patient_id", "requested_at"]),
+    ("ix_transfers_from_hospital", "transfers", ["from_hospital_id", "transfer_status"]),
+    ("ix_transfers_to_hospital", "transfers", ["to_hospital_id", "transfer_status"]),
+]
+
+
+def _create_indexes():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # CONCURRENTLY keeps the tables writable while the indexes build, but can't run in a transaction
+        with op.get_context().autocommit_block():
+            _create_indexes()
+    else:
+        _create_indexes()
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
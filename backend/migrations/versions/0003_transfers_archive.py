@@ -0,0 +1,72 @@
+"""Transfers archive
+
+Adds transfers_archive, where archive.py moves closed transfers once they are
+older than TRANSFER_ARCHIVE_AFTER_DAYS. On PostgreSQL it is partitioned by
+range of requested_at; archive.py creates a partition per year as needed.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIAGE_LEVELS = ("CRITICAL", "URGENT", "SEMI_URGENT", "NON_URGENT")
+TRANSFER_STATUSES = ("PENDING", "IN_PROGRESS", "COMPLETED", "CANCELLED")
+
+
+def _enum(name: str, values: tuple):
+    # The types already exist on PostgreSQL (revision 0001)
+    return sa.Enum(*values, name=name).with_variant(
+        postgresql.ENUM(*values, name=name, create_type=False), "postgresql"
+    )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "transfers_archive",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("requested_at", sa.DateTime(), primary_key=True),
+        sa.Column("patient_id", sa.Integer(), nullable=False),
+        sa.Column("from_hospital_id", sa.Integer(), nullable=False),
+        sa.Column("to_hospital_id", sa.Integer(), nullable=False),
+        sa.Column("transfer_reason", sa.Text(), nullable=False),
+        sa.Column("transfer_status", _enum("transferstatus", TRANSFER_STATUSES)),
+        sa.Column("priority", _enum("triagelevel", TRIAGE_LEVELS)),
+        sa.Column("priority_rank", sa.Integer()),
+        sa.Column("requested_by", sa.String(200)),
+        sa.Column("approved_by", sa.String(200)),
+        sa.Column("bed_reserved", sa.Boolean()),
+        sa.Column("approved_at", sa.DateTime()),
+        sa.Column("completed_at", sa.DateTime()),
+        sa.Column("notes", sa.Text()),
+        sa.Column("documents_transferred", sa.Text()),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+        postgresql_partition_by="RANGE (requested_at)",
+    )
+    op.create_index("ix_transfers_archive_patient", "transfers_archive", ["patient_id", "requested_at"])
+    op.create_index("ix_transfers_archive_priority", "transfers_archive", ["priority_rank", "requested_at"])
+    op.create_index("ix_transfers_archive_from_hospital", "transfers_archive", ["from_hospital_id"])
+    op.create_index("ix_transfers_archive_to_hospital", "transfers_archive", ["to_hospital_id"])
+
+
+def downgrade() -> None:
+    # Move archived transfers back before dropping the table
+    columns = ", ".join([
+        "id", "patient_id", "from_hospital_id", "to_hospital_id", "transfer_reason", "transfer_status",
+        "priority", "priority_rank", "requested_by", "approved_by", "bed_reserved", "requested_at",
+        "approved_at", "completed_at", "notes", "documents_transferred",
+    ])
+    op.execute(f"INSERT INTO transfers ({columns}) SELECT {columns} FROM transfers_archive")
+    op.drop_table("transfers_archive")
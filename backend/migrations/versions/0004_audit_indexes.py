@@ -0,0 +1,44 @@
+"""Audit indexes
+
+Indexes the audit trail by action and by actor, so /api/audit filters on
+either no longer scan the whole table.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_audit_events_action", "audit_events", ["action", "occurred_at"]),
+    ("ix_audit_events_actor", "audit_events", ["actor", "occurred_at"]),
+]
+
+
+def _create_indexes():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # The audit trail is written continuously; don't block it while the indexes build
+        with op.get_context().autocommit_block():
+            _create_indexes()
+    else:
+        _create_indexes()
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Text, Enum, Float, Boolean, Index, JSON
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime
 import enum
 
@@ -17,6 +17,15 @@ class TransferStatus(enum.Enum):
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
+# Dispatch order for triage levels (CRITICAL first)
+TRIAGE_PRIORITY = {
+    TriageLevel.CRITICAL: 1,
+    TriageLevel.URGENT: 2,
+    TriageLevel.SEMI_URGENT: 3,
+    TriageLevel.NON_URGENT: 4
+}
+UNTRIAGED_PRIORITY = 999
+
 class Hospital(Base):
     __tablename__ = "hospitals"
     
@@ -30,6 +39,8 @@ class Hospital(Base):
     available_beds = Column(Integer)
     phone = Column(String(20))
     email = Column(String(100))
+    latitude = Column(Float)
+    longitude = Column(Float)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     patients = relationship("Patient", back_populates="hospital")
@@ -60,6 +71,7 @@ class Patient(Base):
     # Current Status
     hospital_id = Column(Integer, ForeignKey("hospitals.id"))
     triage_level = Column(Enum(TriageLevel))
+    triage_rank = Column(Integer, default=UNTRIAGED_PRIORITY)  # Numeric form of triage_level for indexed triage order
     admission_date = Column(DateTime, default=datetime.utcnow)
     current_diagnosis = Column(Text)
     attending_physician = Column(String(200))
@@ -70,6 +82,18 @@ class Patient(Base):
     hospital = relationship("Hospital", back_populates="patients")
     transfers = relationship("Transfer", back_populates="patient")
 
+    __table_args__ = (
+        # Triage-ordered listings and keyset pagination, network-wide and per hospital
+        Index("ix_patients_triage_admission", "triage_rank", "admission_date", "id"),
+        Index("ix_patients_hospital_triage_rank", "hospital_id", "triage_rank", "admission_date", "id"),
+    )
+
+    @validates("triage_level")
+    def _sync_triage_rank(self, key, triage_level):
+        """Keep triage_rank in step with triage_level"""
+        self.triage_rank = TRIAGE_PRIORITY.get(triage_level, UNTRIAGED_PRIORITY)
+        return triage_level
+
 class Transfer(Base):
     __tablename__ = "transfers"
     
@@ -81,9 +105,11 @@ class Transfer(Base):
     transfer_reason = Column(Text, nullable=False)
     transfer_status = Column(Enum(TransferStatus), default=TransferStatus.PENDING)
     priority = Column(Enum(TriageLevel))
+    priority_rank = Column(Integer, default=UNTRIAGED_PRIORITY)  # Numeric form of priority for indexed dispatch order
     
     requested_by = Column(String(200))
     approved_by = Column(String(200))
+    bed_reserved = Column(Boolean, default=False)  # Destination bed held while IN_PROGRESS
     
     requested_at = Column(DateTime, default=datetime.utcnow)
     approved_at = Column(DateTime)
@@ -96,9 +122,110 @@ class Transfer(Base):
     from_hospital = relationship("Hospital", foreign_keys=[from_hospital_id], back_populates="transfers_from")
     to_hospital = relationship("Hospital", foreign_keys=[to_hospital_id], back_populates="transfers_to")
 
+    __table_args__ = (
+        # Dispatch queue: next N transfers in a status by priority, then age
+        Index("ix_transfers_dispatch", "transfer_status", "priority_rank", "requested_at"),
+        # Unfiltered transfer list in priority order
+        Index("ix_transfers_priority", "priority_rank", "requested_at"),
+        # A patient's history, and the active-transfer check on create
+        Index("ix_transfers_patient", "patient_id", "requested_at"),
+        # Per-hospital transfer lists, inbound/outbound counts by status
+        Index("ix_transfers_from_hospital", "from_hospital_id", "transfer_status"),
+        Index("ix_transfers_to_hospital", "to_hospital_id", "transfer_status"),
+    )
+
+    @validates("priority")
+    def _sync_priority_rank(self, key, priority):
+        """Keep priority_rank in step with priority"""
+        self.priority_rank = TRIAGE_PRIORITY.get(priority, UNTRIAGED_PRIORITY)
+        return priority
+
+class ArchivedTransfer(Base):
+    """Closed transfer moved out of transfers by archive.py; same columns plus archived_at"""
+    __tablename__ = "transfers_archive"
+    
+    # requested_at is part of the key so PostgreSQL can partition the table by it
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    requested_at = Column(DateTime, primary_key=True)
+    patient_id = Column(Integer, nullable=False)
+    from_hospital_id = Column(Integer, nullable=False)
+    to_hospital_id = Column(Integer, nullable=False)
+    
+    transfer_reason = Column(Text, nullable=False)
+    transfer_status = Column(Enum(TransferStatus))
+    priority = Column(Enum(TriageLevel))
+    priority_rank = Column(Integer)
+    
+    requested_by = Column(String(200))
+    approved_by = Column(String(200))
+    bed_reserved = Column(Boolean)
+    
+    approved_at = Column(DateTime)
+    completed_at = Column(DateTime)
+    
+    notes = Column(Text)
+    documents_transferred = Column(Text)
+    archived_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_transfers_archive_patient", "patient_id", "requested_at"),
+        Index("ix_transfers_archive_priority", "priority_rank", "requested_at"),
+        Index("ix_transfers_archive_from_hospital", "from_hospital_id"),
+        Index("ix_transfers_archive_to_hospital", "to_hospital_id"),
+        # One partition per year of requested_at on PostgreSQL (created by archive.py as needed)
+        {"postgresql_partition_by": "RANGE (requested_at)"},
+    )
+
+class OccupancyCounter(Base):
+    """Maintained patient count per hospital and triage level (see occupancy.py)"""
+    __tablename__ = "occupancy_counters"
+    
+    hospital_id = Column(Integer, ForeignKey("hospitals.id"), primary_key=True)
+    triage_level = Column(Enum(TriageLevel), primary_key=True)
+    patient_count = Column(Integer, nullable=False, default=0)
+
+class ChangeLogEntry(Base):
+    """One row per created, modified or deleted record; id is the sync cursor (see changelog.py)"""
+    __tablename__ = "change_log"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String(20), nullable=False)  # "patient", "hospital" or "transfer"
+    entity_id = Column(Integer, nullable=False)
+    operation = Column(String(10), nullable=False)  # "upsert", "delete" or "archive"
+    changed_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_change_log_entity", "entity", "entity_id", "id"),
+    )
+
+class CollectionVersion(Base):
+    """Write counter per collection, bumped by every committed change; list ETags derive from it (see versions.py)"""
+    __tablename__ = "collection_versions"
+    
+    collection = Column(String(20), primary_key=True)  # "patients", "hospitals" or "transfers"
+    version = Column(BigInteger, nullable=False)
+
+class AuditEvent(Base):
+    """Append-only record of who did what (see audit.py); transfer notes are stored here too"""
+    __tablename__ = "audit_events"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    occurred_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    action = Column(String(50), nullable=False)  # e.g. "patient.triage_updated", "transfer.note"
+    actor = Column(String(100))
+    entity = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    details = Column(JSON)
+    
+    __table_args__ = (
+        Index("ix_audit_events_entity", "entity", "entity_id", "id"),
+        Index("ix_audit_events_action", "action", "occurred_at"),
+        Index("ix_audit_events_actor", "actor", "occurred_at"),
+    )
+
 # Pydantic schemas for API
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime as dt
 
 class PatientCreate(BaseModel):
@@ -143,6 +270,10 @@ class PatientResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class PatientSearchResult(PatientResponse):
+    match: str  # "prefix" or "fuzzy"
+    score: float
+
 class HospitalCreate(BaseModel):
     name: str
     address: str
@@ -150,6 +281,8 @@ class HospitalCreate(BaseModel):
     state: str
     capacity: int
     available_beds: int
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 class TransferCreate(BaseModel):
     patient_id: int
@@ -158,3 +291,20 @@ class TransferCreate(BaseModel):
     transfer_reason: str
     priority: str
     requested_by: str
+
+class TransferStatusChange(BaseModel):
+    transfer_id: int
+    status: str
+    notes: Optional[str] = None
+
+class TransferBatchStatusUpdate(BaseModel):
+    approved_by: str
+    transitions: List[TransferStatusChange]
+
+class DiagnosticsUpdate(BaseModel):
+    enabled: Optional[bool] = None
+    slow_query_ms: Optional[float] = None
+    explain: Optional[bool] = None
+    profile_rate: Optional[float] = None
+    profile_routes: Optional[List[str]] = None
+    profile_interval_ms: Optional[float] = None
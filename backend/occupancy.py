@@ -0,0 +1,131 @@
+import logging
+import os
+import threading
+from collections import Counter
+
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import OccupancyCounter, Patient
+
+logger = logging.getLogger(__name__)
+
+# Seconds between background reconciliations; 0 disables the periodic job
+RECONCILE_INTERVAL = int(os.getenv("OCCUPANCY_RECONCILE_SECONDS", "0"))
+
+# Per-hospital, per-triage patient counts are kept in occupancy_counters and
+# adjusted in the same transaction as every admit, discharge, triage change
+# and completed transfer, so stats endpoints read a handful of rows instead
+# of counting the patients table. reconcile_occupancy() rebuilds the table
+# from scratch under a write lock to repair any drift (e.g. rows edited
+# outside the API).
+
+
+def _upsert_insert(db: Session):
+    """Dialect-specific INSERT supporting ON CONFLICT, or None if unavailable"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(OccupancyCounter)
+
+
+def adjust_occupancy(db: Session, hospital_id, triage_level, delta: int = 1):
+    """Add delta to one counter, creating it if needed. Does not commit."""
+    if hospital_id is None or triage_level is None or delta == 0:
+        return
+    stmt = _upsert_insert(db)
+    if stmt is not None:
+        db.execute(
+            stmt.values(hospital_id=hospital_id, triage_level=triage_level, patient_count=delta)
+            .on_conflict_do_update(
+                index_elements=[OccupancyCounter.hospital_id, OccupancyCounter.triage_level],
+                set_={"patient_count": OccupancyCounter.patient_count + delta}
+            )
+        )
+        return
+    result = db.execute(
+        update(OccupancyCounter)
+        .where(OccupancyCounter.hospital_id == hospital_id, OccupancyCounter.triage_level == triage_level)
+        .values(patient_count=OccupancyCounter.patient_count + delta)
+    )
+    if result.rowcount == 0:
+        db.execute(insert(OccupancyCounter).values(
+            hospital_id=hospital_id, triage_level=triage_level, patient_count=delta
+        ))
+
+
+def adjust_occupancy_many(db: Session, deltas: Counter):
+    """Apply a {(hospital_id, triage_level): delta} mapping. Does not commit."""
+    for (hospital_id, triage_level), delta in deltas.items():
+        adjust_occupancy(db, hospital_id, triage_level, delta)
+
+
+def reconcile_occupancy(db: Session) -> int:
+    """Rebuild every counter from the patients table and commit. Returns rows written.
+
+    Counter writers are locked out before the patients are counted, so an
+    adjustment committed mid-rebuild is not overwritten: it either lands
+    before the count (and is included) or waits and applies on top.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # Blocks adjust_occupancy() but not reads of the counters
+        db.execute(text("LOCK TABLE occupancy_counters IN EXCLUSIVE MODE"))
+    # On SQLite this first write takes the database write lock
+    db.execute(delete(OccupancyCounter))
+    rows = db.execute(
+        select(Patient.hospital_id, Patient.triage_level, func.count(Patient.id))
+        .where(Patient.hospital_id.isnot(None), Patient.triage_level.isnot(None))
+        .group_by(Patient.hospital_id, Patient.triage_level)
+    ).all()
+    if rows:
+        db.execute(insert(OccupancyCounter), [
+            {"hospital_id": hospital_id, "triage_level": triage_level, "patient_count": count}
+            for hospital_id, triage_level, count in rows
+        ])
+    db.commit()
+    return len(rows)
+
+
+def ensure_occupancy_seeded():
+    """Build the counters on first start against an existing patients table"""
+    db = SessionLocal()
+    try:
+        if db.scalar(select(OccupancyCounter.hospital_id).limit(1)) is None and \
+                db.scalar(select(Patient.id).limit(1)) is not None:
+            logger.info("Seeded %d occupancy counters", reconcile_occupancy(db))
+    finally:
+        db.close()
+
+
+def _reconcile_loop(stop: threading.Event):
+    while not stop.wait(RECONCILE_INTERVAL):
+        db = SessionLocal()
+        try:
+            reconcile_occupancy(db)
+        except Exception:
+            logger.exception("Occupancy reconciliation failed")
+            db.rollback()
+        finally:
+            db.close()
+
+
+def start_reconciler() -> threading.Event:
+    """Start the periodic reconciliation thread if configured; set the returned event to stop it"""
+    stop = threading.Event()
+    if RECONCILE_INTERVAL > 0:
+        threading.Thread(target=_reconcile_loop, args=(stop,), daemon=True, name="occupancy-reconciler").start()
+    return stop
+
+
+if __name__ == "__main__":
+    # One-off reconciliation, e.g. from cron: python occupancy.py
+    session = SessionLocal()
+    try:
+        print(f"Reconciled {reconcile_occupancy(session)} occupancy counters")
+    finally:
+        session.close()
@@ -0,0 +1,188 @@
+import heapq
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import Hospital, OccupancyCounter, Transfer, TransferStatus, TriageLevel
+
+# Seconds a hospital snapshot is reused. Rankings may lag bed changes by this
+# much; create_transfer still checks the destination's beds authoritatively.
+SNAPSHOT_TTL = float(os.getenv("RECOMMEND_SNAPSHOT_SECONDS", "2"))
+
+# Grid cell edge in degrees (0.5 degrees is roughly 55 km north-south)
+GRID_CELL_DEGREES = 0.5
+
+# Score weights: free-bed fraction after pending inbound transfers, minus the
+# share of capacity taken by critical patients, minus distance per 100 km
+CRITICAL_LOAD_WEIGHT = 0.5
+DISTANCE_WEIGHT = 0.25
+MAX_SCORE = 1.0  # Every bed free, nothing pending, no critical patients
+
+EARTH_RADIUS_KM = 6371.0
+
+
+@dataclass
+class HospitalLoad:
+    id: int
+    name: str
+    city: str
+    latitude: float
+    longitude: float
+    capacity: int
+    available_beds: int
+    critical_patients: int
+    pending_inbound: int
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _cell(latitude: float, longitude: float):
+    return (math.floor(latitude / GRID_CELL_DEGREES), math.floor(longitude / GRID_CELL_DEGREES))
+
+
+class HospitalSnapshot:
+    """Per-hospital load figures plus a lat/lon grid over the hospitals that have coordinates"""
+
+    def __init__(self, hospitals: list):
+        self.hospitals = {hospital.id: hospital for hospital in hospitals}
+        self.grid = defaultdict(list)
+        self.unlocated = []
+        for hospital in hospitals:
+            if hospital.latitude is None or hospital.longitude is None:
+                self.unlocated.append(hospital)
+            else:
+                self.grid[_cell(hospital.latitude, hospital.longitude)].append(hospital)
+        rows = [row for row, _ in self.grid] or [0]
+        cols = [col for _, col in self.grid] or [0]
+        self.bounds = (min(rows), max(rows), min(cols), max(cols))
+        located = [abs(hospital.latitude) for cells in self.grid.values() for hospital in cells]
+        # Width of a cell where it is narrowest; slightly conservative so the
+        # ring distance below never exceeds the true great-circle distance
+        self.min_cell_km = GRID_CELL_DEGREES * 111.0 * 0.9 * math.cos(math.radians(min(max(located, default=0) + GRID_CELL_DEGREES, 89)))
+
+    def rings(self, latitude: float, longitude: float):
+        """Yield (minimum distance km, hospitals) for square rings of grid cells around a point"""
+        row, col = _cell(latitude, longitude)
+        min_row, max_row, min_col, max_col = self.bounds
+        last_ring = max(abs(row - min_row), abs(row - max_row), abs(col - min_col), abs(col - max_col))
+        for ring in range(last_ring + 1):
+            hospitals = []
+            for dr in range(-ring, ring + 1):
+                step = 1 if abs(dr) == ring else 2 * ring
+                for dc in range(-ring, ring + 1, step or 1):
+                    hospitals.extend(self.grid.get((row + dr, col + dc), ()))
+            yield max(ring - 1, 0) * self.min_cell_km, hospitals
+
+
+def load_snapshot(db: Session) -> HospitalSnapshot:
+    """Build a snapshot from hospitals, the occupancy counters and active transfers (three queries)"""
+    critical = dict(db.query(
+        OccupancyCounter.hospital_id, OccupancyCounter.patient_count
+    ).filter(OccupancyCounter.triage_level == TriageLevel.CRITICAL).all())
+    # In-progress transfers already hold a destination bed; pending ones will need one
+    inbound = dict(db.query(
+        Transfer.to_hospital_id, func.count(Transfer.id)
+    ).filter(Transfer.transfer_status == TransferStatus.PENDING).group_by(Transfer.to_hospital_id).all())
+    rows = db.query(
+        Hospital.id, Hospital.name, Hospital.city, Hospital.latitude, Hospital.longitude,
+        Hospital.capacity, Hospital.available_beds
+    ).all()
+    return HospitalSnapshot([
+        HospitalLoad(
+            id=row.id, name=row.name, city=row.city, latitude=row.latitude, longitude=row.longitude,
+            capacity=row.capacity or 0, available_beds=row.available_beds or 0,
+            critical_patients=critical.get(row.id, 0), pending_inbound=inbound.get(row.id, 0)
+        )
+        for row in rows
+    ])
+
+
+_snapshot_cache = {"expires": 0.0, "value": None}
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot(db: Session) -> HospitalSnapshot:
+    """Cached snapshot, rebuilt at most every SNAPSHOT_TTL seconds"""
+    with _snapshot_lock:
+        if _snapshot_cache["value"] is not None and _snapshot_cache["expires"] > time.monotonic():
+            return _snapshot_cache["value"]
+    snapshot = load_snapshot(db)
+    with _snapshot_lock:
+        _snapshot_cache.update(value=snapshot, expires=time.monotonic() + SNAPSHOT_TTL)
+    return snapshot
+
+
+def score_hospital(hospital: HospitalLoad, distance: float = None) -> dict:
+    capacity = max(hospital.capacity, 1)
+    effective_beds = hospital.available_beds - hospital.pending_inbound
+    critical_load = hospital.critical_patients / capacity
+    score = effective_beds / capacity - CRITICAL_LOAD_WEIGHT * critical_load
+    if distance is not None:
+        score -= DISTANCE_WEIGHT * distance / 100
+    return {
+        "hospital_id": hospital.id,
+        "hospital_name": hospital.name,
+        "city": hospital.city,
+        "score": round(score, 4),
+        "available_beds": hospital.available_beds,
+        "pending_inbound": hospital.pending_inbound,
+        "critical_patients": hospital.critical_patients,
+        "critical_load": round(critical_load, 4),
+        "distance_km": round(distance, 1) if distance is not None else None
+    }
+
+
+def rank_hospitals(snapshot: HospitalSnapshot, exclude_id: int, limit: int,
+                   max_distance_km: float = None) -> list:
+    """Best `limit` destinations with a free bed, scored against the origin hospital's location"""
+    origin = snapshot.hospitals.get(exclude_id)
+    if origin is None or origin.latitude is None or origin.longitude is None:
+        candidates = [
+            score_hospital(hospital) for hospital in snapshot.hospitals.values()
+            if hospital.id != exclude_id and hospital.available_beds > 0
+        ]
+        return heapq.nlargest(limit, candidates, key=lambda candidate: candidate["score"])
+
+    best = []  # min-heap of (score, hospital_id, candidate) holding the top `limit`
+
+    def consider(candidate):
+        entry = (candidate["score"], -candidate["hospital_id"], candidate)
+        if len(best) < limit:
+            heapq.heappush(best, entry)
+        elif entry[:2] > best[0][:2]:
+            heapq.heapreplace(best, entry)
+
+    for ring_km, hospitals in snapshot.rings(origin.latitude, origin.longitude):
+        if max_distance_km is not None and ring_km > max_distance_km:
+            break
+        # No hospital this far out can beat the current top `limit`
+        if len(best) == limit and MAX_SCORE - DISTANCE_WEIGHT * ring_km / 100 <= best[0][0]:
+            break
+        for hospital in hospitals:
+            if hospital.id == exclude_id or hospital.available_beds <= 0:
+                continue
+            distance = distance_km(origin.latitude, origin.longitude, hospital.latitude, hospital.longitude)
+            if max_distance_km is None or distance <= max_distance_km:
+                consider(score_hospital(hospital, distance))
+
+    ranked = [candidate for _, _, candidate in sorted(best, key=lambda entry: entry[:2], reverse=True)]
+
+    # Hospitals without coordinates can't be placed; they only fill out a short list
+    if max_distance_km is None and len(ranked) < limit:
+        ranked += heapq.nlargest(
+            limit - len(ranked),
+            [score_hospital(hospital) for hospital in snapshot.unlocated if hospital.available_beds > 0],
+            key=lambda candidate: candidate["score"]
+        )
+    return ranked
@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from database import get_async_db, get_async_read_db
+from models import Hospital, Patient, PatientResponse
+from routes.patients import PATIENT_LIST_FIELDS, patients_page_statement, set_next_cursor
+from routes.hospitals import hospital_stats
+from routes.dashboard import get_cached_summary, summary_response
+from serialization import FastJSONResponse, select_fields, rows_as_dicts
+from versions import async_etag_for, cache_headers
+
+# Async handlers for the read-heavy endpoints, mounted ahead of the sync
+# routers when DB_ASYNC=true so they take over the same paths. They share
+# query construction with the sync routes; only the I/O is awaited. Like the
+# sync routes, lists, stats and the dashboard may read the replica, while
+# lookups by id always read the primary.
+router = APIRouter(include_in_schema=False)
+
+
+@router.get("/patients/", response_model=List[PatientResponse], response_class=FastJSONResponse)
+async def get_patients_async(
+    skip: int = 0,
+    limit: int = 100,
+    hospital_id: Optional[int] = None,
+    triage_level: Optional[str] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    etag: str = Depends(async_etag_for("patients")),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Async variant of patients.get_patients"""
+    columns = select_fields(Patient, fields, PATIENT_LIST_FIELDS)
+    statement = patients_page_statement(skip, limit, hospital_id, triage_level, cursor, columns)
+    rows = (await db.execute(statement)).all()
+    response = FastJSONResponse(rows_as_dicts(rows, columns), headers=cache_headers(etag))
+    set_next_cursor(response, rows, limit)
+    return response
+
+
+@router.get("/patients/{patient_id:int}", response_model=PatientResponse)
+async def get_patient_async(patient_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Async variant of patients.get_patient"""
+    patient = await db.get(Patient, patient_id)
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    return patient
+
+
+@router.get("/hospitals/", response_class=FastJSONResponse)
+async def get_hospitals_async(
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[str] = None,
+    etag: str = Depends(async_etag_for("hospitals")),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Async variant of hospitals.get_hospitals"""
+    columns = select_fields(Hospital, fields)
+    rows = (await db.execute(select(*columns).offset(skip).limit(limit))).all()
+    return FastJSONResponse(rows_as_dicts(rows, columns), headers=cache_headers(etag))
+
+
+@router.get("/hospitals/{hospital_id:int}")
+async def get_hospital_async(hospital_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Async variant of hospitals.get_hospital"""
+    hospital = await db.get(Hospital, hospital_id)
+    if not hospital:
+        raise HTTPException(status_code=404, detail="Hospital not found")
+    return hospital
+
+
+@router.get("/hospitals/{hospital_id:int}/stats")
+async def get_hospital_stats_async(hospital_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """Async variant of hospitals.get_hospital_stats"""
+    return await db.run_sync(hospital_stats, hospital_id)
+
+
+@router.get("/dashboard/summary")
+async def get_dashboard_summary_async(request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    """Async variant of dashboard.get_dashboard_summary"""
+    return summary_response(request, *await db.run_sync(get_cached_summary))
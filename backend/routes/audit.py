@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from database import get_read_db
+from models import AuditEvent
+
+router = APIRouter()
+
+
+@router.get("/")
+def get_audit_events(
+    entity: Optional[str] = None,
+    entity_id: Optional[int] = None,
+    action: Optional[str] = None,
+    actor: Optional[str] = None,
+    before_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Audit trail, newest first.
+
+    Filter by entity (patient, transfer) and entity_id, action or actor.
+    Page backwards by passing the smallest id seen as before_id. Events are
+    written in the background, so the last fraction of a second may not be
+    visible yet.
+    """
+    query = db.query(AuditEvent)
+    if entity:
+        query = query.filter(AuditEvent.entity == entity)
+    if entity_id is not None:
+        query = query.filter(AuditEvent.entity_id == entity_id)
+    if action:
+        query = query.filter(AuditEvent.action == action)
+    if actor:
+        query = query.filter(AuditEvent.actor == actor)
+    if before_id is not None:
+        query = query.filter(AuditEvent.id < before_id)
+    return query.order_by(AuditEvent.id.desc()).limit(limit).all()
@@ -0,0 +1,125 @@
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case
+from datetime import datetime
+import os
+import threading
+import time
+
+from database import get_read_db
+from models import Hospital, OccupancyCounter, Transfer, TransferStatus, TriageLevel, TRIAGE_PRIORITY
+from serialization import FastJSONResponse
+from versions import COLLECTIONS, collection_versions, make_etag, check_not_modified, cache_headers
+
+router = APIRouter()
+
+# Seconds a computed summary is reused; 0 disables caching
+SUMMARY_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_SECONDS", "5"))
+
+_summary_cache = {"expires": 0.0, "value": None}
+_summary_lock = threading.Lock()
+
+
+def _compute_summary(db: Session) -> dict:
+    """Aggregate the network overview with three grouped queries"""
+    critical_count = func.sum(case(
+        (OccupancyCounter.triage_level == TriageLevel.CRITICAL, OccupancyCounter.patient_count),
+        else_=0
+    ))
+    hospital_rows = db.query(
+        Hospital.id,
+        Hospital.name,
+        Hospital.capacity,
+        Hospital.available_beds,
+        func.coalesce(func.sum(OccupancyCounter.patient_count), 0),
+        func.coalesce(critical_count, 0)
+    ).outerjoin(
+        OccupancyCounter, OccupancyCounter.hospital_id == Hospital.id
+    ).group_by(Hospital.id).order_by(Hospital.id).all()
+    
+    triage_rows = db.query(
+        OccupancyCounter.triage_level,
+        func.sum(OccupancyCounter.patient_count)
+    ).group_by(OccupancyCounter.triage_level).all()
+    
+    transfer_rows = db.query(
+        Transfer.transfer_status,
+        func.count(Transfer.id),
+        func.sum(case((Transfer.priority_rank == TRIAGE_PRIORITY[TriageLevel.CRITICAL], 1), else_=0))
+    ).filter(
+        Transfer.transfer_status.in_([TransferStatus.PENDING, TransferStatus.IN_PROGRESS])
+    ).group_by(Transfer.transfer_status).all()
+    
+    hospitals = []
+    for hospital_id, name, capacity, available_beds, patients, critical in hospital_rows:
+        occupancy_rate = (patients / capacity * 100) if capacity else 0
+        hospitals.append({
+            "hospital_id": hospital_id,
+            "hospital_name": name,
+            "total_capacity": capacity,
+            "available_beds": available_beds,
+            "current_patients": patients,
+            "critical_patients": critical,
+            "occupancy_rate": round(occupancy_rate, 2)
+        })
+    
+    total_capacity = sum(h["total_capacity"] or 0 for h in hospitals)
+    total_available = sum(h["available_beds"] or 0 for h in hospitals)
+    triage_distribution = {level.name: 0 for level in TriageLevel}
+    for level, count in triage_rows:
+        triage_distribution[level.name] = count
+    transfers = {status: (count, critical or 0) for status, count, critical in transfer_rows}
+    pending, critical_pending = transfers.get(TransferStatus.PENDING, (0, 0))
+    in_progress, _ = transfers.get(TransferStatus.IN_PROGRESS, (0, 0))
+    
+    return {
+        "total_patients": sum(triage_distribution.values()),
+        "critical_patients": triage_distribution[TriageLevel.CRITICAL.name],
+        "triage_distribution": triage_distribution,
+        "pending_transfers": pending,
+        "critical_pending_transfers": critical_pending,
+        "in_progress_transfers": in_progress,
+        "active_transfers": pending + in_progress,
+        "total_capacity": total_capacity,
+        "available_beds": total_available,
+        "network_occupancy_rate": round((total_capacity - total_available) / total_capacity * 100, 2) if total_capacity else 0,
+        "hospitals": hospitals,
+        "generated_at": datetime.utcnow().isoformat()
+    }
+
+
+def get_cached_summary(db: Session) -> tuple:
+    """(collection versions, summary) from the TTL cache, recomputed when stale (shared by the sync and async routes)
+
+    The versions are read before the summary is computed, so they never
+    claim more than the summary reflects; they label it for ETags.
+    """
+    if SUMMARY_CACHE_TTL <= 0:
+        versions = collection_versions(db, COLLECTIONS)
+        return versions, _compute_summary(db)
+    
+    with _summary_lock:
+        if _summary_cache["value"] is not None and time.monotonic() < _summary_cache["expires"]:
+            return _summary_cache["value"]
+    
+    # Compute outside the lock: under DB_ASYNC this runs on the event loop
+    # thread, where blocking on a lock held across awaited I/O would deadlock
+    versions = collection_versions(db, COLLECTIONS)
+    summary = _compute_summary(db)
+    with _summary_lock:
+        _summary_cache["value"] = (versions, summary)
+        _summary_cache["expires"] = time.monotonic() + SUMMARY_CACHE_TTL
+    return versions, summary
+
+
+def summary_response(request: Request, versions: tuple, summary: dict) -> FastJSONResponse:
+    """The summary with its ETag, or a 304 if the client already has it"""
+    etag = make_etag(request, versions)
+    check_not_modified(request, etag)
+    return FastJSONResponse(summary, headers=cache_headers(etag))
+
+
+@router.get("/summary")
+def get_dashboard_summary(request: Request, db: Session = Depends(get_read_db)):
+    """Network-wide overview for the dashboard: occupancy, triage mix and transfer load"""
+    return summary_response(request, *get_cached_summary(db))
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException
+
+from diagnostics import settings
+from models import DiagnosticsUpdate
+
+router = APIRouter()
+
+
+@router.get("/")
+def get_diagnostics():
+    """Current slow-query and profiler settings"""
+    return settings.as_dict()
+
+
+@router.put("/")
+def update_diagnostics(changes: DiagnosticsUpdate):
+    """
+    Change diagnostics settings without a restart; omitted fields keep their value.
+
+    enabled: turn the slow-query log and profiler on or off as a whole.
+    slow_query_ms: log statements slower than this (0 turns the log off).
+    profile_rate: fraction of matching requests to profile (0 turns it off).
+    profile_routes: path prefixes eligible for profiling, e.g. ["/api/transfers/"].
+    """
+    if changes.slow_query_ms is not None and changes.slow_query_ms < 0:
+        raise HTTPException(status_code=400, detail="slow_query_ms must be >= 0")
+    if changes.profile_rate is not None and not 0 <= changes.profile_rate <= 1:
+        raise HTTPException(status_code=400, detail="profile_rate must be between 0 and 1")
+    if changes.profile_interval_ms is not None and changes.profile_interval_ms <= 0:
+        raise HTTPException(status_code=400, detail="profile_interval_ms must be positive")
+    return settings.update(**changes.model_dump(exclude_none=True))
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Header, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import json
+import os
+
+from events import broker
+
+router = APIRouter()
+
+HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+
+def _format_event(event) -> str:
+    event_id, event_type, data, published_at = event
+    payload = json.dumps({**data, "published_at": published_at}, default=str)
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
+
+
+@router.get("/")
+async def stream_events(
+    request: Request,
+    types: Optional[str] = None,
+    last_event_id: Optional[str] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Server-sent events stream of transfer, hospital and patient changes.
+
+    Filter with ?types=transfer,hospital. Reconnecting clients send the
+    Last-Event-ID header (EventSource does this itself) or ?last_event_id=
+    to receive only the events they missed; if those are no longer
+    available a `reset` event tells the client to reload its data.
+    """
+    type_filter = {t.strip() for t in types.split(",") if t.strip()} if types else None
+    subscription, backlog, resumed = broker.subscribe(last_event_id_header or last_event_id, type_filter)
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            if not resumed:
+                yield f"id: {subscription.start_id}\nevent: reset\ndata: {{}}\n\n"
+            for event in backlog:
+                yield _format_event(event)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    # Fell too far behind; the client reconnects and resumes
+                    break
+                yield _format_event(event)
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
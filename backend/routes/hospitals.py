@@ -1,10 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
+from typing import List, Optional
 
-from database import get_db
-from models import Hospital, HospitalCreate, Patient
+from database import get_db, get_read_db, get_primary_read_db
+from models import Hospital, HospitalCreate, Patient, OccupancyCounter
+from hospital_cache import hospital_cache
+from events import publish
+from changelog import record_change
+from serialization import FastJSONResponse, select_fields, rows_as_dicts
+from versions import etag_for, cache_headers
 
 router = APIRouter()
 
@@ -14,20 +19,36 @@ def create_hospital(hospital: HospitalCreate, db: Session = Depends(get_db)):
     """Create a new hospital"""
     db_hospital = Hospital(**hospital.dict())
     db.add(db_hospital)
+    db.flush()
+    record_change(db, "hospital", db_hospital.id)
     db.commit()
     db.refresh(db_hospital)
+    hospital_cache.invalidate(db_hospital.id)
     return db_hospital
 
 
-@router.get("/")
-def get_hospitals(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all hospitals"""
-    hospitals = db.query(Hospital).offset(skip).limit(limit).all()
-    return hospitals
+@router.get("/", response_class=FastJSONResponse)
+def get_hospitals(
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[str] = None,
+    etag: str = Depends(etag_for("hospitals")),
+    db: Session = Depends(get_read_db)
+):
+    """Get all hospitals; `fields` (e.g. id,name,available_beds) limits the fields returned"""
+    columns = select_fields(Hospital, fields)
+    hospitals = db.query(*columns).offset(skip).limit(limit).all()
+    return FastJSONResponse(rows_as_dicts(hospitals, columns), headers=cache_headers(etag))
+
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """Hit rate and size of the in-process hospital directory cache"""
+    return hospital_cache.stats()
 
 
 @router.get("/{hospital_id}")
-def get_hospital(hospital_id: int, db: Session = Depends(get_db)):
+def get_hospital(hospital_id: int, db: Session = Depends(get_primary_read_db)):
     """Get a specific hospital"""
     hospital = db.query(Hospital).filter(Hospital.id == hospital_id).first()
     if not hospital:
@@ -35,15 +56,20 @@ def get_hospital(hospital_id: int, db: Session = Depends(get_db)):
     return hospital
 
 
-@router.get("/{hospital_id}/patients")
-def get_hospital_patients(hospital_id: int, db: Session = Depends(get_db)):
+@router.get("/{hospital_id}/patients", response_class=FastJSONResponse)
+def get_hospital_patients(
+    hospital_id: int,
+    fields: Optional[str] = None,
+    etag: str = Depends(etag_for("patients")),
+    db: Session = Depends(get_read_db)
+):
     """Get all patients in a hospital"""
-    hospital = db.query(Hospital).filter(Hospital.id == hospital_id).first()
-    if not hospital:
+    if not hospital_cache.get(db, hospital_id):
         raise HTTPException(status_code=404, detail="Hospital not found")
 
-    patients = db.query(Patient).filter(Patient.hospital_id == hospital_id).all()
-    return patients
+    columns = select_fields(Patient, fields)
+    patients = db.query(*columns).filter(Patient.hospital_id == hospital_id).all()
+    return FastJSONResponse(rows_as_dicts(patients, columns), headers=cache_headers(etag))
 
 
 @router.put("/{hospital_id}/capacity")
@@ -62,30 +88,49 @@ def update_capacity(
             status_code=400,
             detail="Available beds cannot exceed total capacity"
         )
+    if available_beds < 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Available beds cannot be negative"
+        )
 
+    beds_delta = available_beds - hospital.available_beds
     hospital.available_beds = available_beds
+    record_change(db, "hospital", hospital_id)
     db.commit()
+    hospital_cache.invalidate(hospital_id)
+    publish("hospital.capacity_updated", hospital_id=hospital_id, available_beds=available_beds, beds_delta=beds_delta)
     return {"message": "Capacity updated", "available_beds": available_beds}
 
 
-@router.get("/{hospital_id}/stats")
-def get_hospital_stats(hospital_id: int, db: Session = Depends(get_db)):
-    """Get hospital statistics"""
-    hospital = db.query(Hospital).filter(Hospital.id == hospital_id).first()
+def hospital_stats(db: Session, hospital_id: int) -> dict:
+    """Occupancy summary for one hospital (shared by the sync and async routes)"""
+    hospital = hospital_cache.get(db, hospital_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
 
-    total_patients = db.query(func.count(Patient.id)).filter(
-        Patient.hospital_id == hospital_id
-    ).scalar()
+    # Bed count stays authoritative: read it with the counters in one query
+    total_patients_subquery = db.query(
+        func.coalesce(func.sum(OccupancyCounter.patient_count), 0)
+    ).filter(OccupancyCounter.hospital_id == hospital_id).scalar_subquery()
+    available_beds, total_patients = db.query(
+        Hospital.available_beds, total_patients_subquery
+    ).filter(Hospital.id == hospital_id).one()
 
-    occupancy_rate = (total_patients / hospital.capacity * 100) if hospital.capacity > 0 else 0
+    capacity = hospital["capacity"]
+    occupancy_rate = (total_patients / capacity * 100) if capacity > 0 else 0
 
     return {
         "hospital_id": hospital_id,
-        "hospital_name": hospital.name,
-        "total_capacity": hospital.capacity,
-        "available_beds": hospital.available_beds,
+        "hospital_name": hospital["name"],
+        "total_capacity": capacity,
+        "available_beds": available_beds,
         "current_patients": total_patients,
         "occupancy_rate": round(occupancy_rate, 2)
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/{hospital_id}/stats")
+def get_hospital_stats(hospital_id: int, db: Session = Depends(get_read_db)):
+    """Get hospital statistics"""
+    return hospital_stats(db, hospital_id)
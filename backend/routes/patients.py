@@ -1,11 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, tuple_, select, insert
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from datetime import datetime
+import base64
+import json
+from collections import Counter
 
-from database import get_db
-from models import Patient, PatientCreate, PatientResponse, TriageLevel, Hospital
+from database import get_db, get_read_db, get_primary_read_db, read_sessionmaker
+from beds import reserve_bed, reserve_beds, release_bed
+from export import stream_export
+from occupancy import adjust_occupancy, adjust_occupancy_many
+from events import publish
+from changelog import record_change, record_changes
+from audit import record_audit
+from search import search_patients
+from serialization import FastJSONResponse, select_fields, with_columns, rows_as_dicts
+from versions import etag_for, cache_headers
+from models import (
+    Patient, PatientCreate, PatientResponse, PatientSearchResult, TriageLevel, Hospital, OccupancyCounter,
+    TRIAGE_PRIORITY, UNTRIAGED_PRIORITY
+)
 
 router = APIRouter()
 
@@ -17,17 +35,6 @@ def create_patient(patient: PatientCreate, db: Session = Depends(get_db)):
     if existing:
         raise HTTPException(status_code=400, detail="Patient with this MRN already exists")
     
-    # Validate hospital exists and has capacity
-    hospital = db.query(Hospital).filter(Hospital.id == patient.hospital_id).first()
-    if not hospital:
-        raise HTTPException(status_code=404, detail="Hospital not found")
-    
-    if hospital.available_beds <= 0:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Hospital '{hospital.name}' has no available beds. Current capacity: {hospital.capacity - hospital.available_beds}/{hospital.capacity}"
-        )
-    
     # Validate triage level
     try:
         triage = TriageLevel[patient.triage_level.upper()]
@@ -37,54 +44,315 @@ def create_patient(patient: PatientCreate, db: Session = Depends(get_db)):
             detail=f"Invalid triage level. Must be one of: {', '.join([t.name for t in TriageLevel])}"
         )
     
+    # Atomically take a bed; only look the hospital up to explain a failure
+    if not reserve_bed(db, patient.hospital_id):
+        db.rollback()
+        # Read fresh rather than from the directory cache, whose bed counts may be stale
+        hospital = db.query(Hospital.name, Hospital.capacity, Hospital.available_beds).filter(
+            Hospital.id == patient.hospital_id
+        ).first()
+        if not hospital:
+            raise HTTPException(status_code=404, detail="Hospital not found")
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Hospital '{hospital.name}' has no available beds. Current capacity: {hospital.capacity - hospital.available_beds}/{hospital.capacity}"
+        )
+    
     # Create patient
     db_patient = Patient(**patient.dict())
     db_patient.triage_level = triage
     
-    # Reduce hospital bed count
-    hospital.available_beds -= 1
-    
     db.add(db_patient)
-    db.commit()
+    adjust_occupancy(db, patient.hospital_id, triage, 1)
+    try:
+        db.flush()
+        record_change(db, "patient", db_patient.id)
+        db.commit()
+    except IntegrityError:
+        # A concurrent admission claimed the MRN; the bed is returned by the rollback
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Patient with this MRN already exists")
     db.refresh(db_patient)
+    publish(
+        "patient.admitted", id=db_patient.id, hospital_id=db_patient.hospital_id,
+        triage_level=triage.name, beds_delta=-1
+    )
     
     return db_patient
 
-@router.get("/", response_model=List[PatientResponse])
+BULK_MAX_ROWS = 50000
+MRN_LOOKUP_CHUNK = 500  # Stay well under SQLite's bound-parameter limit
+_INVALID_JSON = object()
+
+async def _read_bulk_rows(request: Request) -> list:
+    """Parse a JSON array body, or an NDJSON body line by line as it streams in"""
+    if "ndjson" in request.headers.get("content-type", ""):
+        rows, buffer = [], b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            rows.extend(lines)
+            if len(rows) > BULK_MAX_ROWS:
+                break
+        rows.append(buffer)
+        items = []
+        for line in rows:
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                # Keep the row so it is reported with its position
+                items.append(_INVALID_JSON)
+    else:
+        try:
+            items = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    
+    if len(items) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ROWS} patients per request")
+    return items
+
+def _admit_bulk(items: list, db: Session) -> dict:
+    """Validate and insert a batch of admissions in a single transaction"""
+    results = [None] * len(items)
+    valid = []  # (index, PatientCreate, TriageLevel)
+    
+    def reject(index, mrn, detail):
+        results[index] = {"index": index, "mrn": mrn, "status": "rejected", "detail": detail}
+    
+    # 1. Per-row schema and triage validation, plus duplicates within the batch
+    seen_mrns = set()
+    for index, item in enumerate(items):
+        mrn = item.get("mrn") if isinstance(item, dict) else None
+        if item is _INVALID_JSON:
+            reject(index, None, "Invalid JSON")
+            continue
+        try:
+            patient = PatientCreate.model_validate(item)
+        except ValidationError as e:
+            reject(index, mrn, "; ".join(
+                f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}" for err in e.errors()
+            ))
+            continue
+        try:
+            triage = TriageLevel[patient.triage_level.upper()]
+        except KeyError:
+            reject(index, mrn, f"Invalid triage level. Must be one of: {', '.join([t.name for t in TriageLevel])}")
+            continue
+        if patient.mrn in seen_mrns:
+            reject(index, mrn, "Duplicate MRN within request")
+            continue
+        seen_mrns.add(patient.mrn)
+        valid.append((index, patient, triage))
+    
+    # 2. MRN uniqueness against the table with chunked IN queries
+    mrns = [patient.mrn for _, patient, _ in valid]
+    existing = set()
+    for start in range(0, len(mrns), MRN_LOOKUP_CHUNK):
+        existing.update(db.scalars(
+            select(Patient.mrn).where(Patient.mrn.in_(mrns[start:start + MRN_LOOKUP_CHUNK]))
+        ))
+    
+    # 3. Resolve every referenced hospital in one query
+    hospital_ids = {patient.hospital_id for _, patient, _ in valid}
+    available = dict(db.execute(
+        select(Hospital.id, Hospital.available_beds).where(Hospital.id.in_(hospital_ids))
+    ).all()) if hospital_ids else {}
+    
+    by_hospital = {}
+    for index, patient, triage in valid:
+        if patient.mrn in existing:
+            reject(index, patient.mrn, "Patient with this MRN already exists")
+        elif patient.hospital_id not in available:
+            reject(index, patient.mrn, "Hospital not found")
+        else:
+            by_hospital.setdefault(patient.hospital_id, []).append((index, patient, triage))
+    
+    # 4. Reserve beds per hospital in one conditional UPDATE each; rows past
+    #    the free capacity are rejected in request order
+    admitted = []
+    for hospital_id, rows in by_hospital.items():
+        granted = min(len(rows), available[hospital_id] or 0)
+        while granted > 0 and not reserve_beds(db, hospital_id, granted):
+            # Beds were taken concurrently since the snapshot; retry with the current count
+            granted = min(granted, db.scalar(
+                select(Hospital.available_beds).where(Hospital.id == hospital_id)
+            ) or 0)
+        admitted.extend(rows[:granted])
+        for index, patient, _ in rows[granted:]:
+            reject(index, patient.mrn, "Hospital has no available beds")
+    
+    # 5. One multi-row INSERT for every admitted patient
+    admitted.sort(key=lambda row: row[0])
+    if admitted:
+        # Ids are matched back by MRN (unique within the batch): asking for RETURNING in parameter
+        # order makes SQLite fall back to one INSERT per row
+        ids = dict(db.execute(
+            insert(Patient).returning(Patient.mrn, Patient.id),
+            [{**patient.dict(), "triage_level": triage, "triage_rank": TRIAGE_PRIORITY[triage]}
+             for _, patient, triage in admitted]
+        ).all())
+        inserted = [ids[patient.mrn] for _, patient, _ in admitted]
+        for (index, patient, _), patient_id in zip(admitted, inserted):
+            results[index] = {"index": index, "mrn": patient.mrn, "status": "created", "id": patient_id}
+        adjust_occupancy_many(db, Counter((patient.hospital_id, triage) for _, patient, triage in admitted))
+        record_changes(db, "patient", inserted)
+    
+    try:
+        db.commit()
+    except IntegrityError:
+        # An MRN was claimed concurrently; nothing from this batch was written
+        db.rollback()
+        raise HTTPException(status_code=409, detail="An MRN in this batch was admitted concurrently, please retry")
+    if admitted:
+        # One summary event per batch rather than one per row
+        per_hospital = Counter(patient.hospital_id for _, patient, _ in admitted)
+        publish(
+            "patient.bulk_admitted", admitted=len(admitted),
+            hospitals=[{"hospital_id": hospital_id, "beds_delta": -count} for hospital_id, count in per_hospital.items()]
+        )
+    
+    return {
+        "admitted": len(admitted),
+        "rejected": len(items) - len(admitted),
+        "results": results
+    }
+
+@router.post("/bulk")
+async def create_patients_bulk(request: Request, db: Session = Depends(get_db)):
+    """Admit many patients at once from a JSON array or NDJSON body.
+
+    Rows are validated together and all valid rows are inserted in a single
+    transaction; each row's outcome is reported by its position in the body.
+    """
+    items = await _read_bulk_rows(request)
+    return await run_in_threadpool(_admit_bulk, items, db)
+
+def _encode_cursor(patient: Patient) -> str:
+    """Build an opaque cursor pointing just past the given patient"""
+    key = [
+        TRIAGE_PRIORITY.get(patient.triage_level, UNTRIAGED_PRIORITY),
+        patient.admission_date.isoformat(),
+        patient.id
+    ]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def _decode_cursor(cursor: str):
+    """Parse a cursor produced by _encode_cursor into its sort key"""
+    try:
+        priority, admission_date, patient_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(priority), datetime.fromisoformat(admission_date), int(patient_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+# Fields of the default patient list response, and the columns its cursor needs
+PATIENT_LIST_FIELDS = list(PatientResponse.model_fields)
+CURSOR_COLUMNS = [Patient.__table__.c.triage_level, Patient.__table__.c.admission_date, Patient.__table__.c.id]
+
+def patients_page_statement(skip, limit, hospital_id, triage_level, cursor, columns):
+    """SELECT of `columns` for one triage-ordered page of patients (shared by the sync and async routes)"""
+    statement = select(*with_columns(columns, CURSOR_COLUMNS))
+    
+    if hospital_id:
+        statement = statement.where(Patient.hospital_id == hospital_id)
+    if triage_level:
+        try:
+            triage = TriageLevel[triage_level.upper()]
+            statement = statement.where(Patient.triage_rank == TRIAGE_PRIORITY[triage])
+        except KeyError:
+            raise HTTPException(status_code=400, detail="Invalid triage level")
+    
+    # Sort by triage priority (CRITICAL first), oldest admission first
+    sort_key = (Patient.triage_rank, Patient.admission_date, Patient.id)
+    statement = statement.order_by(*sort_key)
+    
+    if cursor:
+        statement = statement.where(tuple_(*sort_key) > tuple_(*_decode_cursor(cursor)))
+    else:
+        statement = statement.offset(skip)
+    
+    return statement.limit(limit)
+
+def set_next_cursor(response: Response, patients: list, limit: int):
+    """Advertise the cursor for the next page when this page is full"""
+    if patients and len(patients) == limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(patients[-1])
+
+@router.get("/", response_model=List[PatientResponse], response_class=FastJSONResponse)
 def get_patients(
     skip: int = 0,
     limit: int = 100,
     hospital_id: Optional[int] = None,
     triage_level: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    etag: str = Depends(etag_for("patients")),
+    db: Session = Depends(get_read_db)
 ):
-    """Get all patients with optional filters, sorted by triage priority"""
-    query = db.query(Patient)
+    """Get all patients with optional filters, sorted by triage priority.
+
+    Pass the X-Next-Cursor header of a full page back as `cursor` to fetch
+    the next page by keyset instead of offset. `fields` (e.g.
+    id,mrn,triage_level) limits each patient to those fields. Send the
+    ETag back as If-None-Match to get a 304 while no patient has changed.
+    """
+    columns = select_fields(Patient, fields, PATIENT_LIST_FIELDS)
+    statement = patients_page_statement(skip, limit, hospital_id, triage_level, cursor, columns)
+    rows = db.execute(statement).all()
+    response = FastJSONResponse(rows_as_dicts(rows, columns), headers=cache_headers(etag))
+    set_next_cursor(response, rows, limit)
+    return response
+
+@router.get("/export")
+def export_patients(
+    request: Request,
+    format: str = "ndjson",
+    hospital_id: Optional[int] = None,
+    triage_level: Optional[str] = None
+):
+    """Stream every matching patient as NDJSON or CSV for bulk extracts"""
+    statement = select(*Patient.__table__.columns).order_by(Patient.id)
     
     if hospital_id:
-        query = query.filter(Patient.hospital_id == hospital_id)
+        statement = statement.where(Patient.hospital_id == hospital_id)
     if triage_level:
         try:
-            triage = TriageLevel[triage_level.upper()]
-            query = query.filter(Patient.triage_level == triage)
+            statement = statement.where(Patient.triage_level == TriageLevel[triage_level.upper()])
         except KeyError:
             raise HTTPException(status_code=400, detail="Invalid triage level")
     
-    # Sort by triage priority (CRITICAL first)
-    triage_order = {
-        TriageLevel.CRITICAL: 1,
-        TriageLevel.URGENT: 2,
-        TriageLevel.SEMI_URGENT: 3,
-        TriageLevel.NON_URGENT: 4
+    return stream_export(statement, format, "patients", read_sessionmaker(request))
+
+@router.get("/search", response_model=List[PatientSearchResult])
+def search(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    fuzzy: bool = True,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Search patients by name, MRN, diagnosis, allergies or history.
+
+    Every word matches as a prefix ("smi joh" finds John Smith), best matches
+    first. With fuzzy=true, near spellings of names ("jonh") fill out the
+    results when prefix matches run short.
+    """
+    ranked = search_patients(db, q, limit, fuzzy)
+    patients = {
+        patient.id: patient
+        for patient in db.query(Patient).filter(Patient.id.in_([row_id for row_id, _, _ in ranked]))
     }
-    
-    patients = query.offset(skip).limit(limit).all()
-    patients.sort(key=lambda p: triage_order.get(p.triage_level, 999))
-    
-    return patients
+    return [
+        {**PatientResponse.model_validate(patients[row_id]).model_dump(), "match": match, "score": round(score, 4)}
+        for row_id, score, match in ranked if row_id in patients
+    ]
 
 @router.get("/{patient_id}", response_model=PatientResponse)
-def get_patient(patient_id: int, db: Session = Depends(get_db)):
+def get_patient(patient_id: int, db: Session = Depends(get_primary_read_db)):
     """Get a specific patient by ID"""
     patient = db.query(Patient).filter(Patient.id == patient_id).first()
     if not patient:
@@ -92,7 +360,7 @@ def get_patient(patient_id: int, db: Session = Depends(get_db)):
     return patient
 
 @router.get("/mrn/{mrn}", response_model=PatientResponse)
-def get_patient_by_mrn(mrn: str, db: Session = Depends(get_db)):
+def get_patient_by_mrn(mrn: str, db: Session = Depends(get_primary_read_db)):
     """Get a patient by Medical Record Number"""
     patient = db.query(Patient).filter(Patient.mrn == mrn).first()
     if not patient:
@@ -122,9 +390,17 @@ def update_triage(
     
     old_triage = patient.triage_level
     patient.triage_level = new_triage
+    if new_triage != old_triage:
+        adjust_occupancy(db, patient.hospital_id, old_triage, -1)
+        adjust_occupancy(db, patient.hospital_id, new_triage, 1)
     patient.updated_at = datetime.utcnow()
+    record_change(db, "patient", patient_id)
     
     db.commit()
+    record_audit(
+        "patient.triage_updated", "patient", patient_id, actor=updated_by,
+        old_triage=old_triage.name if old_triage else None, new_triage=new_triage.name
+    )
     
     return {
         "message": "Triage level updated",
@@ -147,9 +423,9 @@ def discharge_patient(
         raise HTTPException(status_code=404, detail="Patient not found")
     
     # Free up the bed in the hospital
-    hospital = db.query(Hospital).filter(Hospital.id == patient.hospital_id).first()
-    if hospital:
-        hospital.available_beds += 1
+    if patient.hospital_id:
+        release_bed(db, patient.hospital_id)
+        adjust_occupancy(db, patient.hospital_id, patient.triage_level, -1)
     
     patient_info = {
         "mrn": patient.mrn,
@@ -160,7 +436,16 @@ def discharge_patient(
     }
     
     db.delete(patient)
+    record_change(db, "patient", patient_id, "delete")
     db.commit()
+    record_audit(
+        "patient.discharged", "patient", patient_id, actor=discharged_by,
+        mrn=patient_info["mrn"], hospital_id=patient_info["hospital_id"]
+    )
+    publish(
+        "patient.discharged", id=patient_id, hospital_id=patient_info["hospital_id"],
+        beds_delta=1 if patient_info["hospital_id"] else 0
+    )
     
     return {
         "message": "Patient discharged successfully",
@@ -168,23 +453,30 @@ def discharge_patient(
     }
 
 @router.get("/stats/triage-distribution")
-def get_triage_stats(db: Session = Depends(get_db)):
-    """Get distribution of patients by triage level"""
+def get_triage_stats(db: Session = Depends(get_read_db)):
+    """Get distribution of patients by triage level (from maintained counters)"""
     stats = db.query(
-        Patient.triage_level,
-        func.count(Patient.id).label('count')
-    ).group_by(Patient.triage_level).all()
+        OccupancyCounter.triage_level,
+        func.sum(OccupancyCounter.patient_count).label('count')
+    ).group_by(OccupancyCounter.triage_level).having(
+        func.sum(OccupancyCounter.patient_count) > 0
+    ).all()
     
     return [{"triage_level": str(s[0]), "count": s[1]} for s in stats]
 
-@router.get("/critical/list")
-def get_critical_patients(db: Session = Depends(get_db)):
+@router.get("/critical/list", response_class=FastJSONResponse)
+def get_critical_patients(
+    fields: Optional[str] = None,
+    etag: str = Depends(etag_for("patients")),
+    db: Session = Depends(get_read_db)
+):
     """Get all critical patients - priority view"""
-    critical_patients = db.query(Patient).filter(
-        Patient.triage_level == TriageLevel.CRITICAL
+    columns = select_fields(Patient, fields)
+    critical_patients = db.query(*columns).filter(
+        Patient.triage_rank == TRIAGE_PRIORITY[TriageLevel.CRITICAL]
     ).all()
     
-    return {
+    return FastJSONResponse({
         "count": len(critical_patients),
-        "patients": critical_patients
-    }
+        "patients": rows_as_dicts(critical_patients, columns)
+    }, headers=cache_headers(etag))
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from datetime import datetime, timedelta
+import os
+
+from database import get_primary_read_db
+from models import ChangeLogEntry
+from changelog import ENTITY_MODELS
+
+router = APIRouter()
+
+# On PostgreSQL, concurrent transactions can commit change_log ids out of order;
+# holding back entries younger than this keeps a cursor from skipping one that
+# commits late. SQLite serializes writers, so the default is no delay.
+SYNC_SETTLE_SECONDS = float(os.getenv("SYNC_SETTLE_SECONDS", "0"))
+SYNC_LOOKUP_CHUNK = 500  # Stay well under SQLite's bound-parameter limit
+
+
+@router.get("/")
+def sync_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_primary_read_db)
+):
+    """
+    Rows created, modified or deleted after the `since` cursor.
+
+    Start with since=0 for a full download, then pass back the returned
+    cursor. Each record appears once, in its current state; deleted records
+    are listed by id, and so are transfers moved to the archive (still
+    readable at /api/transfers/{id}). Keep calling while has_more is true.
+    """
+    query = select(ChangeLogEntry).where(ChangeLogEntry.id > since)
+    if SYNC_SETTLE_SECONDS > 0:
+        query = query.where(ChangeLogEntry.changed_at <= datetime.utcnow() - timedelta(seconds=SYNC_SETTLE_SECONDS))
+    entries = db.execute(query.order_by(ChangeLogEntry.id).limit(limit + 1)).scalars().all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # The latest entry per record wins
+    latest = {}
+    for entry in entries:
+        latest[(entry.entity, entry.entity_id)] = entry.operation
+
+    changes = {}
+    deleted = {}
+    archived = {}
+    for entity, model in ENTITY_MODELS.items():
+        upserted_ids = [entity_id for (kind, entity_id), op in latest.items() if kind == entity and op == "upsert"]
+        rows = []
+        for start in range(0, len(upserted_ids), SYNC_LOOKUP_CHUNK):
+            chunk = upserted_ids[start:start + SYNC_LOOKUP_CHUNK]
+            rows.extend(db.query(model).filter(model.id.in_(chunk)).all())
+        rows.sort(key=lambda row: row.id)
+        # A record deleted after its logged upsert is reported as deleted
+        found = {row.id for row in rows}
+        changes[f"{entity}s"] = rows
+        deleted[f"{entity}s"] = sorted(
+            [entity_id for (kind, entity_id), op in latest.items() if kind == entity and op == "delete"] +
+            [entity_id for entity_id in upserted_ids if entity_id not in found]
+        )
+        archived[f"{entity}s"] = sorted(
+            entity_id for (kind, entity_id), op in latest.items() if kind == entity and op == "archive"
+        )
+
+    return {
+        "cursor": entries[-1].id if entries else since,
+        "has_more": has_more,
+        **changes,
+        "deleted": deleted,
+        "archived": archived
+    }
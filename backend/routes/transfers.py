@@ -1,22 +1,74 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session, aliased, joinedload
+from sqlalchemy import or_, and_, func, literal, select, union_all
 from typing import List, Optional
 from datetime import datetime
+from collections import Counter, defaultdict
 
-from database import get_db
-from models import Transfer, TransferCreate, TransferStatus, Patient, Hospital, TriageLevel
+from database import get_db, get_read_db, get_primary_read_db, read_sessionmaker
+from models import Transfer, ArchivedTransfer, TransferCreate, TransferBatchStatusUpdate, TransferStatus, Patient, Hospital, TriageLevel, TRIAGE_PRIORITY, AuditEvent
+from dispatch_queue import dispatch_queue, DISPATCH_QUEUE_ENABLED
+from beds import reserve_bed, release_bed, adjust_beds
+from export import stream_export
+from occupancy import adjust_occupancy, adjust_occupancy_many
+from hospital_cache import hospital_cache
+from events import publish
+from changelog import record_change, record_changes
+from audit import record_audit, add_transfer_note
+from recommend import get_snapshot, rank_hospitals
+from serialization import FastJSONResponse, select_fields, rows_as_dicts, with_columns
+from archive import archive_columns
+from versions import etag_for, cache_headers
 
 router = APIRouter()
 
+# Status workflow enforced for every status change
+VALID_TRANSITIONS = {
+    TransferStatus.PENDING: [TransferStatus.IN_PROGRESS, TransferStatus.CANCELLED],
+    TransferStatus.IN_PROGRESS: [TransferStatus.COMPLETED, TransferStatus.CANCELLED],
+    TransferStatus.COMPLETED: [],  # Cannot change from completed
+    TransferStatus.CANCELLED: []   # Cannot change from cancelled
+}
+
+BATCH_STATUS_MAX_ITEMS = 1000
+
+def _transfer_event(transfer: Transfer, beds=None) -> dict:
+    """Event payload for a transfer change; beds lists per-hospital bed deltas"""
+    return {
+        "id": transfer.id,
+        "patient_id": transfer.patient_id,
+        "from_hospital_id": transfer.from_hospital_id,
+        "to_hospital_id": transfer.to_hospital_id,
+        "status": transfer.transfer_status.name,
+        "priority": transfer.priority.name if transfer.priority else None,
+        "beds": [{"hospital_id": hospital_id, "beds_delta": delta} for hospital_id, delta in (beds or {}).items() if delta]
+    }
+
 @router.post("/", status_code=201)
 def create_transfer(transfer: TransferCreate, db: Session = Depends(get_db)):
     """Create a new transfer request with full validation"""
     
+    # Hospital metadata comes from the directory cache; the patient, the destination's
+    # bed count (always read from the database) and any active transfer in one query
+    from_hosp = hospital_cache.get(db, transfer.from_hospital_id)
+    to_hosp = hospital_cache.get(db, transfer.to_hospital_id)
+    active_alias = aliased(Transfer)
+    row = db.query(Patient, Hospital.available_beds, active_alias.id, active_alias.transfer_status).select_from(
+        Patient
+    ).outerjoin(
+        Hospital, Hospital.id == transfer.to_hospital_id
+    ).outerjoin(
+        active_alias,
+        and_(
+            active_alias.patient_id == Patient.id,
+            active_alias.transfer_status.in_([TransferStatus.PENDING, TransferStatus.IN_PROGRESS])
+        )
+    ).filter(Patient.id == transfer.patient_id).first()
+    
     # 1. Validate patient exists and belongs to source hospital
-    patient = db.query(Patient).filter(Patient.id == transfer.patient_id).first()
-    if not patient:
+    if not row:
         raise HTTPException(status_code=404, detail="Patient not found")
+    patient, to_available_beds, active_id, active_status = row
     
     if patient.hospital_id != transfer.from_hospital_id:
         raise HTTPException(
@@ -25,10 +77,7 @@ def create_transfer(transfer: TransferCreate, db: Session = Depends(get_db)):
         )
     
     # 2. Validate hospitals exist
-    from_hosp = db.query(Hospital).filter(Hospital.id == transfer.from_hospital_id).first()
-    to_hosp = db.query(Hospital).filter(Hospital.id == transfer.to_hospital_id).first()
-    
-    if not from_hosp or not to_hosp:
+    if not from_hosp or not to_hosp or to_available_beds is None:
         raise HTTPException(status_code=404, detail="One or both hospitals not found")
     
     # 3. Validate different hospitals
@@ -39,25 +88,17 @@ def create_transfer(transfer: TransferCreate, db: Session = Depends(get_db)):
         )
     
     # 4. Check if destination hospital has capacity
-    if to_hosp.available_beds <= 0:
+    if to_available_beds <= 0:
         raise HTTPException(
             status_code=400,
-            detail=f"Destination hospital '{to_hosp.name}' has no available beds. Capacity: {to_hosp.capacity - to_hosp.available_beds}/{to_hosp.capacity}"
+            detail=f"Destination hospital '{to_hosp['name']}' has no available beds. Capacity: {to_hosp['capacity'] - to_available_beds}/{to_hosp['capacity']}"
         )
     
     # 5. Check for pending transfers for this patient
-    existing_transfer = db.query(Transfer).filter(
-        Transfer.patient_id == transfer.patient_id,
-        or_(
-            Transfer.transfer_status == TransferStatus.PENDING,
-            Transfer.transfer_status == TransferStatus.IN_PROGRESS
-        )
-    ).first()
-    
-    if existing_transfer:
+    if active_id:
         raise HTTPException(
             status_code=400,
-            detail=f"Patient already has an active transfer (ID: {existing_transfer.id}, Status: {existing_transfer.transfer_status})"
+            detail=f"Patient already has an active transfer (ID: {active_id}, Status: {active_status})"
         )
     
     # 6. Validate priority level
@@ -74,66 +115,182 @@ def create_transfer(transfer: TransferCreate, db: Session = Depends(get_db)):
     db_transfer.priority = priority
     db_transfer.transfer_status = TransferStatus.PENDING
     
+    message = f"Transfer request created. Patient will be moved from {from_hosp['name']} to {to_hosp['name']}"
+    
     db.add(db_transfer)
+    db.flush()
+    record_change(db, "transfer", db_transfer.id)
     db.commit()
     db.refresh(db_transfer)
+    dispatch_queue.push(db_transfer)
+    publish("transfer.created", **_transfer_event(db_transfer))
+    record_audit(
+        "transfer.created", "transfer", db_transfer.id, actor=transfer.requested_by,
+        patient_id=transfer.patient_id, from_hospital_id=transfer.from_hospital_id,
+        to_hospital_id=transfer.to_hospital_id, priority=priority.name
+    )
     
     return {
         "transfer": db_transfer,
-        "message": f"Transfer request created. Patient will be moved from {from_hosp.name} to {to_hosp.name}",
-        "destination_available_beds": to_hosp.available_beds
+        "message": message,
+        "destination_available_beds": to_available_beds
     }
 
-@router.get("/")
-def get_transfers(
-    status: Optional[str] = None,
-    hospital_id: Optional[int] = None,
-    priority: Optional[str] = None,
-    db: Session = Depends(get_db)
-):
-    """Get all transfers with optional filters, sorted by priority"""
-    query = db.query(Transfer)
-    
+def _transfer_filters(model, status: Optional[str], hospital_id: Optional[int], priority: Optional[str] = None) -> list:
+    """WHERE criteria for the transfer list and export, for Transfer or ArchivedTransfer"""
+    criteria = []
     if status:
         try:
-            query = query.filter(Transfer.transfer_status == TransferStatus[status.upper()])
+            criteria.append(model.transfer_status == TransferStatus[status.upper()])
         except KeyError:
             raise HTTPException(status_code=400, detail="Invalid status")
     
     if hospital_id:
-        query = query.filter(
+        criteria.append(
             or_(
-                Transfer.from_hospital_id == hospital_id,
-                Transfer.to_hospital_id == hospital_id
+                model.from_hospital_id == hospital_id,
+                model.to_hospital_id == hospital_id
             )
         )
     
     if priority:
         try:
-            query = query.filter(Transfer.priority == TriageLevel[priority.upper()])
+            criteria.append(model.priority == TriageLevel[priority.upper()])
         except KeyError:
             raise HTTPException(status_code=400, detail="Invalid priority")
+    return criteria
+
+def _with_archive(statement, columns: list, criteria: list):
+    """statement UNION ALL the same columns of matching archived transfers"""
+    return union_all(statement, select(*archive_columns(columns)).where(*criteria))
+
+@router.get("/", response_class=FastJSONResponse)
+def get_transfers(
+    status: Optional[str] = None,
+    hospital_id: Optional[int] = None,
+    priority: Optional[str] = None,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    fields: Optional[str] = None,
+    include_archived: bool = False,
+    etag: str = Depends(etag_for("transfers")),
+    db: Session = Depends(get_read_db)
+):
+    """Get all transfers with optional filters, sorted by priority.
+
+    `fields` (e.g. id,patient_id,transfer_status) limits the fields returned.
+    `include_archived` adds closed transfers moved to the archive.
+    """
+    columns = select_fields(Transfer, fields)
+    sort_columns = [Transfer.priority_rank, Transfer.requested_at]
+    criteria = _transfer_filters(Transfer, status, hospital_id, priority)
     
     # Sort by priority (CRITICAL first) and then by requested time
-    transfers = query.all()
-    priority_order = {
-        TriageLevel.CRITICAL: 1,
-        TriageLevel.URGENT: 2,
-        TriageLevel.SEMI_URGENT: 3,
-        TriageLevel.NON_URGENT: 4
-    }
-    transfers.sort(key=lambda t: (priority_order.get(t.priority, 999), t.requested_at))
+    if include_archived:
+        # A UNION can only be ordered by selected columns; rows_as_dicts drops the extras
+        selected = with_columns(columns, sort_columns)
+        statement = _with_archive(
+            select(*selected).where(*criteria), selected,
+            _transfer_filters(ArchivedTransfer, status, hospital_id, priority)
+        )
+        statement = statement.order_by(*[statement.selected_columns[column.name] for column in sort_columns])
+    else:
+        statement = select(*columns).where(*criteria).order_by(*sort_columns)
+    statement = statement.offset(skip)
+    if limit is not None:
+        statement = statement.limit(limit)
+    transfers = db.execute(statement).all()
+    
+    return FastJSONResponse(rows_as_dicts(transfers, columns), headers=cache_headers(etag))
+
+@router.get("/export")
+def export_transfers(
+    request: Request,
+    format: str = "ndjson",
+    status: Optional[str] = None,
+    hospital_id: Optional[int] = None,
+    include_archived: bool = False
+):
+    """Stream every matching transfer as NDJSON or CSV for bulk extracts"""
+    columns = list(Transfer.__table__.columns)
+    statement = select(*columns).where(*_transfer_filters(Transfer, status, hospital_id))
+    
+    if include_archived:
+        statement = _with_archive(statement, columns, _transfer_filters(ArchivedTransfer, status, hospital_id))
+        statement = statement.order_by(statement.selected_columns.id)
+    else:
+        statement = statement.order_by(Transfer.id)
     
-    return transfers
+    return stream_export(statement, format, "transfers", read_sessionmaker(request))
+
+@router.get("/recommend")
+def recommend_destinations(
+    patient_id: int,
+    limit: int = Query(5, ge=1, le=50),
+    max_distance_km: Optional[float] = Query(None, gt=0),
+    db: Session = Depends(get_primary_read_db)
+):
+    """
+    Rank destination hospitals for a patient's transfer.
+    
+    Hospitals with a free bed are scored on free beds left after pending
+    inbound transfers, critical-patient load and (when both hospitals have
+    coordinates) distance from the patient's current hospital. Figures come
+    from a snapshot refreshed every few seconds.
+    """
+    patient = db.query(Patient.id, Patient.hospital_id).filter(Patient.id == patient_id).first()
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    
+    snapshot = get_snapshot(db)
+    return {
+        "patient_id": patient_id,
+        "from_hospital_id": patient.hospital_id,
+        "recommendations": rank_hospitals(snapshot, patient.hospital_id, limit, max_distance_km)
+    }
 
 @router.get("/{transfer_id}")
-def get_transfer(transfer_id: int, db: Session = Depends(get_db)):
-    """Get a specific transfer"""
-    transfer = db.query(Transfer).filter(Transfer.id == transfer_id).first()
+def get_transfer(transfer_id: int, db: Session = Depends(get_primary_read_db)):
+    """Get a specific transfer, archived or not"""
+    transfer = db.query(Transfer).filter(Transfer.id == transfer_id).first() or \
+        db.query(ArchivedTransfer).filter(ArchivedTransfer.id == transfer_id).first()
     if not transfer:
         raise HTTPException(status_code=404, detail="Transfer not found")
     return transfer
 
+@router.get("/{transfer_id}/notes")
+def get_transfer_notes(transfer_id: int, db: Session = Depends(get_primary_read_db)):
+    """Notes added to a transfer, oldest first (earlier notes remain in transfer.notes)"""
+    if not db.query(Transfer.id).filter(Transfer.id == transfer_id).first() and \
+            not db.query(ArchivedTransfer.id).filter(ArchivedTransfer.id == transfer_id).first():
+        raise HTTPException(status_code=404, detail="Transfer not found")
+    
+    notes = db.query(AuditEvent).filter(
+        AuditEvent.entity == "transfer",
+        AuditEvent.entity_id == transfer_id,
+        AuditEvent.action == "transfer.note"
+    ).order_by(AuditEvent.id).all()
+    
+    return {
+        "transfer_id": transfer_id,
+        "notes": [
+            {"author": note.actor, "note": note.details["note"], "created_at": note.occurred_at}
+            for note in notes
+        ]
+    }
+
+def _claim_status(db: Session, transfer: Transfer, new_status: TransferStatus):
+    """Move a transfer out of its current status with a compare-and-set UPDATE,
+    so two concurrent requests cannot both apply a transition (e.g. hold two beds)"""
+    claimed = db.query(Transfer).filter(
+        Transfer.id == transfer.id,
+        Transfer.transfer_status == transfer.transfer_status
+    ).update({Transfer.transfer_status: new_status}, synchronize_session=False)
+    if not claimed:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Transfer was updated concurrently, please retry")
+    transfer.transfer_status = new_status
+
 @router.put("/{transfer_id}/status")
 def update_transfer_status(
     transfer_id: int,
@@ -143,7 +300,10 @@ def update_transfer_status(
     db: Session = Depends(get_db)
 ):
     """Update transfer status with full workflow enforcement"""
-    transfer = db.query(Transfer).filter(Transfer.id == transfer_id).first()
+    # The patient is loaded with the transfer so completion needs no extra lookup
+    transfer = db.query(Transfer).options(joinedload(Transfer.patient)).filter(
+        Transfer.id == transfer_id
+    ).first()
     if not transfer:
         raise HTTPException(status_code=404, detail="Transfer not found")
     
@@ -154,14 +314,7 @@ def update_transfer_status(
         raise HTTPException(status_code=400, detail="Invalid status")
     
     # Enforce status workflow
-    valid_transitions = {
-        TransferStatus.PENDING: [TransferStatus.IN_PROGRESS, TransferStatus.CANCELLED],
-        TransferStatus.IN_PROGRESS: [TransferStatus.COMPLETED, TransferStatus.CANCELLED],
-        TransferStatus.COMPLETED: [],  # Cannot change from completed
-        TransferStatus.CANCELLED: []   # Cannot change from cancelled
-    }
-    
-    if new_status not in valid_transitions.get(transfer.transfer_status, []):
+    if new_status not in VALID_TRANSITIONS.get(transfer.transfer_status, []):
         raise HTTPException(
             status_code=400,
             detail=f"Cannot transition from {transfer.transfer_status} to {new_status}"
@@ -169,29 +322,31 @@ def update_transfer_status(
     
     # Update transfer
     old_status = transfer.transfer_status
-    transfer.transfer_status = new_status
+    _claim_status(db, transfer, new_status)
+    bed_changes = Counter()
     
     if notes:
-        transfer.notes = (transfer.notes or "") + f"\n[{datetime.utcnow()}] {approved_by}: {notes}"
+        add_transfer_note(db, transfer_id, approved_by, notes)
     
     if new_status == TransferStatus.IN_PROGRESS:
         transfer.approved_by = approved_by
         transfer.approved_at = datetime.utcnow()
         
-        # Validate capacity still available
-        to_hosp = db.query(Hospital).filter(Hospital.id == transfer.to_hospital_id).first()
-        if to_hosp.available_beds <= 0:
+        # Hold a destination bed for the duration of the transfer
+        if not reserve_bed(db, transfer.to_hospital_id):
             db.rollback()
             raise HTTPException(
                 status_code=400,
                 detail=f"Destination hospital no longer has available beds"
             )
+        transfer.bed_reserved = True
+        bed_changes[transfer.to_hospital_id] -= 1
     
     elif new_status == TransferStatus.COMPLETED:
         transfer.completed_at = datetime.utcnow()
         
         # Update patient location
-        patient = db.query(Patient).filter(Patient.id == transfer.patient_id).first()
+        patient = transfer.patient
         if not patient:
             db.rollback()
             raise HTTPException(status_code=404, detail="Patient not found")
@@ -204,33 +359,47 @@ def update_transfer_status(
                 detail=f"Patient is no longer at source hospital"
             )
         
-        # Update hospital capacities
-        from_hosp = db.query(Hospital).filter(Hospital.id == transfer.from_hospital_id).first()
-        to_hosp = db.query(Hospital).filter(Hospital.id == transfer.to_hospital_id).first()
-        
-        if not from_hosp or not to_hosp:
-            db.rollback()
-            raise HTTPException(status_code=404, detail="Hospital not found")
-        
-        # Final capacity check
-        if to_hosp.available_beds <= 0:
+        # Transfers approved before bed holds existed still need a destination bed
+        if not transfer.bed_reserved and not reserve_bed(db, transfer.to_hospital_id):
             db.rollback()
             raise HTTPException(
                 status_code=400,
                 detail=f"Destination hospital has no available beds"
             )
+        if not transfer.bed_reserved:
+            bed_changes[transfer.to_hospital_id] -= 1
+        
+        # Free the source bed; the held destination bed becomes the patient's
+        if not release_bed(db, transfer.from_hospital_id):
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Hospital not found")
+        bed_changes[transfer.from_hospital_id] += 1
         
         # Execute the transfer
+        adjust_occupancy(db, patient.hospital_id, patient.triage_level, -1)
+        adjust_occupancy(db, transfer.to_hospital_id, patient.triage_level, 1)
         patient.hospital_id = transfer.to_hospital_id
         patient.updated_at = datetime.utcnow()
-        from_hosp.available_beds += 1
-        to_hosp.available_beds -= 1
+        transfer.bed_reserved = False
     
     elif new_status == TransferStatus.CANCELLED:
-        # No capacity changes needed for cancellation
-        pass
-    
+        # Give back the destination bed held since approval
+        if transfer.bed_reserved:
+            release_bed(db, transfer.to_hospital_id)
+            transfer.bed_reserved = False
+            bed_changes[transfer.to_hospital_id] += 1
+    
+    if new_status == TransferStatus.COMPLETED:
+        record_change(db, "patient", transfer.patient_id)
+    record_change(db, "transfer", transfer_id)
+    event = _transfer_event(transfer, bed_changes)
     db.commit()
+    dispatch_queue.discard(transfer_id)
+    publish("transfer.status_changed", **event, previous_status=old_status.name)
+    record_audit(
+        "transfer.status_changed", "transfer", transfer_id, actor=approved_by,
+        old_status=old_status.name, new_status=new_status.name
+    )
     
     return {
         "message": f"Transfer status updated from {old_status} to {new_status}",
@@ -240,14 +409,190 @@ def update_transfer_status(
         "timestamp": datetime.utcnow().isoformat()
     }
 
+@router.post("/batch-status")
+def update_transfer_statuses(batch: TransferBatchStatusUpdate, db: Session = Depends(get_db)):
+    """Apply many status changes in a single transaction.
+
+    Transitions are validated together against one read of the transfers,
+    their patients and hospital beds, and bed counts change by one net
+    UPDATE per hospital. A transfer may appear more than once (e.g.
+    IN_PROGRESS then COMPLETED); its changes apply in request order. Each
+    transition's outcome is reported by its position in `transitions`.
+    """
+    items = batch.transitions
+    if len(items) > BATCH_STATUS_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_STATUS_MAX_ITEMS} transitions per request")
+    results = [None] * len(items)
+    
+    def reject(index, item, detail):
+        results[index] = {"index": index, "transfer_id": item.transfer_id, "status": "rejected", "detail": detail}
+    
+    # 1. Every referenced transfer with its patient, and the free beds at every
+    #    hospital involved, in two queries
+    transfer_ids = {item.transfer_id for item in items}
+    transfers = {
+        transfer.id: transfer
+        for transfer in db.query(Transfer).options(joinedload(Transfer.patient)).filter(Transfer.id.in_(transfer_ids))
+    } if transfer_ids else {}
+    hospital_ids = {t.from_hospital_id for t in transfers.values()} | {t.to_hospital_id for t in transfers.values()}
+    free_beds = dict(db.execute(
+        select(Hospital.id, Hospital.available_beds).where(Hospital.id.in_(hospital_ids))
+    ).all()) if hospital_ids else {}
+    
+    # 2. Walk the transitions in order against in-memory state, granting beds
+    #    from the snapshot so the batch can never take more than are free
+    state = {}  # transfer id -> {"status", "bed_reserved"}
+    locations = {}  # patient id -> hospital id after the transitions so far
+    bed_changes = Counter()
+    applied = []  # (index, item, transfer, old status, new status)
+    for index, item in enumerate(items):
+        transfer = transfers.get(item.transfer_id)
+        if transfer is None:
+            reject(index, item, "Transfer not found")
+            continue
+        try:
+            new_status = TransferStatus[item.status.upper()]
+        except KeyError:
+            reject(index, item, "Invalid status")
+            continue
+        current = state.setdefault(transfer.id, {
+            "status": transfer.transfer_status, "bed_reserved": bool(transfer.bed_reserved)
+        })
+        old_status = current["status"]
+        if new_status not in VALID_TRANSITIONS.get(old_status, []):
+            reject(index, item, f"Cannot transition from {old_status} to {new_status}")
+            continue
+        
+        takes_bed = new_status == TransferStatus.IN_PROGRESS or (
+            new_status == TransferStatus.COMPLETED and not current["bed_reserved"]
+        )
+        if new_status == TransferStatus.COMPLETED:
+            patient = transfer.patient
+            if not patient:
+                reject(index, item, "Patient not found")
+                continue
+            if locations.get(patient.id, patient.hospital_id) != transfer.from_hospital_id:
+                reject(index, item, "Patient is no longer at source hospital")
+                continue
+            if transfer.from_hospital_id not in free_beds:
+                reject(index, item, "Hospital not found")
+                continue
+        if takes_bed:
+            if transfer.to_hospital_id not in free_beds:
+                reject(index, item, "Hospital not found")
+                continue
+            if free_beds[transfer.to_hospital_id] <= 0:
+                reject(index, item, "Destination hospital has no available beds")
+                continue
+            free_beds[transfer.to_hospital_id] -= 1
+            bed_changes[transfer.to_hospital_id] -= 1
+        
+        if new_status == TransferStatus.IN_PROGRESS:
+            current["bed_reserved"] = True
+        elif new_status == TransferStatus.COMPLETED:
+            # Free the source bed; the held destination bed becomes the patient's
+            free_beds[transfer.from_hospital_id] += 1
+            bed_changes[transfer.from_hospital_id] += 1
+            locations[transfer.patient_id] = transfer.to_hospital_id
+            current["bed_reserved"] = False
+        elif new_status == TransferStatus.CANCELLED and current["bed_reserved"]:
+            free_beds[transfer.to_hospital_id] += 1
+            bed_changes[transfer.to_hospital_id] += 1
+            current["bed_reserved"] = False
+        current["status"] = new_status
+        applied.append((index, item, transfer, old_status, new_status))
+        results[index] = {
+            "index": index, "transfer_id": transfer.id, "status": "applied",
+            "previous_status": old_status.name, "new_status": new_status.name
+        }
+    
+    # 3. Claim the changed transfers with one compare-and-set UPDATE per
+    #    (current, final) status pair; any lost race aborts the whole batch
+    claims = defaultdict(list)
+    for transfer_id, current in state.items():
+        original = transfers[transfer_id].transfer_status
+        if current["status"] != original:
+            claims[(original, current["status"])].append(transfer_id)
+    changed = [transfer_id for ids in claims.values() for transfer_id in ids]
+    for (original, final), ids in claims.items():
+        claimed = db.query(Transfer).filter(
+            Transfer.id.in_(ids), Transfer.transfer_status == original
+        ).update({Transfer.transfer_status: final}, synchronize_session=False)
+        if claimed != len(ids):
+            db.rollback()
+            raise HTTPException(status_code=409, detail="A transfer in this batch was updated concurrently, please retry")
+    
+    # 4. One net bed change per hospital, in id order so concurrent batches lock rows alike
+    for hospital_id in sorted(bed_changes):
+        if bed_changes[hospital_id] and not adjust_beds(db, hospital_id, bed_changes[hospital_id]):
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Bed availability changed concurrently, please retry")
+    
+    # 5. Replay the accepted transitions on the loaded rows
+    now = datetime.utcnow()
+    occupancy = Counter()
+    moved_patients = []
+    for index, item, transfer, old_status, new_status in applied:
+        transfer.transfer_status = new_status
+        if item.notes:
+            add_transfer_note(db, transfer.id, batch.approved_by, item.notes)
+        if new_status == TransferStatus.IN_PROGRESS:
+            transfer.approved_by = batch.approved_by
+            transfer.approved_at = now
+            transfer.bed_reserved = True
+        elif new_status == TransferStatus.COMPLETED:
+            patient = transfer.patient
+            occupancy[(patient.hospital_id, patient.triage_level)] -= 1
+            occupancy[(transfer.to_hospital_id, patient.triage_level)] += 1
+            patient.hospital_id = transfer.to_hospital_id
+            patient.updated_at = now
+            transfer.completed_at = now
+            transfer.bed_reserved = False
+            moved_patients.append(patient.id)
+        else:
+            transfer.bed_reserved = False
+    adjust_occupancy_many(db, occupancy)
+    record_changes(db, "patient", moved_patients)
+    record_changes(db, "transfer", [transfer.id for _, _, transfer, _, _ in applied])
+    db.commit()
+    
+    for transfer_id in changed:
+        dispatch_queue.discard(transfer_id)
+    for _, _, transfer, old_status, new_status in applied:
+        record_audit(
+            "transfer.status_changed", "transfer", transfer.id, actor=batch.approved_by,
+            old_status=old_status.name, new_status=new_status.name
+        )
+    if applied:
+        # One summary event per batch rather than one per transition
+        publish(
+            "transfer.batch_status_changed", applied=len(applied),
+            transfers=[{"id": transfer_id, "status": state[transfer_id]["status"].name} for transfer_id in changed],
+            beds=[{"hospital_id": hospital_id, "beds_delta": delta} for hospital_id, delta in bed_changes.items() if delta]
+        )
+    
+    return {
+        "applied": len(applied),
+        "rejected": len(items) - len(applied),
+        "results": results
+    }
+
 @router.get("/patient/{patient_id}")
-def get_patient_transfers(patient_id: int, db: Session = Depends(get_db)):
-    """Get all transfers for a specific patient"""
+def get_patient_transfers(patient_id: int, db: Session = Depends(get_primary_read_db)):
+    """Get all transfers for a specific patient, newest first, including archived ones"""
     patient = db.query(Patient).filter(Patient.id == patient_id).first()
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     
-    transfers = db.query(Transfer).filter(Transfer.patient_id == patient_id).order_by(Transfer.requested_at.desc()).all()
+    columns = list(Transfer.__table__.columns)
+    history = union_all(
+        select(*columns, literal(False).label("archived")).where(Transfer.patient_id == patient_id),
+        select(*archive_columns(columns), literal(True).label("archived")).where(
+            ArchivedTransfer.patient_id == patient_id
+        )
+    )
+    rows = db.execute(history.order_by(history.selected_columns.requested_at.desc())).all()
+    transfers = [dict(row._mapping) for row in rows]
     
     return {
         "patient_id": patient_id,
@@ -275,10 +620,22 @@ def cancel_transfer(
     if transfer.transfer_status == TransferStatus.CANCELLED:
         raise HTTPException(status_code=400, detail="Transfer already cancelled")
     
-    transfer.transfer_status = TransferStatus.CANCELLED
-    transfer.notes = (transfer.notes or "") + f"\n[{datetime.utcnow()}] Cancelled by {cancelled_by}: {reason}"
+    _claim_status(db, transfer, TransferStatus.CANCELLED)
+    add_transfer_note(db, transfer_id, cancelled_by, f"Cancelled: {reason}")
+    
+    # Give back the destination bed held since approval
+    bed_changes = Counter()
+    if transfer.bed_reserved:
+        release_bed(db, transfer.to_hospital_id)
+        transfer.bed_reserved = False
+        bed_changes[transfer.to_hospital_id] += 1
     
+    record_change(db, "transfer", transfer_id)
+    event = _transfer_event(transfer, bed_changes)
     db.commit()
+    dispatch_queue.discard(transfer_id)
+    publish("transfer.cancelled", **event)
+    record_audit("transfer.cancelled", "transfer", transfer_id, actor=cancelled_by, reason=reason)
     
     return {
         "message": "Transfer cancelled",
@@ -289,23 +646,32 @@ def cancel_transfer(
     }
 
 @router.get("/pending/priority")
-def get_pending_by_priority(db: Session = Depends(get_db)):
-    """Get all pending transfers sorted by priority for dispatch"""
-    pending = db.query(Transfer).filter(
-        Transfer.transfer_status == TransferStatus.PENDING
-    ).all()
-    
-    # Sort by priority
-    priority_order = {
-        TriageLevel.CRITICAL: 1,
-        TriageLevel.URGENT: 2,
-        TriageLevel.SEMI_URGENT: 3,
-        TriageLevel.NON_URGENT: 4
-    }
-    pending.sort(key=lambda t: (priority_order.get(t.priority, 999), t.requested_at))
+def get_pending_by_priority(limit: Optional[int] = None, db: Session = Depends(get_primary_read_db)):
+    """Get pending transfers sorted by priority for dispatch (next `limit` if given)"""
+    pending_filter = Transfer.transfer_status == TransferStatus.PENDING
+    
+    total_pending = db.query(func.count(Transfer.id)).filter(pending_filter).scalar()
+    critical_count = db.query(func.count(Transfer.id)).filter(
+        pending_filter,
+        Transfer.priority_rank == TRIAGE_PRIORITY[TriageLevel.CRITICAL]
+    ).scalar()
+    
+    if DISPATCH_QUEUE_ENABLED and limit is not None:
+        # Heap gives the next ids in O(limit log n); fetch just those rows
+        ids = dispatch_queue.peek(db, limit)
+        by_id = {t.id: t for t in db.query(Transfer).filter(Transfer.id.in_(ids)).all()}
+        pending = [by_id[i] for i in ids if i in by_id]
+    else:
+        # Walks ix_transfers_dispatch in order, so LIMIT stops early
+        query = db.query(Transfer).filter(pending_filter).order_by(
+            Transfer.priority_rank, Transfer.requested_at
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        pending = query.all()
     
     return {
-        "total_pending": len(pending),
-        "critical_count": sum(1 for t in pending if t.priority == TriageLevel.CRITICAL),
+        "total_pending": total_pending,
+        "critical_count": critical_count,
         "transfers": pending
     }
@@ -0,0 +1,331 @@
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+# Patient search. On SQLite an external-content FTS5 table (patient_search)
+# indexes names, MRN and the free-text medical fields; triggers on patients
+# keep it in step with every insert, update and delete, whichever code path
+# makes them. On PostgreSQL GIN indexes over a tsvector expression and a
+# pg_trgm name expression do the same job without triggers. Other databases
+# fall back to LIKE prefix matching on names and MRN.
+
+# Matches ranked per query. Ranking considers only the newest this-many
+# whole-word name/MRN matches plus the newest this-many prefix matches,
+# which keeps very common names ("john") fast without letting a crowd of
+# longer names ("lin", "liu") push out an exact one ("li"); add a second
+# word to narrow the search instead of paging. (FTS5's bm25() is not used:
+# it reads every match to weigh terms, which costs tens of ms on common names.)
+RANK_CANDIDATES = int(os.getenv("SEARCH_RANK_CANDIDATES", "200"))
+# Seconds the name vocabulary used for fuzzy matching is reused on SQLite
+VOCABULARY_TTL = float(os.getenv("SEARCH_VOCABULARY_SECONDS", "60"))
+# Minimum trigram similarity for a fuzzy name match (pg_trgm's default). Names one
+# typo away (a swapped, missing, extra or wrong letter) match too: a transposition
+# like "jonh" for "john" shares too few trigrams to pass on similarity alone.
+FUZZY_THRESHOLD = 0.3
+FUZZY_SUGGESTIONS = 3  # Spelling alternatives tried per query word
+
+SEARCH_COLUMNS = ["mrn", "first_name", "last_name", "current_diagnosis", "allergies", "medical_history"]
+NAME_COLUMNS = ["first_name", "last_name"]
+# Ranking weights in SEARCH_COLUMNS order: identifiers and names outrank clinical text
+COLUMN_WEIGHTS = [10.0, 4.0, 4.0, 1.0, 1.0, 0.5]
+
+_column_list = ", ".join(SEARCH_COLUMNS)
+
+SQLITE_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS patient_search USING fts5(
+        {_column_list}, content='patients', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS patient_search_terms USING fts5vocab(patient_search, 'col')",
+    f"""CREATE TRIGGER IF NOT EXISTS patients_search_insert AFTER INSERT ON patients BEGIN
+        INSERT INTO patient_search(rowid, {_column_list})
+        VALUES (new.id, {", ".join("new." + column for column in SEARCH_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS patients_search_delete AFTER DELETE ON patients BEGIN
+        INSERT INTO patient_search(patient_search, rowid, {_column_list})
+        VALUES ('delete', old.id, {", ".join("old." + column for column in SEARCH_COLUMNS)});
+    END""",
+    # Only searchable columns: triage changes and transfers don't touch the index
+    f"""CREATE TRIGGER IF NOT EXISTS patients_search_update AFTER UPDATE OF {_column_list} ON patients BEGIN
+        INSERT INTO patient_search(patient_search, rowid, {_column_list})
+        VALUES ('delete', old.id, {", ".join("old." + column for column in SEARCH_COLUMNS)});
+        INSERT INTO patient_search(rowid, {_column_list})
+        VALUES (new.id, {", ".join("new." + column for column in SEARCH_COLUMNS)});
+    END""",
+]
+
+PG_DOCUMENT = "to_tsvector('simple', {})".format(
+    " || ' ' || ".join(f"coalesce({column}, '')" for column in SEARCH_COLUMNS)
+)
+PG_NAME = "(coalesce(first_name, '') || ' ' || coalesce(last_name, ''))"
+
+POSTGRES_SCHEMA = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_patients_search_document ON patients USING gin ({PG_DOCUMENT})",
+    f"CREATE INDEX IF NOT EXISTS ix_patients_search_name ON patients USING gin ({PG_NAME} gin_trgm_ops)",
+]
+
+_backend = {"name": None}
+
+
+def ensure_search_index():
+    """Create the search index for the current database, building it from existing rows if new"""
+    dialect = engine.dialect.name
+    try:
+        with engine.begin() as conn:
+            if dialect == "sqlite":
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'patient_search'"
+                )).first()
+                for statement in SQLITE_SCHEMA:
+                    conn.execute(text(statement))
+                if not exists:
+                    conn.execute(text("INSERT INTO patient_search(patient_search) VALUES ('rebuild')"))
+                    logger.info("Built the patient search index")
+                _backend["name"] = "fts5"
+            elif dialect == "postgresql":
+                for statement in POSTGRES_SCHEMA:
+                    conn.execute(text(statement))
+                _backend["name"] = "postgresql"
+            else:
+                _backend["name"] = "like"
+    except OperationalError as exc:
+        # e.g. an SQLite build without FTS5, or no permission to create pg_trgm
+        logger.warning("Patient search index unavailable, using LIKE matching: %s", exc)
+        _backend["name"] = "like"
+    return _backend["name"]
+
+
+def _fold(value: str) -> str:
+    """Lower-case and strip accents, as the FTS5 tokenizer does"""
+    if value.isascii():
+        return value.lower()
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _words(value: str) -> list:
+    return re.findall(r"\w+", _fold(value))
+
+
+def _trigrams(word: str) -> set:
+    """Padded trigrams as pg_trgm builds them, so both backends agree on what "similar" means"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _one_edit_apart(a: str, b: str) -> bool:
+    """True if b is a with one letter changed, inserted, removed, or two adjacent letters swapped"""
+    if abs(len(a) - len(b)) > 1 or a == b:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    start = 0
+    while start < len(a) and a[start] == b[start]:
+        start += 1
+    if len(a) < len(b):
+        return a[start:] == b[start + 1:]
+    return a[start + 1:] == b[start + 1:] or (
+        start + 1 < len(a) and a[start] == b[start + 1] and a[start + 1] == b[start] and a[start + 2:] == b[start + 2:]
+    )
+
+
+class NameVocabulary:
+    """Distinct first/last name terms from the FTS index, with a trigram index for spelling suggestions"""
+
+    def __init__(self, ttl: float = VOCABULARY_TTL):
+        self.ttl = ttl
+        self._terms = {}  # trigram -> terms containing it
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self, db: Session):
+        terms = db.execute(text(
+            "SELECT DISTINCT term FROM patient_search_terms WHERE col IN ('first_name', 'last_name')"
+        )).scalars().all()
+        index = {}
+        for term in terms:
+            for trigram in _trigrams(term):
+                index.setdefault(trigram, []).append(term)
+        with self._lock:
+            self._terms = index
+            self._expires = time.monotonic() + self.ttl
+
+    def suggest(self, db: Session, word: str, limit: int = FUZZY_SUGGESTIONS) -> list:
+        """Up to `limit` (term, similarity) pairs for names spelled like `word`"""
+        if time.monotonic() >= self._expires:
+            self._load(db)
+        grams = _trigrams(word)
+        shared = Counter()
+        for trigram in grams:
+            shared.update(self._terms.get(trigram, ()))
+        scored = []
+        for term, common in shared.items():
+            score = common / (len(grams) + len(_trigrams(term)) - common)
+            if _one_edit_apart(word, term):
+                score = max(score, 1 - 1 / max(len(word), len(term)))
+            if score >= FUZZY_THRESHOLD and term != word:
+                scored.append((score, term))
+        return [(term, score) for score, term in sorted(scored, reverse=True)[:limit]]
+
+
+name_vocabulary = NameVocabulary()
+
+
+def _score(row, groups: list) -> float:
+    """Score an (id, *SEARCH_COLUMNS) row.
+
+    The score is the sum over query words of the best column weight any of
+    the word's terms hits. groups holds one list of (term, factor) per query word. A token equal to
+    a term scores the column weight times factor; a token merely starting
+    with it scores half that.
+    """
+    tokens = {}  # Tokenized on first use; heavier columns usually settle the score first
+    total = 0.0
+    for group in groups:
+        best = 0.0
+        for term, factor in group:
+            for column, weight in enumerate(COLUMN_WEIGHTS):
+                if weight * factor <= best:
+                    continue
+                if column not in tokens:
+                    tokens[column] = set(_words(row[column + 1] or ""))
+                column_tokens = tokens[column]
+                if term in column_tokens:
+                    best = weight * factor
+                elif any(token.startswith(term) for token in column_tokens):
+                    best = max(best, weight * factor / 2)
+        total += best
+    return total
+
+
+def _rank(db: Session, ids: list, groups: list, limit: int) -> list:
+    """(id, score) for the best `limit` candidates; ties go to the newest patient"""
+    if not ids:
+        return []
+    rows = db.execute(
+        text(f"SELECT id, {_column_list} FROM patients WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)),
+        {"ids": ids}
+    ).all()
+    scored = sorted(((_score(row, groups), row.id) for row in rows), key=lambda item: (-item[0], -item[1]))
+    return [(row_id, score) for score, row_id in scored[:limit]]
+
+
+def _quote(word: str) -> str:
+    return '"' + word.replace('"', '""') + '"'
+
+
+def _candidates(db: Session, tiers: list) -> list:
+    """Ids from each (SELECT id, params) tier, the newest RANK_CANDIDATES of each, in one query.
+
+    Earlier tiers come first and ids are not repeated. A tier's SELECT names
+    its parameters with a "{tier}" suffix (":match{tier}") so tiers don't collide.
+    """
+    params, selects = {"candidates": RANK_CANDIDATES}, []
+    for index, (statement, tier_params) in enumerate(tiers):
+        selects.append(f"SELECT * FROM ({statement.format(tier=index)} ORDER BY 1 DESC LIMIT :candidates) AS tier{index}")
+        params.update({f"{name}{index}": value for name, value in tier_params.items()})
+    return list(dict.fromkeys(db.execute(text(" UNION ALL ".join(selects)), params).scalars().all()))
+
+
+def _fts_candidates(db: Session, *matches) -> list:
+    statement = "SELECT rowid FROM patient_search WHERE patient_search MATCH :match{tier}"
+    return _candidates(db, [(statement, {"match": match}) for match in matches])
+
+
+def _search_fts5(db: Session, words: list, limit: int, fuzzy: bool) -> list:
+    exact = [[(word, 1.0)] for word in words]
+    # Whole-word name/MRN matches first, so longer names sharing the prefix can't crowd them out
+    candidates = _fts_candidates(
+        db,
+        "{mrn " + " ".join(NAME_COLUMNS) + "} : (" + " AND ".join(map(_quote, words)) + ")",
+        " AND ".join(_quote(word) + "*" for word in words)
+    )
+    results = [(row_id, score, "prefix") for row_id, score in _rank(db, candidates, exact, limit)]
+    if not fuzzy or len(results) >= limit:
+        return results
+    # Widen each name-length word with close spellings from the name vocabulary
+    groups = [[(word, 1.0)] + (name_vocabulary.suggest(db, word) if len(word) >= 3 else []) for word in words]
+    if all(len(group) == 1 for group in groups):
+        return results
+    match = "{" + " ".join(NAME_COLUMNS) + "} : (" + " AND ".join(
+        "(" + " OR ".join([_quote(group[0][0]) + "*"] + [_quote(term) for term, _ in group[1:]]) + ")"
+        for group in groups
+    ) + ")"
+    seen = {row_id for row_id, _, _ in results}
+    candidates = [row_id for row_id in _fts_candidates(db, match) if row_id not in seen]
+    results += [(row_id, score, "fuzzy") for row_id, score in _rank(db, candidates, groups, limit - len(results))]
+    return results
+
+
+def _search_postgresql(db: Session, words: list, limit: int, fuzzy: bool) -> list:
+    statement = f"SELECT id FROM patients WHERE {PG_DOCUMENT} @@ to_tsquery('simple', :query{{tier}})"
+    candidates = _candidates(db, [
+        (statement, {"query": " & ".join(words)}),
+        (statement, {"query": " & ".join(f"{word}:*" for word in words)})
+    ])
+    exact = [[(word, 1.0)] for word in words]
+    results = [(row_id, score, "prefix") for row_id, score in _rank(db, candidates, exact, limit)]
+    if not fuzzy or len(results) >= limit:
+        return results
+    seen = {row_id for row_id, _, _ in results}
+    rows = db.execute(text(
+        f"SELECT id, similarity({PG_NAME}, :name) AS score FROM patients "
+        f"WHERE {PG_NAME} % :name ORDER BY score DESC, id DESC LIMIT :limit"
+    ), {"name": " ".join(words), "limit": limit + len(seen)}).all()
+    # Scaled by the name weight to sit on the same scale as the SQLite scores
+    name_weight = COLUMN_WEIGHTS[SEARCH_COLUMNS.index("last_name")]
+    results += [(row.id, name_weight * row.score, "fuzzy") for row in rows if row.id not in seen][:limit - len(results)]
+    return results
+
+
+def _search_like(db: Session, words: list, limit: int) -> list:
+    tiers = []
+    for operator, pattern in (("=", "{}"), ("LIKE", "{}%")):
+        conditions = [
+            f"(lower(first_name) {operator} :w{index}{{tier}} OR lower(last_name) {operator} :w{index}{{tier}} "
+            f"OR lower(mrn) {operator} :w{index}{{tier}})"
+            for index in range(len(words))
+        ]
+        params = {f"w{index}": pattern.format(word) for index, word in enumerate(words)}
+        tiers.append(("SELECT id FROM patients WHERE " + " AND ".join(conditions), params))
+    candidates = _candidates(db, tiers)
+    exact = [[(word, 1.0)] for word in words]
+    return [(row_id, score, "prefix") for row_id, score in _rank(db, candidates, exact, limit)]
+
+
+def search_patients(db: Session, query: str, limit: int = 20, fuzzy: bool = True) -> list:
+    """Ranked (patient_id, score, match) tuples; match is "prefix" or "fuzzy" """
+    words = _words(query)
+    if not words:
+        return []
+    backend = _backend["name"] or ensure_search_index()
+    if backend == "fts5":
+        return _search_fts5(db, words, limit, fuzzy)
+    if backend == "postgresql":
+        return _search_postgresql(db, words, limit, fuzzy)
+    return _search_like(db, words, limit)
+
+
+if __name__ == "__main__":
+    # Rebuild the SQLite index from the patients table: python search.py
+    if ensure_search_index() == "fts5":
+        session = SessionLocal()
+        try:
+            session.execute(text("INSERT INTO patient_search(patient_search) VALUES ('rebuild')"))
+            session.commit()
+            print("Rebuilt the patient search index")
+        finally:
+            session.close()
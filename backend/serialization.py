@@ -0,0 +1,70 @@
+import enum
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up: pip install orjson
+    orjson = None
+
+# List endpoints select only the columns they return and hand plain dicts to
+# FastJSONResponse, skipping ORM object construction, jsonable_encoder and
+# response_model validation. Output matches the default JSON rendering:
+# enums as their value, datetimes in ISO 8601.
+
+
+def _default(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by orjson when it is installed"""
+
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def select_fields(model, fields: Optional[str], allowed=None) -> list:
+    """Columns named in a comma-separated ?fields= value, in that order.
+
+    Without `fields` every allowed column is returned (all of the model's
+    columns when `allowed` is None). Unknown names are a 400.
+    """
+    columns = {column.name: column for column in model.__table__.columns}
+    if allowed is not None:
+        columns = {name: columns[name] for name in allowed}
+    names = [name.strip() for name in (fields or "").split(",") if name.strip()]
+    if not names:
+        return list(columns.values())
+    unknown = [name for name in names if name not in columns]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(columns)}"
+        )
+    return [columns[name] for name in dict.fromkeys(names)]
+
+
+def with_columns(columns: list, required: list) -> list:
+    """`columns` plus any of `required` missing from it, appended at the end"""
+    names = {column.name for column in columns}
+    return columns + [column for column in required if column.name not in names]
+
+
+def rows_as_dicts(rows, columns: list) -> list:
+    """One dict per row keyed by the names of `columns`; extra trailing values are dropped"""
+    names = [column.name for column in columns]
+    return [dict(zip(names, row)) for row in rows]
@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway database before anything imports database.py
+_DB_DIR = tempfile.mkdtemp(prefix="medcare-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["SEARCH_VOCABULARY_SECONDS"] = "0"  # Fuzzy search sees names admitted moments ago
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    import app as app_module
+
+    # Entering the client runs the lifespan, which migrates the empty database
+    with TestClient(app_module.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def hospitals(client):
+    """Two fresh hospitals with free beds"""
+    ids = []
+    for name in ("North General", "South Regional"):
+        response = client.post("/api/hospitals/", json={
+            "name": name, "address": "1 Main St", "city": "San Jose", "state": "CA",
+            "capacity": 100, "available_beds": 50
+        })
+        assert response.status_code == 201, response.text
+        ids.append(response.json()["id"])
+    return ids
+
+
+_mrn_counter = iter(range(1, 1_000_000))
+
+
+@pytest.fixture
+def admit(client):
+    """Admit a patient through the API and return the created patient"""
+
+    def _admit(hospital_id, first_name="John", last_name="Smith", triage_level="URGENT"):
+        response = client.post("/api/patients/", json={
+            "mrn": f"TEST{next(_mrn_counter):06d}", "first_name": first_name, "last_name": last_name,
+            "date_of_birth": "1980-01-01T00:00:00", "gender": "Male",
+            "hospital_id": hospital_id, "triage_level": triage_level
+        })
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    return _admit
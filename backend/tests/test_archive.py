@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def create_transfer(client, patient, hospitals):
+    response = client.post("/api/transfers/", json={
+        "patient_id": patient["id"], "from_hospital_id": hospitals[0], "to_hospital_id": hospitals[1],
+        "transfer_reason": "Cardiac care", "priority": "URGENT", "requested_by": "Dr. Lee"
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["transfer"]["id"]
+
+
+@pytest.fixture
+def archived(client, hospitals, admit):
+    """A completed transfer moved to the archive, with the patient and the sync cursor from just before"""
+    from archive import archive_transfers
+    from database import SessionLocal
+
+    patient = admit(hospitals[0])
+    transfer_id = create_transfer(client, patient, hospitals)
+    for status in ("IN_PROGRESS", "COMPLETED"):
+        response = client.put(f"/api/transfers/{transfer_id}/status",
+                              params={"status": status, "approved_by": "Dr. Lee"})
+        assert response.status_code == 200, response.text
+    # The newest transfer is never archived; the patient is now at the second hospital
+    create_transfer(client, patient, hospitals[::-1])
+
+    cursor = client.get("/api/sync/", params={"since": 0, "limit": 10000}).json()["cursor"]
+    db = SessionLocal()
+    try:
+        assert archive_transfers(db, cutoff=datetime.utcnow() + timedelta(days=1)) >= 1
+    finally:
+        db.close()
+    return transfer_id, patient, cursor
+
+
+def test_archiving_logs_an_archive_change(archived):
+    from database import SessionLocal
+    from models import ChangeLogEntry
+
+    transfer_id, _, cursor = archived
+    db = SessionLocal()
+    try:
+        entries = db.query(ChangeLogEntry).filter(
+            ChangeLogEntry.entity == "transfer", ChangeLogEntry.entity_id == transfer_id, ChangeLogEntry.id > cursor
+        ).all()
+    finally:
+        db.close()
+    assert [entry.operation for entry in entries] == ["archive"]
+
+
+def test_sync_reports_archived_transfers_apart_from_deleted(client, archived):
+    transfer_id, _, cursor = archived
+    sync = client.get("/api/sync/", params={"since": cursor}).json()
+    assert transfer_id in sync["archived"]["transfers"]
+    assert transfer_id not in sync["deleted"]["transfers"]
+    assert transfer_id not in [transfer["id"] for transfer in sync["transfers"]]
+    assert sync["archived"]["patients"] == sync["archived"]["hospitals"] == []
+
+
+def test_archived_transfer_stays_readable(client, archived):
+    transfer_id, patient, _ = archived
+    assert client.get(f"/api/transfers/{transfer_id}").status_code == 200
+    history = client.get(f"/api/transfers/patient/{patient['id']}").json()["transfers"]
+    assert next(row for row in history if row["id"] == transfer_id)["archived"] is True
+    listed = client.get("/api/transfers/", params={"limit": 1000}).json()
+    assert transfer_id not in [transfer["id"] for transfer in listed]
@@ -0,0 +1,28 @@
+import asyncio
+import time
+
+from starlette.requests import Request
+
+
+def test_async_reads_follow_the_read_your_writes_window(monkeypatch):
+    import database
+    from database import STICKY_COOKIE, _async_url, get_async_read_db
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    primary = create_async_engine(_async_url(database.DATABASE_URL))
+    replica = create_async_engine(_async_url(database.DATABASE_URL))
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(bind=primary))
+    monkeypatch.setattr(database, "AsyncReplicaSessionLocal", async_sessionmaker(bind=replica))
+
+    async def bind_for(cookie: str):
+        request = Request({"type": "http", "headers": [(b"cookie", cookie.encode())] if cookie else []})
+        sessions = get_async_read_db(request)
+        db = await sessions.__anext__()
+        try:
+            return db.bind
+        finally:
+            await sessions.aclose()
+
+    assert asyncio.run(bind_for("")) is replica
+    assert asyncio.run(bind_for(f"{STICKY_COOKIE}={time.time() + 60}")) is primary
+    assert asyncio.run(bind_for(f"{STICKY_COOKIE}={time.time() - 60}")) is replica
@@ -0,0 +1,60 @@
+def audit_actions(actor):
+    from database import SessionLocal
+    from models import AuditEvent
+
+    db = SessionLocal()
+    try:
+        return [event.action for event in db.query(AuditEvent).filter(AuditEvent.actor == actor).order_by(AuditEvent.id)]
+    finally:
+        db.close()
+
+
+def test_full_queue_writes_from_the_caller(client, tmp_path):
+    from audit import AuditWriter
+
+    writer = AuditWriter(queue_size=1, spill_path=str(tmp_path / "spill.ndjson"))
+    writer.record("test.queued", "patient", 1, actor="full-queue")
+    writer.record("test.overflow", "patient", 1, actor="full-queue")
+    assert audit_actions("full-queue") == ["test.overflow"]
+    writer.flush()
+    assert audit_actions("full-queue") == ["test.overflow", "test.queued"]
+
+
+def test_failed_batch_is_retried(client, tmp_path, monkeypatch):
+    from audit import AuditWriter
+
+    writer = AuditWriter(attempts=3, spill_path=str(tmp_path / "spill.ndjson"))
+    insert = writer._insert
+    failures = iter([RuntimeError("database is locked")])
+
+    def flaky_insert(batch):
+        for error in failures:
+            raise error
+        insert(batch)
+
+    monkeypatch.setattr(writer, "_insert", flaky_insert)
+    writer.record("test.retried", "patient", 1, actor="flaky")
+    assert writer.flush() == 1
+    assert audit_actions("flaky") == ["test.retried"]
+    assert not (tmp_path / "spill.ndjson").exists()
+
+
+def test_batch_that_keeps_failing_is_spilled_and_replayed(client, tmp_path, monkeypatch):
+    from audit import AuditWriter
+
+    writer = AuditWriter(attempts=2, spill_path=str(tmp_path / "spill.ndjson"))
+    insert = writer._insert
+
+    def failing_insert(batch):
+        raise RuntimeError("database is unavailable")
+
+    monkeypatch.setattr(writer, "_insert", failing_insert)
+    writer.record("test.spilled", "transfer", 7, actor="outage", old_status="PENDING")
+    writer.flush()
+    assert audit_actions("outage") == []
+    assert (tmp_path / "spill.ndjson").exists()
+
+    monkeypatch.setattr(writer, "_insert", insert)
+    assert writer.replay_spill() == 1
+    assert audit_actions("outage") == ["test.spilled"]
+    assert not (tmp_path / "spill.ndjson").exists()
@@ -0,0 +1,103 @@
+from sqlalchemy import event
+
+
+def create_transfer(client, patient_id: int, from_hospital_id: int, to_hospital_id: int) -> int:
+    response = client.post("/api/transfers/", json={
+        "patient_id": patient_id, "from_hospital_id": from_hospital_id, "to_hospital_id": to_hospital_id,
+        "transfer_reason": "Specialist care", "priority": "URGENT", "requested_by": "Dr. Lee"
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["transfer"]["id"]
+
+
+def batch(client, *transitions):
+    return client.post("/api/transfers/batch-status", json={
+        "approved_by": "Dr. Lee",
+        "transitions": [{"transfer_id": transfer_id, "status": status} for transfer_id, status in transitions]
+    })
+
+
+def outcomes(response):
+    assert response.status_code == 200, response.text
+    return [(result["status"], result.get("detail")) for result in response.json()["results"]]
+
+
+def status_of(client, transfer_id: int) -> str:
+    return client.get(f"/api/transfers/{transfer_id}").json()["transfer_status"]
+
+
+def available_beds(client, hospital_id: int) -> int:
+    return client.get(f"/api/hospitals/{hospital_id}").json()["available_beds"]
+
+
+def test_invalid_transitions_are_rejected_alone(client, hospitals, admit):
+    approved, pending = (create_transfer(client, admit(hospitals[0])["id"], *hospitals) for _ in range(2))
+    response = batch(client, (approved, "IN_PROGRESS"), (999999, "IN_PROGRESS"),
+                     (pending, "COMPLETED"), (pending, "FROZEN"))
+    assert outcomes(response) == [
+        ("applied", None),
+        ("rejected", "Transfer not found"),
+        ("rejected", "Cannot transition from TransferStatus.PENDING to TransferStatus.COMPLETED"),
+        ("rejected", "Invalid status"),
+    ]
+    assert (status_of(client, approved), status_of(client, pending)) == ("in_progress", "pending")
+
+
+def test_repeated_transfer_applies_in_request_order(client, hospitals, admit):
+    patient = admit(hospitals[0])
+    transfer_id = create_transfer(client, patient["id"], *hospitals)
+    response = batch(client, (transfer_id, "IN_PROGRESS"), (transfer_id, "IN_PROGRESS"),
+                     (transfer_id, "COMPLETED"), (transfer_id, "CANCELLED"))
+    assert [status for status, _ in outcomes(response)] == ["applied", "rejected", "applied", "rejected"]
+    assert status_of(client, transfer_id) == "completed"
+    assert client.get(f"/api/patients/{patient['id']}").json()["hospital_id"] == hospitals[1]
+
+
+def test_lost_claim_rolls_back_the_whole_batch(client, hospitals, admit):
+    from database import SessionLocal, engine
+    from models import Transfer, TransferStatus
+
+    first, second = (create_transfer(client, admit(hospitals[0])["id"], *hospitals) for _ in range(2))
+    beds = available_beds(client, hospitals[1])
+    cancelled = []
+
+    def cancel_before_claim(conn, cursor, statement, parameters, context, executemany):
+        # Another request cancels one of the transfers after the batch has validated it
+        if statement.startswith("UPDATE transfers SET transfer_status") and not cancelled:
+            cancelled.append(second)
+            other = SessionLocal()
+            try:
+                other.query(Transfer).filter(Transfer.id == second).update(
+                    {Transfer.transfer_status: TransferStatus.CANCELLED})
+                other.commit()
+            finally:
+                other.close()
+
+    event.listen(engine, "before_cursor_execute", cancel_before_claim)
+    try:
+        response = batch(client, (first, "IN_PROGRESS"), (second, "IN_PROGRESS"))
+    finally:
+        event.remove(engine, "before_cursor_execute", cancel_before_claim)
+    assert response.status_code == 409
+    assert (status_of(client, first), status_of(client, second)) == ("pending", "cancelled")
+    assert available_beds(client, hospitals[1]) == beds
+
+
+def test_bed_totals_after_moves_both_ways(client, hospitals, admit):
+    north, south = hospitals
+    completed, held, cancelled = (create_transfer(client, admit(north)["id"], north, south) for _ in range(3))
+    returning = create_transfer(client, admit(south)["id"], south, north)
+    before = {hospital_id: available_beds(client, hospital_id) for hospital_id in hospitals}
+
+    response = batch(client,
+                     (completed, "IN_PROGRESS"), (held, "IN_PROGRESS"), (cancelled, "IN_PROGRESS"),
+                     (returning, "IN_PROGRESS"), (completed, "COMPLETED"), (cancelled, "CANCELLED"),
+                     (returning, "COMPLETED"))
+    assert [status for status, _ in outcomes(response)] == ["applied"] * 7
+    # North: +1 from the completed move out, -1 for the patient coming back.
+    # South: -1 for the arrival, -1 held, +1 for the returning patient; the cancelled hold nets out.
+    assert available_beds(client, north) == before[north]
+    assert available_beds(client, south) == before[south] - 1
+    for hospital_id in hospitals:
+        stats = client.get(f"/api/hospitals/{hospital_id}").json()
+        assert 0 <= stats["available_beds"] <= stats["capacity"]
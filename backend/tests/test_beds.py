@@ -0,0 +1,119 @@
+def create_hospital(client, capacity: int, available_beds: int) -> int:
+    response = client.post("/api/hospitals/", json={
+        "name": "Small Community", "address": "2 Side St", "city": "San Jose", "state": "CA",
+        "capacity": capacity, "available_beds": available_beds
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def available_beds(client, hospital_id: int) -> int:
+    return client.get(f"/api/hospitals/{hospital_id}").json()["available_beds"]
+
+
+def test_full_hospital_reports_its_occupancy(client, admit):
+    hospital_id = create_hospital(client, capacity=3, available_beds=1)
+    admit(hospital_id)
+    response = client.post("/api/patients/", json={
+        "mrn": "FULL0001", "first_name": "Ada", "last_name": "Full",
+        "date_of_birth": "1980-01-01T00:00:00", "gender": "Female",
+        "hospital_id": hospital_id, "triage_level": "URGENT"
+    })
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Hospital 'Small Community' has no available beds. Current capacity: 3/3"
+    assert available_beds(client, hospital_id) == 0
+
+
+def test_unknown_hospital_is_not_found(client):
+    response = client.post("/api/patients/", json={
+        "mrn": "NOWHERE01", "first_name": "Ada", "last_name": "Nowhere",
+        "date_of_birth": "1980-01-01T00:00:00", "gender": "Female",
+        "hospital_id": 999999, "triage_level": "URGENT"
+    })
+    assert response.status_code == 404
+
+
+def create_transfer(client, patient_id: int, from_hospital_id: int, to_hospital_id: int) -> int:
+    response = client.post("/api/transfers/", json={
+        "patient_id": patient_id, "from_hospital_id": from_hospital_id, "to_hospital_id": to_hospital_id,
+        "transfer_reason": "Specialist care", "priority": "URGENT", "requested_by": "Dr. Lee"
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["transfer"]["id"]
+
+
+def set_status(client, transfer_id: int, status: str):
+    return client.put(f"/api/transfers/{transfer_id}/status", params={"status": status, "approved_by": "Dr. Lee"})
+
+
+def test_last_bed_is_held_only_once(client, hospitals, admit):
+    destination = create_hospital(client, capacity=5, available_beds=1)
+    first, second = (create_transfer(client, admit(hospitals[0])["id"], hospitals[0], destination) for _ in range(2))
+    assert set_status(client, first, "IN_PROGRESS").status_code == 200
+    response = set_status(client, second, "IN_PROGRESS")
+    assert response.status_code == 400
+    assert available_beds(client, destination) == 0
+    assert client.get(f"/api/transfers/{second}").json()["transfer_status"] == "pending"
+
+
+def test_losing_a_status_race_holds_no_bed(client, hospitals, admit, monkeypatch):
+    from beds import reserve_bed
+    from database import SessionLocal
+    from models import Transfer, TransferStatus
+    from routes import transfers
+
+    transfer_id = create_transfer(client, admit(hospitals[0])["id"], hospitals[0], hospitals[1])
+    before = available_beds(client, hospitals[1])
+    claim = transfers._claim_status
+
+    def approved_concurrently(db, transfer, new_status):
+        # Another request approves the transfer between this one's read and its claim
+        other = SessionLocal()
+        try:
+            rival = other.get(Transfer, transfer.id)
+            claim(other, rival, TransferStatus.IN_PROGRESS)
+            assert reserve_bed(other, rival.to_hospital_id)
+            rival.bed_reserved = True
+            other.commit()
+        finally:
+            other.close()
+        claim(db, transfer, new_status)
+
+    monkeypatch.setattr(transfers, "_claim_status", approved_concurrently)
+    response = set_status(client, transfer_id, "IN_PROGRESS")
+    assert response.status_code == 409
+    # Only the winner's hold is taken
+    assert available_beds(client, hospitals[1]) == before - 1
+
+
+def test_cancel_releases_the_held_bed(client, hospitals, admit):
+    transfer_id = create_transfer(client, admit(hospitals[0])["id"], hospitals[0], hospitals[1])
+    before = available_beds(client, hospitals[1])
+    assert set_status(client, transfer_id, "IN_PROGRESS").status_code == 200
+    assert available_beds(client, hospitals[1]) == before - 1
+    assert set_status(client, transfer_id, "CANCELLED").status_code == 200
+    assert available_beds(client, hospitals[1]) == before
+
+
+def test_complete_keeps_the_held_bed_and_frees_the_source(client, hospitals, admit):
+    transfer_id = create_transfer(client, admit(hospitals[0])["id"], hospitals[0], hospitals[1])
+    source, destination = (available_beds(client, hospital_id) for hospital_id in hospitals)
+    assert set_status(client, transfer_id, "IN_PROGRESS").status_code == 200
+    assert set_status(client, transfer_id, "COMPLETED").status_code == 200
+    assert available_beds(client, hospitals[0]) == source + 1
+    assert available_beds(client, hospitals[1]) == destination - 1
+
+
+def test_free_beds_stay_within_capacity(client, hospitals, admit):
+    source = create_hospital(client, capacity=2, available_beds=2)
+    patient = admit(source)
+    # The count is corrected by hand while the patient is still admitted
+    response = client.put(f"/api/hospitals/{source}/capacity", params={"available_beds": 2})
+    assert response.status_code == 200, response.text
+    transfer_id = create_transfer(client, patient["id"], source, hospitals[0])
+    assert set_status(client, transfer_id, "IN_PROGRESS").status_code == 200
+    assert set_status(client, transfer_id, "COMPLETED").status_code == 200
+    assert available_beds(client, source) == 2
+    response = client.put(f"/api/hospitals/{source}/capacity", params={"available_beds": -1})
+    assert response.status_code == 400
+    assert available_beds(client, source) == 2
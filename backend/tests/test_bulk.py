@@ -0,0 +1,112 @@
+import json
+
+import pytest
+
+_mrn_counter = iter(range(1, 1_000_000))
+
+
+def row(hospital_id, mrn=None, **fields):
+    return {
+        "mrn": mrn or f"BULK{next(_mrn_counter):06d}", "first_name": "Ada", "last_name": "Bulk",
+        "date_of_birth": "1980-01-01T00:00:00", "gender": "Female",
+        "hospital_id": hospital_id, "triage_level": "URGENT", **fields
+    }
+
+
+def create_hospital(client, beds: int) -> int:
+    response = client.post("/api/hospitals/", json={
+        "name": "Bulk Annex", "address": "3 Side St", "city": "San Jose", "state": "CA",
+        "capacity": beds, "available_beds": beds
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def post_ndjson(client, lines):
+    return client.post("/api/patients/bulk", content="\n".join(lines),
+                       headers={"content-type": "application/x-ndjson"})
+
+
+def statuses(response):
+    return [(result["status"], result.get("detail")) for result in response.json()["results"]]
+
+
+def test_json_array_admits_every_row_with_its_own_id(client, hospitals):
+    rows = [row(hospitals[0]) for _ in range(3)]
+    response = client.post("/api/patients/bulk", json=rows)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["admitted"], body["rejected"]) == (3, 0)
+    for sent, result in zip(rows, body["results"]):
+        assert client.get(f"/api/patients/{result['id']}").json()["mrn"] == sent["mrn"]
+
+
+def test_ndjson_reports_bad_lines_by_position(client, hospitals):
+    response = post_ndjson(client, [json.dumps(row(hospitals[0])), "", "{not json", json.dumps(row(hospitals[0]))])
+    assert response.status_code == 200, response.text
+    assert statuses(response) == [("created", None), ("rejected", "Invalid JSON"), ("created", None)]
+
+
+def test_rows_are_rejected_individually(client, hospitals, admit):
+    existing = admit(hospitals[0])["mrn"]
+    duplicate = row(hospitals[0])
+    response = client.post("/api/patients/bulk", json=[
+        duplicate, dict(duplicate), row(hospitals[0], mrn=existing), row(999999), row(hospitals[0], triage_level="MILD")
+    ])
+    assert response.status_code == 200, response.text
+    assert [status for status, _ in statuses(response)] == ["created"] + ["rejected"] * 4
+    assert [detail for _, detail in statuses(response)][1:4] == [
+        "Duplicate MRN within request", "Patient with this MRN already exists", "Hospital not found"
+    ]
+    assert statuses(response)[4][1].startswith("Invalid triage level")
+
+
+def test_rows_past_the_free_beds_are_rejected_in_order(client):
+    hospital_id = create_hospital(client, beds=2)
+    response = client.post("/api/patients/bulk", json=[row(hospital_id) for _ in range(3)])
+    assert statuses(response) == [("created", None), ("created", None), ("rejected", "Hospital has no available beds")]
+    assert client.get(f"/api/hospitals/{hospital_id}").json()["available_beds"] == 0
+
+
+@pytest.mark.parametrize("ndjson", [False, True])
+def test_row_cap(client, hospitals, monkeypatch, ndjson):
+    from routes import patients
+
+    monkeypatch.setattr(patients, "BULK_MAX_ROWS", 3)
+    rows = [row(hospitals[0]) for _ in range(4)]
+    if ndjson:
+        response = post_ndjson(client, [json.dumps(item) for item in rows])
+    else:
+        response = client.post("/api/patients/bulk", json=rows)
+    assert response.status_code == 413
+    assert response.json()["detail"] == "At most 3 patients per request"
+    found = client.get("/api/patients/search", params={"q": rows[0]["mrn"]}).json()
+    assert rows[0]["mrn"] not in [patient["mrn"] for patient in found]
+
+
+def test_beds_taken_concurrently_are_retried_with_the_current_count(client, monkeypatch):
+    from database import SessionLocal
+    from models import Hospital
+    from routes import patients
+
+    hospital_id = create_hospital(client, beds=3)
+    reserve_beds = patients.reserve_beds
+    calls = []
+
+    def beds_taken_first(db, hospital_id, count):
+        if not calls:
+            # Another admission takes two beds after the snapshot was read
+            other = SessionLocal()
+            try:
+                other.query(Hospital).filter(Hospital.id == hospital_id).update({Hospital.available_beds: 1})
+                other.commit()
+            finally:
+                other.close()
+        calls.append(count)
+        return reserve_beds(db, hospital_id, count)
+
+    monkeypatch.setattr(patients, "reserve_beds", beds_taken_first)
+    response = client.post("/api/patients/bulk", json=[row(hospital_id) for _ in range(3)])
+    assert calls == [3, 1]
+    assert [status for status, _ in statuses(response)] == ["created", "rejected", "rejected"]
+    assert client.get(f"/api/hospitals/{hospital_id}").json()["available_beds"] == 0
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+
+import pytest
+from sqlalchemy import text
+
+
+@pytest.fixture
+def diagnostics(client):
+    from diagnostics import settings
+
+    saved = settings.as_dict()
+    yield settings
+    settings.update(**saved)
+
+
+def slow_queries(caplog):
+    return [record for record in caplog.records if record.getMessage().startswith("slow query")]
+
+
+def test_slow_query_log_is_switched_on_and_off_at_runtime(client, hospitals, diagnostics, caplog):
+    caplog.set_level(logging.WARNING, logger="medcare.diagnostics")
+    client.get(f"/api/hospitals/{hospitals[0]}")
+    assert slow_queries(caplog) == []
+
+    response = client.put("/api/diagnostics/", json={"enabled": True, "slow_query_ms": 0.001})
+    assert response.json()["enabled"] is True
+    client.get(f"/api/hospitals/{hospitals[0]}")
+    assert any(f"GET /api/hospitals/{hospitals[0]}" in record.getMessage() for record in slow_queries(caplog))
+
+    caplog.clear()
+    client.put("/api/diagnostics/", json={"enabled": False})
+    client.get(f"/api/hospitals/{hospitals[0]}")
+    assert slow_queries(caplog) == []
+
+
+def test_async_engine_is_covered(client, diagnostics, caplog, monkeypatch):
+    import database
+    from diagnostics import install_slow_query_log
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    async_engine = create_async_engine(database._async_url(database.DATABASE_URL))
+    monkeypatch.setattr(database, "async_engine", async_engine)
+    install_slow_query_log()
+    diagnostics.update(enabled=True, slow_query_ms=0.001)
+    caplog.set_level(logging.WARNING, logger="medcare.diagnostics")
+
+    async def query():
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT count(*) FROM hospitals"))
+        await async_engine.dispose()
+
+    asyncio.run(query())
+    assert any("FROM hospitals" in record.getMessage() for record in slow_queries(caplog))
@@ -0,0 +1,81 @@
+import sqlalchemy as sa
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+
+import migrate
+from database import Base
+
+# The schema Base.metadata.create_all() built before migrations existed: no
+# priority_rank, bed_reserved, latitude/longitude, triage_rank or support tables
+BASELINE_SCHEMA = [
+    """CREATE TABLE hospitals (
+        id INTEGER NOT NULL PRIMARY KEY, name VARCHAR(200) NOT NULL, address VARCHAR(500),
+        city VARCHAR(100), state VARCHAR(50), zip_code VARCHAR(20), capacity INTEGER,
+        available_beds INTEGER, phone VARCHAR(20), email VARCHAR(100), created_at DATETIME)""",
+    "CREATE INDEX ix_hospitals_id ON hospitals (id)",
+    """CREATE TABLE patients (
+        id INTEGER NOT NULL PRIMARY KEY, mrn VARCHAR(50) NOT NULL, first_name VARCHAR(100) NOT NULL,
+        last_name VARCHAR(100) NOT NULL, date_of_birth DATETIME, gender VARCHAR(20), phone VARCHAR(20),
+        email VARCHAR(100), address VARCHAR(500), emergency_contact VARCHAR(200), emergency_phone VARCHAR(20),
+        blood_type VARCHAR(10), allergies TEXT, current_medications TEXT, medical_history TEXT,
+        hospital_id INTEGER REFERENCES hospitals (id), triage_level VARCHAR(11), admission_date DATETIME,
+        current_diagnosis TEXT, attending_physician VARCHAR(200), created_at DATETIME, updated_at DATETIME)""",
+    "CREATE INDEX ix_patients_id ON patients (id)",
+    "CREATE UNIQUE INDEX ix_patients_mrn ON patients (mrn)",
+    """CREATE TABLE transfers (
+        id INTEGER NOT NULL PRIMARY KEY, patient_id INTEGER NOT NULL REFERENCES patients (id),
+        from_hospital_id INTEGER NOT NULL REFERENCES hospitals (id),
+        to_hospital_id INTEGER NOT NULL REFERENCES hospitals (id), transfer_reason TEXT NOT NULL,
+        transfer_status VARCHAR(11), priority VARCHAR(11), requested_by VARCHAR(200), approved_by VARCHAR(200),
+        requested_at DATETIME, approved_at DATETIME, completed_at DATETIME, notes TEXT,
+        documents_transferred TEXT)""",
+    "CREATE INDEX ix_transfers_id ON transfers (id)",
+]
+
+BASELINE_ROWS = [
+    "INSERT INTO hospitals (id, name, capacity, available_beds) VALUES (1, 'North', 10, 5), (2, 'South', 10, 5)",
+    "INSERT INTO patients (id, mrn, first_name, last_name, hospital_id, triage_level) VALUES "
+    "(1, 'M1', 'Ann', 'Lee', 1, 'CRITICAL'), (2, 'M2', 'Bo', 'Kim', 1, 'NON_URGENT'), (3, 'M3', 'Cy', 'Ng', 2, NULL)",
+    "INSERT INTO transfers (id, patient_id, from_hospital_id, to_hospital_id, transfer_reason, transfer_status, "
+    "priority, requested_at) VALUES (1, 1, 1, 2, 'r', 'IN_PROGRESS', 'CRITICAL', '2024-01-01 10:00:00'), "
+    "(2, 2, 1, 2, 'r', 'PENDING', 'SEMI_URGENT', '2024-01-02 10:00:00'), "
+    "(3, 3, 2, 1, 'r', 'COMPLETED', NULL, '2024-01-03 10:00:00')",
+]
+
+
+def upgrade(bind):
+    config = migrate.alembic_config()
+    with bind.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+
+
+def test_upgrades_a_baseline_database(tmp_path):
+    bind = sa.create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    with bind.begin() as connection:
+        for statement in BASELINE_SCHEMA + BASELINE_ROWS:
+            connection.exec_driver_sql(statement)
+
+    upgrade(bind)
+
+    with bind.connect() as connection:
+        assert MigrationContext.configure(connection).get_current_revision() == migrate.head_revision()
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+        transfers = connection.exec_driver_sql(
+            "SELECT id, priority_rank, bed_reserved FROM transfers ORDER BY id"
+        ).all()
+        assert transfers == [(1, 1, 0), (2, 3, 0), (3, 999, 0)]
+        patients = connection.exec_driver_sql("SELECT id, triage_rank FROM patients ORDER BY id").all()
+        assert patients == [(1, 1), (2, 4), (3, 999)]
+        assert connection.exec_driver_sql("SELECT latitude, longitude FROM hospitals WHERE id = 1").one() == (None, None)
+    bind.dispose()
+
+
+def test_upgrade_is_idempotent_on_a_current_database(tmp_path):
+    bind = sa.create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    upgrade(bind)
+    upgrade(bind)
+    with bind.connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+    bind.dispose()
@@ -0,0 +1,47 @@
+import threading
+import time
+
+from sqlalchemy import event, func
+
+
+def counted(hospital_id):
+    """(counter total, actual patients) for one hospital"""
+    from database import SessionLocal
+    from models import OccupancyCounter, Patient
+
+    db = SessionLocal()
+    try:
+        return (
+            db.query(func.coalesce(func.sum(OccupancyCounter.patient_count), 0))
+            .filter(OccupancyCounter.hospital_id == hospital_id).scalar(),
+            db.query(func.count(Patient.id)).filter(Patient.hospital_id == hospital_id).scalar()
+        )
+    finally:
+        db.close()
+
+
+def test_admission_during_reconcile_is_not_lost(client, hospitals, admit):
+    from database import SessionLocal, engine
+    from occupancy import reconcile_occupancy
+
+    admit(hospitals[0])
+    db = SessionLocal()
+    connection = db.connection()
+    admissions = []
+
+    def admit_while_counting(conn, cursor, statement, parameters, context, executemany):
+        # Once reconcile has counted the patients, admit another one and give it time to commit
+        if conn is connection and "FROM patients" in statement and not admissions:
+            admissions.append(threading.Thread(target=admit, args=(hospitals[0],)))
+            admissions[0].start()
+            time.sleep(0.3)
+
+    event.listen(engine, "after_cursor_execute", admit_while_counting)
+    try:
+        reconcile_occupancy(db)
+    finally:
+        event.remove(engine, "after_cursor_execute", admit_while_counting)
+        db.close()
+    admissions[0].join()
+    total, patients = counted(hospitals[0])
+    assert total == patients == 2
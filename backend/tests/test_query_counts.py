@@ -0,0 +1,77 @@
+"""Upper bounds on the SQL statements each hot endpoint issues.
+
+A failure here usually means a new lazy load or a per-row query (N+1) crept
+in. If a change legitimately needs another statement, raise the bound in the
+same commit and say why.
+"""
+import pytest
+
+from database import count_statements
+
+
+def statements(counter) -> list:
+    # Audit events are written in batches by a background thread, not by the request
+    return [statement for statement in counter.statements if "audit_events" not in statement]
+
+
+def request_within(client, bound: int, method: str, path: str, **kwargs):
+    with count_statements() as counter:
+        response = client.request(method, path, **kwargs)
+    assert response.status_code < 400, response.text
+    issued = statements(counter)
+    assert len(issued) <= bound, f"{method} {path}: {len(issued)} statements\n" + "\n".join(issued)
+    return response
+
+
+def test_create_patient(client, hospitals):
+    request_within(client, 9, "POST", "/api/patients/", json={
+        "mrn": "BOUND0001", "first_name": "Ada", "last_name": "Lovelace",
+        "date_of_birth": "1980-01-01T00:00:00", "gender": "Female",
+        "hospital_id": hospitals[0], "triage_level": "URGENT"
+    })
+
+
+def test_transfer_lifecycle(client, hospitals, admit):
+    patient = admit(hospitals[0])
+    # Includes a directory cache miss for each of the two new hospitals
+    response = request_within(client, 7, "POST", "/api/transfers/", json={
+        "patient_id": patient["id"], "from_hospital_id": hospitals[0], "to_hospital_id": hospitals[1],
+        "transfer_reason": "Cardiac care", "priority": "URGENT", "requested_by": "Dr. Lee"
+    })
+    transfer_id = response.json()["transfer"]["id"]
+    request_within(client, 8, "PUT", f"/api/transfers/{transfer_id}/status",
+                   params={"status": "IN_PROGRESS", "approved_by": "Dr. Lee"})
+    request_within(client, 13, "PUT", f"/api/transfers/{transfer_id}/status",
+                   params={"status": "COMPLETED", "approved_by": "Dr. Lee"})
+
+
+@pytest.mark.parametrize("path, bound", [
+    ("/api/patients/", 2),
+    ("/api/patients/?triage_level=URGENT", 2),
+    ("/api/patients/critical/list", 2),
+    ("/api/patients/stats/triage-distribution", 1),
+    ("/api/patients/search?q=Smith", 3),
+    ("/api/hospitals/", 2),
+    ("/api/transfers/", 2),
+    ("/api/transfers/?include_archived=true", 2),
+    ("/api/dashboard/summary", 4),
+])
+def test_list_routes(client, hospitals, admit, path, bound):
+    # Several rows, so a per-row query would blow the bound
+    for hospital_id in hospitals * 3:
+        admit(hospital_id)
+    request_within(client, bound, "GET", path)
+
+
+def test_hospital_patients(client, hospitals, admit):
+    for _ in range(5):
+        admit(hospitals[0])
+    # ETag versions, the hospital, its patients
+    request_within(client, 3, "GET", f"/api/hospitals/{hospitals[0]}/patients")
+
+
+def test_read_routes_are_counted(client, hospitals):
+    """GET routes run on the read-only pool; the counter must see them"""
+    with count_statements() as counter:
+        client.get("/api/hospitals/")
+    assert statements(counter)
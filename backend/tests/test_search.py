@@ -0,0 +1,41 @@
+def search(client, q, **params):
+    response = client.get("/api/patients/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_prefix_words_match_in_any_order(client, hospitals, admit):
+    patient = admit(hospitals[0], first_name="Johanna", last_name="Prefixson")
+    results = search(client, "prefix joh")
+    assert [result["id"] for result in results] == [patient["id"]]
+    assert results[0]["match"] == "prefix"
+
+
+def test_transposed_letters_match_fuzzily(client, hospitals, admit):
+    # The example from the endpoint's docs: "jonh" finds John
+    patient = admit(hospitals[0], first_name="John", last_name="Transposeton")
+    results = search(client, "jonh transposeton")
+    assert patient["id"] in [result["id"] for result in results]
+    assert next(result for result in results if result["id"] == patient["id"])["match"] == "fuzzy"
+
+
+def test_misspelled_last_name_matches_fuzzily(client, hospitals, admit):
+    patient = admit(hospitals[0], first_name="Mira", last_name="Kowalczyk")
+    assert patient["id"] in [result["id"] for result in search(client, "kowalcyzk")]
+
+
+def test_fuzzy_off_returns_prefix_matches_only(client, hospitals, admit):
+    admit(hospitals[0], first_name="Bartholomew", last_name="Nofuzz")
+    assert search(client, "bartholomwe", fuzzy="false") == []
+
+
+def test_exact_name_survives_a_crowd_of_longer_prefix_matches(client, hospitals, admit, monkeypatch):
+    import search as search_module
+
+    patient = admit(hospitals[0], first_name="Ana", last_name="Crowd")
+    for _ in range(4):
+        admit(hospitals[0], first_name="Anastasia", last_name="Crowd")
+    # Fewer candidates than newer prefix matches: the exact "ana" must still be ranked
+    monkeypatch.setattr(search_module, "RANK_CANDIDATES", 2)
+    results = search(client, "ana crowd")
+    assert results[0]["id"] == patient["id"]
@@ -0,0 +1,119 @@
+import hashlib
+import time
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from compression import strip_encoding_suffix
+from database import SessionLocal, get_read_db, get_async_read_db
+from models import CollectionVersion
+
+# Each collection carries a version number that every committed write bumps
+# (changelog.record_changes marks the collection; the bump runs just before
+# commit, in a fixed order so concurrent writers can't deadlock). List
+# endpoints derive strong ETags from the versions they read, so a client
+# revalidating with If-None-Match gets a bodiless 304 until something in
+# those collections changes, whichever worker made the change.
+
+COLLECTIONS = ("hospitals", "patients", "transfers")
+ENTITY_COLLECTIONS = {"hospital": "hospitals", "patient": "patients", "transfer": "transfers"}
+
+_PENDING = "medcare_changed_collections"
+
+
+def mark_changed(db: Session, *collections):
+    """Bump these collections' versions when db next commits"""
+    db.info.setdefault(_PENDING, set()).update(collections)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_versions(session: Session):
+    for collection in sorted(session.info.pop(_PENDING, ())):
+        session.execute(
+            update(CollectionVersion)
+            .where(CollectionVersion.collection == collection)
+            .values(version=CollectionVersion.version + 1)
+        )
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_versions(session: Session, previous_transaction):
+    session.info.pop(_PENDING, None)
+
+
+def ensure_collection_versions():
+    """Create missing version rows. New rows start from the clock, so a recreated
+    database never reuses version numbers (and ETags) a client may still hold."""
+    db = SessionLocal()
+    try:
+        existing = set(db.scalars(select(CollectionVersion.collection)))
+        missing = [collection for collection in COLLECTIONS if collection not in existing]
+        if missing:
+            start = time.time_ns() // 1000
+            db.execute(insert(CollectionVersion), [{"collection": c, "version": start} for c in missing])
+            db.commit()
+    except IntegrityError:
+        db.rollback()  # Another worker created them first
+    finally:
+        db.close()
+
+
+def collection_versions(db: Session, collections) -> tuple:
+    statement = select(CollectionVersion.collection, CollectionVersion.version).where(
+        CollectionVersion.collection.in_(collections)
+    )
+    rows = dict(db.execute(statement).all())
+    if len(rows) < len(collections):
+        # Without its row a collection would never be bumped and its ETags would never change
+        ensure_collection_versions()
+        rows = dict(db.execute(statement).all())
+    return tuple(rows[collection] for collection in collections)
+
+
+def make_etag(request: Request, versions) -> str:
+    """Strong ETag for this URL (path and query) at the given collection versions"""
+    key = f"{request.url.path}?{sorted(request.query_params.multi_items())}|{versions}"
+    return '"' + hashlib.blake2b(key.encode(), digest_size=12).hexdigest() + '"'
+
+
+def check_not_modified(request: Request, etag: str):
+    """Raise a 304 when If-None-Match names this ETag (in any content coding)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == "*" or strip_encoding_suffix(tag) == etag:
+            # Echo the client's tag so it keeps the representation it has
+            raise HTTPException(status_code=304, headers=cache_headers(tag if tag != "*" else etag))
+
+
+def cache_headers(etag: str) -> dict:
+    # no-cache: browsers may store the response but must revalidate every time
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def etag_for(*collections):
+    """Dependency returning the ETag for the request, or answering 304 if the client's copy is current"""
+
+    def dependency(request: Request, db: Session = Depends(get_read_db)) -> str:
+        etag = make_etag(request, collection_versions(db, collections))
+        check_not_modified(request, etag)
+        return etag
+
+    return dependency
+
+
+def async_etag_for(*collections):
+    """etag_for for the async routes"""
+
+    async def dependency(request: Request, db=Depends(get_async_read_db)) -> str:
+        etag = make_etag(request, await db.run_sync(collection_versions, collections))
+        check_not_modified(request, etag)
+        return etag
+
+    return dependency
@@ -269,23 +269,13 @@ async function loadCapacity() {
 // Load Analytics
 async function loadAnalytics() {
     try {
-        const [patientsRes, transfersRes, hospitalsRes] = await Promise.all([
-            fetch(`${API_BASE}/patients/?limit=1000`),
-            fetch(`${API_BASE}/transfers/`),
-            fetch(`${API_BASE}/hospitals/`)
-        ]);
-
-        const patients = await patientsRes.json();
-        const transfers = await transfersRes.json();
-        const hospitals = await hospitalsRes.json();
-
-        // Calculate stats
-        const totalPatients = patients.length;
-        const activeTransfers = transfers.filter(t => t.transfer_status === 'PENDING' || t.transfer_status === 'IN_PROGRESS').length;
-        const totalCapacity = hospitals.reduce((sum, h) => sum + h.capacity, 0);
-        const totalAvailable = hospitals.reduce((sum, h) => sum + h.available_beds, 0);
-        const networkCapacity = ((totalCapacity - totalAvailable) / totalCapacity * 100).toFixed(0);
-        const criticalPatients = patients.filter(p => p.triage_level === 'CRITICAL').length;
+        const res = await fetch(`${API_BASE}/dashboard/summary`);
+        const summary = await res.json();
+
+        const totalPatients = summary.total_patients;
+        const activeTransfers = summary.active_transfers;
+        const networkCapacity = summary.network_occupancy_rate.toFixed(0);
+        const criticalPatients = summary.critical_patients;
 
         document.getElementById('totalPatients').textContent = totalPatients;
         document.getElementById('activeTransfers').textContent = activeTransfers;
@@ -309,8 +299,35 @@ function refreshHospitals() {
     loadHospitals();
 }
 
+// Live updates: reload the visible view when the server reports a change
+const VIEW_LOADERS = {
+    patients: loadPatients,
+    transfers: loadTransfers,
+    hospitals: loadHospitals,
+    capacity: loadCapacity,
+    analytics: loadAnalytics
+};
+let liveRefreshTimer = null;
+
+function connectLiveUpdates() {
+    const source = new EventSource(`${API_BASE}/events/`);
+    const scheduleRefresh = () => {
+        // Coalesce bursts of events into a single reload
+        clearTimeout(liveRefreshTimer);
+        liveRefreshTimer = setTimeout(() => {
+            const active = document.querySelector('.sidebar-item.active');
+            const loader = active && VIEW_LOADERS[active.dataset.view];
+            if (loader) loader();
+        }, 500);
+    };
+    ['reset', 'patient.admitted', 'patient.bulk_admitted', 'patient.discharged',
+     'transfer.created', 'transfer.status_changed', 'transfer.batch_status_changed', 'transfer.cancelled',
+     'hospital.capacity_updated'].forEach(type => source.addEventListener(type, scheduleRefresh));
+}
+
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
     loadPatients();
     loadHospitals();
+    connectLiveUpdates();
 });
\ No newline at end of file